@@ -0,0 +1,138 @@
+"""Throughput of one CachedBackend file shared by many processes.
+
+Models the ``battery_driver.sh`` fan-out: independent Python processes
+(spawned, not forked — like separate shell jobs) pointing
+``CachedBackend`` at the same sqlite file. For each process count it
+times two phases, measured from a common start barrier:
+
+- **write**: every process evaluates its own slice of fresh samples —
+  all misses, so all queue-and-flush traffic contending for sqlite's
+  single write lock;
+- **read**: every process replays its slice through a fresh backend
+  (empty memory tier), so every call is a disk lookup through that
+  process's WAL read connection.
+
+and reports aggregate calls/s, the speedup over one process, and a
+check that the file ends up holding every entry exactly once.
+
+``--sim-ms 0`` (default) benchmarks the cache alone; a few ms of
+``--sim-ms`` stands in for a short ngspice run, where the write lock
+is idle most of the time and throughput scales with processes.
+
+Run:  python3 examples/cache_contention_benchmark.py [--samples 2000]
+      [--processes 1 2 4 8] [--sim-ms 0] [--flush-every 256]
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                "..")))
+
+from utils.tolerance import CachedBackend  # noqa: E402
+
+PARAMS = ["R1", "R2", "R3", "R4", "C1", "C2", "Q1_BF", "Resr"]
+
+
+class _Simulator:
+    """Stand-in for a metrics backend: ``sim_ms`` of wall time (as if
+    waiting on an ngspice subprocess), then four outputs."""
+
+    def __init__(self, sim_ms):
+        self.sim_ms = sim_ms
+
+    def __call__(self, **values):
+        if self.sim_ms:
+            time.sleep(self.sim_ms / 1000.0)
+        total = sum(values.values())
+        return {"vout": total, "ripple": total * 1e-3,
+                "pm": 45.0 + total % 10, "ring_rms": 1e-3 * total % 7}
+
+    def signature(self):
+        return "contention-benchmark"
+
+
+def _sample(i):
+    return {name: float(i) + j * 0.125 for j, name in enumerate(PARAMS)}
+
+
+def _worker(path, phase, start, n, sim_ms, flush_every, barrier, results):
+    cached = CachedBackend(_Simulator(sim_ms), path=path,
+                           flush_every=flush_every)
+    samples = [_sample(i) for i in range(start, start + n)]
+    barrier.wait()
+    t0 = time.perf_counter()
+    for s in samples:
+        cached(**s)
+    cached.close()                      # the last batch counts too
+    results.put((phase, time.perf_counter() - t0, cached.hits,
+                 cached.misses))
+
+
+def _run_phase(ctx, path, phase, processes, per_process, sim_ms,
+               flush_every):
+    barrier = ctx.Barrier(processes)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker,
+                         args=(path, phase, k * per_process, per_process,
+                               sim_ms, flush_every, barrier, results))
+             for k in range(processes)]
+    for p in procs:
+        p.start()
+    out = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+        if p.exitcode != 0:
+            raise RuntimeError(f"{phase} worker exited with {p.exitcode}")
+    elapsed = max(r[1] for r in out)
+    hits = sum(r[2] for r in out)
+    misses = sum(r[3] for r in out)
+    return processes * per_process / elapsed, hits, misses
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--samples", type=int, default=2000,
+                    help="calls per process per phase (default 2000)")
+    ap.add_argument("--processes", type=int, nargs="+",
+                    default=[1, 2, 4, 8])
+    ap.add_argument("--sim-ms", type=float, default=0.0,
+                    help="simulated backend time per miss, ms")
+    ap.add_argument("--flush-every", type=int, default=256)
+    args = ap.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{args.samples} calls/process, sim {args.sim_ms:g} ms/miss, "
+          f"flush_every={args.flush_every}, {os.cpu_count()} CPUs")
+    print(f"{'procs':>5} {'write calls/s':>14} {'x':>5} "
+          f"{'read calls/s':>14} {'x':>5}  entries")
+    base = None
+    for p in args.processes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "shared.sqlite")
+            CachedBackend(_Simulator(0), path=path).close()
+            write, _, misses = _run_phase(ctx, path, "write", p,
+                                          args.samples, args.sim_ms,
+                                          args.flush_every)
+            read, hits, _ = _run_phase(ctx, path, "read", p,
+                                       args.samples, args.sim_ms,
+                                       args.flush_every)
+            con = sqlite3.connect(path)
+            (entries,) = con.execute(
+                "SELECT COUNT(*) FROM entries").fetchone()
+            con.close()
+        expected = p * args.samples
+        ok = (entries == misses == hits == expected)
+        if base is None:
+            base = (write, read)
+        print(f"{p:>5} {write:>14,.0f} {write / base[0]:>5.1f} "
+              f"{read:>14,.0f} {read / base[1]:>5.1f}  "
+              f"{entries}/{expected}{'' if ok else '  MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
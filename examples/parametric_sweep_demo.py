@@ -336,19 +336,16 @@ def chart_load_correlation():
     Iload=50mA vs 60mA by their (other) input values, compute slope
     per pair, and correlate against each component to find what
     drives the negative-output-impedance instability."""
-    import json
-    import sqlite3
-    db = sqlite3.connect("/tmp/parametric_demo.sqlite")
-    rows = db.execute("SELECT key, value FROM cache").fetchall()
-    db.close()
+    from utils.tolerance import iter_entries
+    rows = [(inputs, outputs) for _sig, inputs, outputs
+            in iter_entries("/tmp/parametric_demo.sqlite")
+            if inputs is not None]
 
     # Group by all-input-keys-except-Iload. Each group should have
     # one entry at Iload=0.05 and one at Iload=0.06 — those are a
     # paired sample.
     pairs = {}
-    for key, value in rows:
-        inputs = dict(json.loads(key))
-        outputs = json.loads(value)
+    for inputs, outputs in rows:
         Iload = inputs.pop("Iload", None)
         if Iload is None or "v_out" not in outputs:
             continue
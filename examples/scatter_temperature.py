@@ -17,9 +17,7 @@ Saves charts at ``/tmp/temp_scatter_<name>.png``.
 """
 from __future__ import annotations
 
-import json
 import os
-import sqlite3
 import sys
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -29,19 +27,18 @@ matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import numpy as np
 
+from utils.tolerance import iter_entries
+
 
 def load_cache(path: str):
     """Returns list of (input_dict, output_dict) pairs from the cache.
     Loads every row across all signatures — caches contain a single
     signature per file in this workflow, so no filtering needed."""
-    db = sqlite3.connect(path)
-    rows = []
-    for key, value in db.execute("SELECT key, value FROM cache").fetchall():
-        inputs = dict(json.loads(key))
-        outputs = json.loads(value)
-        rows.append((inputs, outputs))
-    db.close()
-    return rows
+    if not os.path.exists(path):
+        return []
+    return [(inputs, outputs)
+            for _sig, inputs, outputs in iter_entries(path)
+            if inputs is not None]
 
 
 def to_arrays(rows, input_keys, output_keys):
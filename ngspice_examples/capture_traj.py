@@ -3,7 +3,9 @@ Writes traj_<tube>.csv with columns: t_ms (relative to fault), T."""
 import sys, subprocess, re, os
 import numpy as np
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import regulator as r
+from utils.tolerance.rawfile import read_wrdata
 
 T_INJ, T_END = 2.5, 3.5   # settled by <1s at realistic tau; capture to +1000ms
 for tube in (sys.argv[1:] or ["ilc11_7", "iv6", "iv18", "ilc11_8"]):
@@ -14,7 +16,7 @@ for tube in (sys.argv[1:] or ["ilc11_7", "iv6", "iv18", "ilc11_8"]):
     cir = re.sub(r"wrdata \S+/run\.data", f"wrdata {W}/run.data", cir)  # keep 50us default
     open(f"{W}/run.cir", "w").write(cir)
     subprocess.run(["ngspice", "-b", "run.cir"], cwd=W, capture_output=True, text=True, timeout=900)
-    d = np.loadtxt(f"{W}/run.data"); t = d[:, 0]; T = d[:, 9]
+    d = read_wrdata(f"{W}/run.data"); t = d[:, 0]; T = d[:, 9]
     rel = (t - T_INJ) * 1e3  # ms
     m = (rel >= -50) & (rel <= 800)   # the excursion window
     rel, T = rel[m], T[m]
@@ -13,11 +13,12 @@ import sys, subprocess, re, os, math, time, traceback
 import numpy as np
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import regulator as r
+from utils.tolerance.rawfile import read_wrdata
 
 TUBES = ["ilc11_7", "iv6", "iv18", "ilc11_8"]
 if os.environ.get("TUBE"): TUBES = [os.environ["TUBE"]]
-ROOT = "/tmp/battery"; os.makedirs(ROOT, exist_ok=True)
 QUICK = "quick" in sys.argv
 _tag = "".join(a for a in sys.argv[1:] if a in "ABCD") or "all"
 if os.environ.get("TUBE"): _tag += "_" + os.environ["TUBE"]
@@ -43,26 +44,24 @@ def thd_db(t, v, t0, t1, f_seed=1000.0):
     return 20*math.log10(math.sqrt(np.trapezoid(res*res, ts)/(ts[-1]-ts[0])) / denom)
 
 
-def run(cir, work, timeout=600):
-    """Run a netlist string, return data array or None (+ error tail)."""
-    work = re.sub(r"\s+", "_", work)  # no spaces in scratch-dir names (the WORST-corner bug)
-    os.makedirs(work, exist_ok=True)
-    cir = re.sub(r"wrdata \S+/run\.data", f"wrdata {work}/run.data", cir)
-    open(f"{work}/run.cir", "w").write(cir)
-    try:
-        p = subprocess.run(["ngspice", "-b", "run.cir"], cwd=work,
-                           capture_output=True, text=True, timeout=timeout)
-    except subprocess.TimeoutExpired:
-        return None, "TIMEOUT"
-    fp = f"{work}/run.data"
-    if not os.path.exists(fp):
-        return None, (p.stderr + p.stdout)[-200:].replace("\n", " ")
-    try:
-        d = np.loadtxt(fp)
-        os.remove(fp)  # tmpfs is RAM-backed and small -- free each ~20-55MB file now
-        return d, None
-    except Exception as e:
-        return None, f"loadtxt: {e}"
+def run(cir, label, timeout=600):
+    """Run a netlist string in its own scratch dir (r.SCRATCH), return data array
+    or None (+ error tail).  make_netlist()'s wrdata lands in that cwd."""
+    label = re.sub(r"\s+", "_", label)  # no spaces in scratch-dir names (the WORST-corner bug)
+    with r.SCRATCH.scratch(prefix=f"{label}-") as work:
+        (work / "run.cir").write_text(cir)
+        try:
+            p = subprocess.run(["ngspice", "-b", "run.cir"], cwd=work,
+                               capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return None, "TIMEOUT"
+        fp = work / "run.data"
+        if not fp.exists():
+            return None, (p.stderr + p.stdout)[-200:].replace("\n", " ")
+        try:
+            return read_wrdata(fp), None
+        except Exception as e:
+            return None, f"read_wrdata: {e}"
 
 
 def metrics(d, t_end, has_protect=False):
@@ -122,7 +121,7 @@ def suite_A():
             if "vbuf" in c: kw["v_buf"] = c["vbuf"]
             cir = r.make_netlist(T_end=T_END, **kw)
             if "vos" in c: cir = cir.replace("Vos=50u", f"Vos={c['vos']}u")
-            d, err = run(cir, f"{ROOT}/A_{tb}_{name[:6]}")
+            d, err = run(cir, f"A_{tb}_{name[:6]}")
             if d is None: append(f"| {tb} | {name} | FAIL: {err} | | | |"); continue
             m = metrics(d, T_END)
             append(f"| {tb} | {name} | +{m['T_overshoot']:.1f}K | {m['T_ss']:.1f}K "
@@ -150,7 +149,7 @@ def suite_B():
             vos = rng.uniform(-50, 50)
             cir = r.make_netlist(T_end=T_END, **kw)
             cir = cir.replace("Vos=50u", f"Vos={vos:.1f}u")
-            d, err = run(cir, f"{ROOT}/B_{tb}_{i}")
+            d, err = run(cir, f"B_{tb}_{i}")
             if d is None: fails += 1; continue
             m = metrics(d, T_END)
             T_ss_list.append(m["T_ss"]); ov_list.append(m["T_overshoot"]); thd_list.append(m["thd"])
@@ -189,7 +188,7 @@ def suite_C():
                     f"V_vcc vcc_top 0 PWL(0 {vb} 3 {vb} 3.05 {0.7*vb} 3.5 {0.7*vb} 3.55 {vb} 100 {vb})", cir)
                 cir = re.sub(r"V_vee vee_top 0 DC \S+",
                     f"V_vee vee_top 0 PWL(0 {-vb} 3 {-vb} 3.05 {-0.7*vb} 3.5 {-0.7*vb} 3.55 {-vb} 100 {-vb})", cir)
-            d, err = run(cir, f"{ROOT}/C_{tb}_{sc}")
+            d, err = run(cir, f"C_{tb}_{sc}")
             if d is None: append(f"| {tb} | {sc} | FAIL: {err} | | |"); continue
             m = metrics(d, T_END, has_protect=True)
             append(f"| {tb} | {sc} | {m['T_peak']:.1f}K | {m['T_ss']:.1f}K "
@@ -213,7 +212,7 @@ def suite_D():
             elif fl == "atten_bot_short": cir = short_element(cir, "R_atten_bot")
             elif fl == "botref_short": cir = short_element(cir, "R_botref")
             elif fl == "sense_open": cir = open_element(cir, "R_sense")
-            d, err = run(cir, f"{ROOT}/D_{tb}_{fl}")
+            d, err = run(cir, f"D_{tb}_{fl}")
             if d is None: append(f"| {tb} | {fl} | FAIL: {err} | | |"); continue
             m = metrics(d, T_END, has_protect=True)
             t = d[:, 0]; T = d[:, 9]; T_final = float(np.mean(T[t > T_END - 0.3]))
@@ -3,23 +3,23 @@ window for each alpha in the finer bias-ratio sweep.
 
 By default, ngspice's `wrdata` writes at the .tran print step (10 us here)
 regardless of the internal solver, hiding the adaptive behaviour. To see
-the actual solver-native time points we re-run each alpha and emit an
-ASCII rawfile via the `write` command, which preserves every accepted
+the actual solver-native time points we re-run each alpha and emit a
+binary rawfile via the `write` command, which preserves every accepted
 solver step.
 
 For each alpha:
   - Generate the netlist (Wien + biased BJTs + raw output).
   - Run ngspice in batch mode.
-  - Parse the rawfile to recover the full time axis.
+  - Memory-map the rawfile to recover the full time axis.
   - Restrict to the same window used by the lock-in THD readout
     (t in [0.05, 0.085] s) and compute dt[k] = t[k+1] - t[k].
   - Plot the dt distribution as a violin per alpha, with the THD curve
     overlaid below for context.
 """
 from pathlib import Path
-import re
 import shutil
 import subprocess
+import sys
 import numpy as np
 import matplotlib
 
@@ -27,6 +27,9 @@ matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
 HERE = Path(__file__).parent
+sys.path.insert(0, str(HERE.resolve().parent))
+from utils.tolerance.rawfile import read_raw
+
 WORK = HERE / "_dt_sweep"
 WORK.mkdir(exist_ok=True)
 
@@ -68,7 +71,7 @@ Ebuf  out  0   oa  0     1.0
 .tran 1u 100m UIC
 
 .control
-set filetype=ascii
+set filetype=binary
 run
 write {raw_path.as_posix()} v(out)
 .endcontrol
@@ -78,15 +81,8 @@ write {raw_path.as_posix()} v(out)
 
 
 def parse_raw_time(path: Path) -> np.ndarray:
-    """Extract the time column from an ngspice ASCII raw file."""
-    text = path.read_text()
-    _, _, body = text.partition("Values:\n")
-    times: list[float] = []
-    for line in body.splitlines():
-        parts = line.split("\t")
-        if len(parts) >= 2 and parts[0].strip().isdigit():
-            times.append(float(parts[1]))
-    return np.asarray(times)
+    """Extract the time column from an ngspice raw file."""
+    return np.array(read_raw(path)[-1]["time"])
 
 
 def run_one(alpha: float) -> np.ndarray:
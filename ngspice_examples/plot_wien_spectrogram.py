@@ -4,6 +4,7 @@ The ngspice adaptive timestep is non-uniform, so we first resample v(out)
 onto a uniform grid before computing the STFT.
 """
 from pathlib import Path
+import sys
 import numpy as np
 import matplotlib
 
@@ -13,7 +14,10 @@ from scipy.signal import ShortTimeFFT
 from scipy.signal.windows import hann
 
 HERE = Path(__file__).parent
-d = np.loadtxt(HERE / "wien_tran.data")
+sys.path.insert(0, str(HERE.resolve().parent))
+from utils.tolerance.rawfile import read_wrdata
+
+d = read_wrdata(HERE / "wien_tran.data")
 t_raw = d[:, 0]
 vout_raw = d[:, 1]
 
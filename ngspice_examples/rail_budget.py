@@ -10,6 +10,7 @@ import numpy as np
 HERE = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, HERE)
 import regulator as r
+from utils.tolerance.rawfile import read_wrdata
 
 TUBES = ["iv18", "iv6", "ilc11_7", "ilc11_8"]
 EXTRA_CH = 6           # op-amp channels not in this sim config (real board has 16)
@@ -30,14 +31,15 @@ def thd_db(t, y, ncyc=150):
     return 20 * np.log10(harm / fund) if fund > 0 else float("nan")
 
 def run_tube(key):
-    net = r.make_netlist(instrument_power=True, T_end=T_END, **r.TUBES[key])
-    (r.WORK / f"rb_{key}.cir").write_text(net)
-    p = subprocess.run(["ngspice", "-b", f"rb_{key}.cir"], cwd=r.WORK,
-                       capture_output=True, text=True, timeout=1800)
-    f = r.WORK / "run.data"
-    if not f.exists():
-        return dict(key=key, err=p.stderr[-300:] or "no data")
-    d = np.loadtxt(f); f.unlink()
+    with r.SCRATCH.scratch(prefix=f"rb_{key}-") as work:
+        net = r.make_netlist(data_dir=work, instrument_power=True, T_end=T_END, **r.TUBES[key])
+        (work / f"rb_{key}.cir").write_text(net)
+        p = subprocess.run(["ngspice", "-b", f"rb_{key}.cir"], cwd=work,
+                           capture_output=True, text=True, timeout=1800)
+        f = work / "run.data"
+        if not f.exists():
+            return dict(key=key, err=p.stderr[-300:] or "no data")
+        d = read_wrdata(f)
     t = d[:, 0]
     sm = t > t[-1] - 0.20            # last 200 ms steady window
     ts = t[sm]
@@ -13,12 +13,18 @@ The diagnostic functions below run two simulations:
   B) Steady-state with per-device current sensing (V_im=0V sources in
      series with key paths).  Compute per-device dissipation, find hotspots.
 """
-import subprocess, numpy as np, sys, re
+import subprocess, numpy as np, sys, re, os
 from pathlib import Path
 from xml.sax.saxutils import escape as xml_escape
 
 HERE = Path(__file__).resolve().parent
-WORK = HERE / "_regulator"; WORK.mkdir(exist_ok=True)
+sys.path.insert(0, str(HERE.parent))
+from utils.tolerance.rawfile import read_wrdata
+from utils.tolerance.workarea import WorkArea
+# Where run() and the harnesses importing this module simulate: tmpfs per-run
+# scratch dirs (SIM_WORKDIR overrides).  Pass one to make_netlist(data_dir=...).
+SCRATCH = (WorkArea(root=os.environ["SIM_WORKDIR"]) if os.environ.get("SIM_WORKDIR")
+           else WorkArea.tmpfs())
 UOPAMP = (HERE / "uopamp.lib").as_posix()
 H11F_LIB = (HERE / "spice_models" / "H11F1.spice.txt").as_posix()
 
@@ -83,7 +89,7 @@ TUBES = {
 TUBE_NAMES = {"ilc11_7": "ILC1-1/7", "iv6": "IV-6", "iv18": "IV-18", "ilc11_8": "ILC1-1/8"}
 
 
-def make_netlist(*, instrument_power=False, T_end=15.0,
+def make_netlist(*, data_dir=".", instrument_power=False, T_end=15.0,
                   v_buf=10, V_led=5.0, t_rail_ramp=0.0,
                   R_bias=2200, k_buf=14, V_src_rms=0.1, t_src_ramp=0.017,
                   R_cs=0.01, I_limit_enable=False,
@@ -120,6 +126,10 @@ def make_netlist(*, instrument_power=False, T_end=15.0,
     polarity_swap=False (legacy):  V_int=0 → I_F=0 → no drive; loop has to
       wind V_int UP to deliver drive.  See se_h11f_overshoot_thd_tradeoff
       memory note for why this gives bigger overshoot.
+
+    data_dir: where the .control block's wrdata writes run.data.  Default ".":
+      ngspice's working directory, so a harness that runs the netlist in its
+      own scratch dir (cwd=...) finds run.data there without editing the text.
     """
     V_src_pk = V_src_rms * np.sqrt(2)
     # The over-power disconnect reuses the supervisor's V_int-rail signals
@@ -662,21 +672,22 @@ R_bc e_sat n_int_minus {R_int / 20}
 .save v(v_osc_drive) v(node_A) v(n_demod_dc) v(v_int) v(T_node) v(r_fil) v(n_led_a){save_extra}{supervisor_save}{overpower_save}
 .control
 run
-wrdata {WORK.as_posix()}/run.data v(v_osc_drive) v(node_A) v(n_demod_dc) v(v_int) v(T_node) v(r_fil) v(n_led_a){save_extra}{supervisor_save}{overpower_save}
+wrdata {Path(data_dir).as_posix()}/run.data v(v_osc_drive) v(node_A) v(n_demod_dc) v(v_int) v(T_node) v(r_fil) v(n_led_a){save_extra}{supervisor_save}{overpower_save}
 .endc
 .end
 """
 
 
 def run(label, **kw):
-    cir = WORK / f"{label}.cir"
-    dat = WORK / "run.data"
-    cir.write_text(make_netlist(**kw))
-    res = subprocess.run(["ngspice", "-b", cir.name], cwd=WORK,
-                         capture_output=True, text=True, timeout=900)
-    if res.returncode != 0:
-        return None, res.stderr[-400:]
-    return np.loadtxt(dat), None
+    # Own scratch dir per run (removed after), so concurrent runs don't share run.data.
+    with SCRATCH.scratch(prefix=f"{label}-") as work:
+        cir = make_netlist(data_dir=work, **kw)
+        (work / f"{label}.cir").write_text(cir)
+        res = subprocess.run(["ngspice", "-b", f"{label}.cir"], cwd=work,
+                             capture_output=True, text=True, timeout=900)
+        if res.returncode != 0:
+            return None, res.stderr[-400:]
+        return read_wrdata(work / "run.data"), None
 
 
 def cold_start_analysis():
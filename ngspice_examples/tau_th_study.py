@@ -6,24 +6,25 @@ Run per tube via TUBE env: TUBE=iv18 python3 tau_th_study.py
 import sys, subprocess, re, os, math
 import numpy as np
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import regulator as r
+from utils.tolerance.rawfile import read_wrdata
 
 TAU_EST = {"ilc11_7": 0.42, "iv6": 0.20, "iv18": 0.19, "ilc11_8": 0.62}
 TUBE = os.environ.get("TUBE", "iv18")
-WORK = f"/tmp/tau_{TUBE}"; os.makedirs(WORK, exist_ok=True)
 REPORT = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"tau_th_study_{TUBE}.md")
 
 
 def run(cir, tag, timeout=900):
-    w = f"{WORK}/{tag}"; os.makedirs(w, exist_ok=True)
-    cir = re.sub(r"wrdata \S+/run\.data", f"wrdata {w}/run.data", cir)
-    open(f"{w}/run.cir", "w").write(cir)
-    try:
-        p = subprocess.run(["ngspice", "-b", "run.cir"], cwd=w, capture_output=True, text=True, timeout=timeout)
-    except subprocess.TimeoutExpired:
-        return None
-    if not os.path.exists(f"{w}/run.data"): return None
-    d = np.loadtxt(f"{w}/run.data"); os.remove(f"{w}/run.data"); return d
+    # make_netlist()'s wrdata writes run.data into the cwd: the scratch dir.
+    with r.SCRATCH.scratch(prefix=f"tau_{TUBE}_{tag}-") as w:
+        (w / "run.cir").write_text(cir)
+        try:
+            p = subprocess.run(["ngspice", "-b", "run.cir"], cwd=w, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return None
+        if not (w / "run.data").exists(): return None
+        return read_wrdata(w / "run.data")
 
 
 def thd_db(t, v, t0, t1, f=1000.0):
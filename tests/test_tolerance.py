@@ -1,5 +1,6 @@
 import os, sys, math
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import numpy as np
 import pytest
 
 import matplotlib
@@ -336,6 +337,44 @@ def test_failure_modes_distinguish_independent_vs_joint_failure():
         assert failing_set == frozenset({"a"})
 
 
+@pytest.mark.parametrize("n_specs", [3, 20, 64, 70])
+def test_failure_mode_bitmasks_match_per_row_frozensets(n_specs):
+    """Packed-bitmask counting (uint64 up to 64 specs, byte rows
+    beyond) agrees with the obvious one-frozenset-per-row count."""
+    from collections import Counter
+    from utils.tolerance.analyze import _count_failure_modes
+
+    rng = np.random.default_rng(n_specs)
+    fail = rng.random((5000, n_specs)) < 1.5 / n_specs
+    names = [f"s{j}" for j in range(n_specs)]
+    expected = Counter(
+        frozenset(names[j] for j in np.flatnonzero(row))
+        for row in fail if row.any()
+    )
+    assert _count_failure_modes(fail, names) == dict(expected)
+
+
+def test_many_spec_failure_modes_per_sample_path():
+    """20 specs through the per-sample path: modes partition the
+    failing samples and agree with the vectorized path."""
+    spec = {f"m{j}": ("within", 0.004 + 0.001 * j) for j in range(20)}
+
+    def scalar(R1, R2):
+        return {f"m{j}": R1 * (1 + 0.01 * j) + R2 for j in range(20)}
+
+    def batch(R1, R2):
+        return {f"m{j}": R1 * (1 + 0.01 * j) + R2 for j in range(20)}
+
+    kw = dict(nominal_values={"R1": 1e3, "R2": 1e3},
+              passive_tolerances={"R": 0.01}, spec=spec,
+              n_mc=2000, seed=8)
+    a = analyze(metrics=scalar, **kw)
+    b = analyze(metrics=batch, vectorized=True, **kw)
+    assert sum(a.failure_modes.values()) == a.samples_total - a.samples_pass
+    assert a.failure_modes == b.failure_modes
+    assert a.per_spec_pass == b.per_spec_pass
+
+
 # ---------- Monotonicity ----------
 
 # ---------- Plotting ----------
@@ -672,6 +711,773 @@ def test_workers_propagates_metric_exception():
         )
 
 
+def _rc_fc(R, C):
+    """Module-level (picklable) metric for the process-pool tests."""
+    return {"fc": 1 / (2 * math.pi * R * C)}
+
+
+def _rc_fc_batch(R, C):
+    return {"fc": 1 / (2 * np.pi * R * C)}
+
+
+RC_PROCESS_COMMON = dict(
+    nominal_values={"R": 1e3, "C": 1e-9},
+    passive_tolerances={"R": 0.01, "C": 0.05},
+    spec={"fc": ("within", 0.02)},
+    n_mc=500, seed=999,
+)
+
+
+def test_process_executor_matches_serial_results():
+    """Blocks come back in submission order, so a process pool gives
+    the same counts and the same per-sample arrays as workers=1 —
+    whatever the block size, including one that doesn't divide n_mc."""
+    serial = analyze(metrics=_rc_fc, workers=1, **RC_PROCESS_COMMON)
+    for chunk in (None, 37):
+        par = analyze(metrics=_rc_fc, workers=3, executor="process",
+                      chunk_size=chunk, **RC_PROCESS_COMMON)
+        assert par.samples_pass == serial.samples_pass
+        assert par.failure_modes == serial.failure_modes
+        assert np.array_equal(par.metric_samples["fc"],
+                              serial.metric_samples["fc"])
+
+
+def test_process_executor_with_vectorized_blocks():
+    serial = analyze(metrics=_rc_fc, **RC_PROCESS_COMMON)
+    par = analyze(metrics=_rc_fc_batch, vectorized=True, workers=2,
+                  executor="process", chunk_size=100,
+                  **RC_PROCESS_COMMON)
+    assert par.samples_pass == serial.samples_pass
+    assert par.per_spec_pass == serial.per_spec_pass
+
+
+class _BatchingRC:
+    """Per-sample metric that also takes ``batch_size`` samples per
+    ``run_many`` call, recording the chunk sizes it saw."""
+    batch_size = 7
+
+    def __init__(self):
+        self.chunks = []
+
+    def __call__(self, R, C):
+        return _rc_fc(R, C)
+
+    def run_many(self, values_list):
+        self.chunks.append(len(values_list))
+        return [_rc_fc(**v) for v in values_list]
+
+
+def test_run_many_batches_in_every_executor():
+    serial = analyze(metrics=_rc_fc, **RC_PROCESS_COMMON)
+    for kwargs in ({}, {"workers": 3},
+                   {"workers": 2, "executor": "process", "chunk_size": 100}):
+        metrics = _BatchingRC()
+        par = analyze(metrics=metrics, **kwargs, **RC_PROCESS_COMMON)
+        assert np.array_equal(par.metric_samples["fc"],
+                              serial.metric_samples["fc"])
+        if "executor" not in kwargs:    # process workers have copies
+            assert max(metrics.chunks) == 7
+            assert sum(metrics.chunks) == RC_PROCESS_COMMON["n_mc"]
+
+
+def test_process_executor_rejects_unpicklable_metrics():
+    with pytest.raises(TypeError, match="picklable"):
+        analyze(metrics=lambda R, C: {"fc": R * C}, workers=2,
+                executor="process", **RC_PROCESS_COMMON)
+
+
+def test_unknown_executor_raises():
+    with pytest.raises(ValueError, match="executor"):
+        analyze(metrics=_rc_fc, workers=2, executor="fiber",
+                **RC_PROCESS_COMMON)
+
+
+# ---------- Vectorised batch metrics ----------
+
+def _sk_scalar(R1, R2, C1, C2):
+    return {"fc": 1 / (2 * math.pi * math.sqrt(R1 * R2 * C1 * C2)),
+            "Q": math.sqrt(R1 * R2 * C2 / C1) / (R1 + R2)}
+
+
+def _sk_batch(R1, R2, C1, C2):
+    return {"fc": 1 / (2 * np.pi * np.sqrt(R1 * R2 * C1 * C2)),
+            "Q": np.sqrt(R1 * R2 * C2 / C1) / (R1 + R2)}
+
+
+SK_COMMON = dict(
+    nominal_values={"R1": 1e4, "R2": 1e4, "C1": 1e-8, "C2": 2.2e-8},
+    passive_tolerances={"R": 0.01, "C": 0.05},
+    spec={"fc": ("within", 0.02), "Q": ("within", 0.03)},
+    n_mc=3000, seed=11,
+)
+
+
+def test_vectorized_matches_per_sample_path():
+    """Same seed → same sample matrix, so the batch path must agree
+    with the per-sample path on every count, not just statistically."""
+    serial = analyze(metrics=_sk_scalar, **SK_COMMON)
+    batch = analyze(metrics=_sk_batch, vectorized=True, **SK_COMMON)
+    assert batch.samples_pass == serial.samples_pass
+    assert batch.per_spec_pass == serial.per_spec_pass
+    assert batch.failure_modes == serial.failure_modes
+    assert batch.nominal_metrics["fc"] == pytest.approx(
+        serial.nominal_metrics["fc"])
+    assert batch.metric_stats["Q"].p95 == pytest.approx(
+        serial.metric_stats["Q"].p95)
+    assert np.allclose(batch.metric_samples["fc"],
+                       serial.metric_samples["fc"])
+
+
+def test_vectorized_calls_metrics_once_with_arrays():
+    calls = []
+
+    def metrics(R, C):
+        calls.append((np.shape(R), np.shape(C)))
+        return {"fc": 1 / (2 * np.pi * R * C)}
+
+    analyze(
+        nominal_values={"R": 1e3, "C": 1e-9},
+        passive_tolerances={"R": 0.01, "C": 0.05},
+        metrics=metrics, spec={"fc": ("within", 0.05)},
+        n_mc=1000, seed=0, vectorized=True,
+    )
+    # One nominal call on length-1 arrays, one batch call.
+    assert calls == [((1,), (1,)), ((1000,), (1000,))]
+
+
+def test_vectorized_within_db_fails_non_positive_and_nan():
+    def metrics(R):
+        g = R - 1e3              # straddles zero → negative gains
+        g = np.where(np.abs(g) < 1.0, np.nan, g)
+        return {"g": g, "ref": np.full_like(R, 5.0)}
+
+    kw = dict(
+        nominal_values={"R": 1.01e3},
+        passive_tolerances={"R": 0.03},
+        spec={"g": ("within_db", 100.0)},
+        n_mc=2000, seed=3,
+    )
+    batch = analyze(metrics=metrics, vectorized=True, **kw)
+    serial = analyze(
+        metrics=lambda R: {k: float(v[0]) for k, v in
+                           metrics(np.array([R])).items()},
+        **kw,
+    )
+    assert batch.per_spec_pass == serial.per_spec_pass
+    assert 0 < batch.samples_pass < 2000
+
+
+def test_vectorized_scalar_metric_broadcasts():
+    r = analyze(
+        nominal_values={"R": 1e3},
+        passive_tolerances={"R": 0.01},
+        metrics=lambda R: {"v": R, "ref": 2.5},
+        spec={"ref": ("<", 3.0)},
+        n_mc=50, seed=0, vectorized=True,
+    )
+    assert r.samples_pass == 50
+    assert r.metric_samples["ref"].shape == (50,)
+
+
+def test_vectorized_wrong_length_raises():
+    with pytest.raises(ValueError, match="vectorized metrics returned"):
+        analyze(
+            nominal_values={"R": 1e3},
+            passive_tolerances={"R": 0.01},
+            metrics=lambda R: {"v": R[:1]},
+            spec={"v": ("<", 1e9)},
+            n_mc=10, seed=0, vectorized=True,
+        )
+
+
+def test_vectorized_receives_T_column():
+    from utils.tolerance import Uniform
+    seen = {}
+
+    def metrics(R, T):
+        seen["T"] = np.shape(T)
+        return {"v": R * (1 + 1e-3 * (T - 25))}
+
+    analyze(
+        nominal_values={"R": 1e3},
+        passive_tolerances={"R": 0.01},
+        metrics=metrics, spec={"v": ("within", 0.2)},
+        n_mc=64, seed=0, vectorized=True,
+        temperature=Uniform(-40, 85),
+    )
+    assert seen["T"] == (64,)
+
+
+# ---------- Streaming accumulation ----------
+
+def test_streaming_single_chunk_matches_batch_path():
+    """One chunk covering n_mc draws exactly the non-streaming samples,
+    so counts agree exactly and, below the sketch size, so do the
+    percentiles."""
+    full = analyze(metrics=_sk_batch, vectorized=True, **SK_COMMON)
+    stream = analyze(metrics=_sk_batch, vectorized=True, streaming=True,
+                     chunk_size=SK_COMMON["n_mc"], **SK_COMMON)
+    assert stream.samples_pass == full.samples_pass
+    assert stream.per_spec_pass == full.per_spec_pass
+    assert stream.failure_modes == full.failure_modes
+    for k in ("fc", "Q"):
+        a, b = stream.metric_stats[k], full.metric_stats[k]
+        assert a.p5 == pytest.approx(b.p5)
+        assert a.p99 == pytest.approx(b.p99)
+        assert a.mean == pytest.approx(b.mean)
+        assert a.std == pytest.approx(b.std)
+        assert a.skew == pytest.approx(b.skew, abs=1e-9)
+
+
+def test_streaming_chunked_is_deterministic_and_consistent():
+    kw = dict(SK_COMMON, n_mc=200_000)
+    a = analyze(metrics=_sk_batch, vectorized=True, streaming=True,
+                chunk_size=30_000, **kw)
+    b = analyze(metrics=_sk_batch, vectorized=True, streaming=True,
+                chunk_size=30_000, **kw)
+    assert a.samples_pass == b.samples_pass
+    assert a.metric_stats == b.metric_stats
+    assert sum(a.failure_modes.values()) == a.samples_total - a.samples_pass
+    full = analyze(metrics=_sk_batch, vectorized=True, **kw)
+    assert a.yield_pct == pytest.approx(full.yield_pct, abs=0.5)
+    assert a.metric_stats["fc"].p95 == pytest.approx(
+        full.metric_stats["fc"].p95, rel=2e-3)
+
+
+def test_streaming_reservoir_bounds_metric_samples():
+    r = analyze(metrics=_sk_batch, vectorized=True, streaming=True,
+                chunk_size=1000, reservoir_size=500,
+                **dict(SK_COMMON, n_mc=20_000))
+    assert r.samples_total == 20_000
+    assert r.metric_samples["fc"].shape == (500,)
+    assert np.all(np.isfinite(r.metric_samples["Q"]))
+    none = analyze(metrics=_sk_batch, vectorized=True, streaming=True,
+                   chunk_size=1000, reservoir_size=0,
+                   **dict(SK_COMMON, n_mc=2000))
+    assert none.metric_samples["fc"].size == 0
+
+
+def test_streaming_per_sample_metrics_and_nan_handling():
+    """Per-sample (non-vectorized) metrics stream too; NaN samples fail
+    their spec and are excluded from the stats, as in the full path."""
+    def metrics(R):
+        return {"v": float("nan") if R > 1.01e3 else R}
+
+    kw = dict(nominal_values={"R": 1e3}, passive_tolerances={"R": 0.03},
+              spec={"v": ("<", 1e9)}, n_mc=3000, seed=5)
+    full = analyze(metrics=metrics, **kw)
+    stream = analyze(metrics=metrics, streaming=True, chunk_size=3000,
+                     **kw)
+    assert stream.samples_pass == full.samples_pass < 3000
+    assert stream.metric_stats["v"].max == full.metric_stats["v"].max
+
+
+def test_quantile_sketch_rank_error_small():
+    from utils.tolerance.streaming import QuantileSketch
+    rng = np.random.default_rng(0)
+    x = rng.lognormal(size=500_000)
+    sk = QuantileSketch(k=1024, rng=np.random.default_rng(1))
+    for part in np.array_split(x, 17):
+        sk.update(part)
+    assert sk.count == x.size
+    qs = [0.01, 0.05, 0.5, 0.95, 0.99]
+    for q, v in zip(qs, sk.quantiles(qs)):
+        assert abs((x < v).mean() - q) < 2e-3
+
+
+# ---------- Sequential MC / early stopping ----------
+
+def test_early_stop_width_stops_obvious_full_yield_design():
+    """A design with an overwhelming margin is settled after one batch:
+    100/100 passes already gives a Wilson interval under 4 points."""
+    from utils.tolerance import EarlyStop
+    r = analyze(metrics=_rc_fc,
+                early_stop=EarlyStop(width=4.0, batch_size=100),
+                **dict(RC_PROCESS_COMMON, spec={"fc": ("within", 0.5)},
+                       n_mc=1000))
+    assert r.samples_total == 100
+    assert r.stopped_early
+    assert r.yield_pct == 100.0
+    lo, hi = r.yield_interval
+    assert hi == pytest.approx(100.0) and hi - lo < 4.0
+    assert r.interval_confidence == 0.95
+    assert "interval" in str(r)
+
+
+def test_early_stop_threshold_decides_failing_design_quickly():
+    """~50% yield against a 90% target: fail is decided long before the
+    cap, and the interval sits wholly below the threshold."""
+    from utils.tolerance import EarlyStop
+    r = analyze(metrics=_rc_fc,
+                early_stop=EarlyStop(threshold=90.0, batch_size=50),
+                **dict(RC_PROCESS_COMMON, n_mc=5000, seed=3,
+                       spec={"fc": ("<", 1 / (2 * math.pi * 1e-6))}))
+    assert r.stopped_early and r.samples_total <= 200
+    assert r.yield_interval[1] < 90.0
+
+
+def test_early_stop_is_seed_deterministic_and_respects_cap():
+    from utils.tolerance import EarlyStop
+    rule = EarlyStop(width=0.5, batch_size=64,
+                     method="clopper-pearson")
+    kw = dict(RC_PROCESS_COMMON, n_mc=300)
+    a = analyze(metrics=_rc_fc, early_stop=rule, **kw)
+    b = analyze(metrics=_rc_fc, early_stop=rule, **kw)
+    assert a.samples_total == b.samples_total == 300
+    assert not a.stopped_early
+    assert a.samples_pass == b.samples_pass
+    assert np.array_equal(a.metric_samples["fc"], b.metric_samples["fc"])
+    lo, hi = a.yield_interval
+    assert lo <= a.yield_pct <= hi
+
+
+def test_early_stop_combines_with_streaming():
+    from utils.tolerance import EarlyStop
+    r = analyze(metrics=_sk_batch, vectorized=True, streaming=True,
+                reservoir_size=50,
+                early_stop=EarlyStop(width=2.0, batch_size=1000),
+                **dict(SK_COMMON, n_mc=1_000_000))
+    assert r.stopped_early and r.samples_total < 1_000_000
+    assert r.metric_samples["fc"].shape == (50,)
+
+
+def test_interval_functions_match_scipy_reference():
+    from scipy.stats import binomtest
+    from utils.tolerance.sequential import (wilson_interval,
+                                            clopper_pearson_interval)
+    for k, n in [(0, 10), (3, 10), (97, 100), (100, 100)]:
+        ref = binomtest(k, n).proportion_ci(0.9, method="exact")
+        assert clopper_pearson_interval(k, n, 0.9) == pytest.approx(
+            (ref.low, ref.high))
+        ref = binomtest(k, n).proportion_ci(0.9, method="wilson")
+        assert wilson_interval(k, n, 0.9) == pytest.approx(
+            (ref.low, ref.high))
+
+
+def test_early_stop_validates_arguments():
+    from utils.tolerance import EarlyStop
+    with pytest.raises(ValueError, match="width=, threshold="):
+        EarlyStop()
+    with pytest.raises(ValueError, match="method"):
+        EarlyStop(width=1.0, method="jeffreys")
+    with pytest.raises(TypeError, match="EarlyStop"):
+        analyze(metrics=_rc_fc, early_stop={"width": 1.0},
+                **RC_PROCESS_COMMON)
+
+
+# ---------- Importance sampling (rare events) ----------
+
+from scipy.stats import norm as _norm
+
+from utils.tolerance import ImportanceSampling
+
+# v = R1 + R2 with σ(R) = 1000·0.01/3, so σ(v) = √2·σ(R) exactly and
+# the failure rate of a threshold k·σ(v) above nominal is Φ(-k).
+_SIG_V = math.sqrt(2) * 1000 * 0.01 / 3
+IS_COMMON = dict(
+    nominal_values={"R1": 1e3, "R2": 1e3},
+    passive_tolerances={"R": 0.01},
+    metrics=lambda R1, R2: {"v": R1 + R2},
+    vectorized=True, n_mc=4000, seed=1,
+)
+
+
+@pytest.mark.parametrize("shift", ["linearized", "pilot"])
+def test_importance_matches_analytic_ppm(shift):
+    k = 4.75
+    r = analyze(spec={"v": ("<", 2000 + k * _SIG_V)},
+                importance=ImportanceSampling(shift=shift), **IS_COMMON)
+    expected_ppm = 1e6 * _norm.sf(k)         # ~1 ppm
+    assert r.importance.failure_ppm == pytest.approx(expected_ppm, rel=0.1)
+    lo, hi = r.yield_interval
+    assert lo < 100 * (1 - _norm.sf(k)) < hi
+    assert r.yield_pct == r.importance.yield_pct
+    # Plain MC of the same size would see no failures at all; here a
+    # large share of the draws land beyond the edge.
+    assert r.samples_total - r.samples_pass > 1000
+    assert r.importance.effective_sample_size > 100
+
+
+def test_importance_two_sided_spec_mixes_both_edges():
+    k = 4.5
+    r = analyze(spec={"v": ("within", k * _SIG_V / 2000)},
+                importance=ImportanceSampling(), **IS_COMMON)
+    assert r.importance.failure_ppm == pytest.approx(
+        2e6 * _norm.sf(k), rel=0.15)
+    shifted = [s for a, s in r.importance.shifts if any(s.values())]
+    assert len(shifted) == 2
+    assert {np.sign(s["R1"]) for s in shifted} == {-1.0, 1.0}
+
+
+def test_importance_weighted_stats_describe_real_distribution():
+    r = analyze(spec={"v": ("<", 2000 + 4.5 * _SIG_V)},
+                importance=ImportanceSampling(), **IS_COMMON)
+    st = r.metric_stats["v"]
+    # The shifted draw is centred ~4σ high; the weighted stats aren't.
+    assert r.metric_samples["v"].mean() > 2000 + 2 * _SIG_V
+    assert st.mean == pytest.approx(2000, abs=0.5 * _SIG_V)
+    assert st.std == pytest.approx(_SIG_V, rel=0.25)
+
+
+def test_importance_explicit_shift_and_per_sample_metrics():
+    k = 4.0
+    r = analyze(spec={"v": (">", 2000 - k * _SIG_V)},
+                importance=ImportanceSampling(
+                    shift={"R1": -k / math.sqrt(2), "R2": -k / math.sqrt(2)}
+                ),
+                **dict(IS_COMMON, vectorized=False, n_mc=2000))
+    assert r.importance.search_evaluations == 0
+    assert r.importance.failure_ppm == pytest.approx(
+        1e6 * _norm.sf(k), rel=0.15)
+    assert "ppm" in str(r)
+
+
+def test_importance_interval_open_without_shifted_failures():
+    from utils.tolerance.sequential import wilson_interval
+    r = analyze(spec={"v": ("<", 2000 + 8 * _SIG_V)},
+                importance=ImportanceSampling(shift={"R1": 0.0, "R2": 0.0}),
+                **dict(IS_COMMON, n_mc=200))
+    assert r.samples_pass == r.samples_total and r.yield_pct == 100.0
+    lo, hi = r.yield_interval
+    assert lo < hi == 100.0
+    # Unit weights: the effective sample size is n, and this is Wilson.
+    assert lo == pytest.approx(100 * wilson_interval(200, 200)[0])
+
+
+def test_importance_is_seed_deterministic():
+    kw = dict(IS_COMMON, spec={"v": ("<", 2000 + 4 * _SIG_V)},
+              importance=ImportanceSampling())
+    assert analyze(**kw).yield_pct == analyze(**kw).yield_pct
+
+
+def test_importance_validation():
+    spec = {"v": ("<", 2100)}
+    with pytest.raises(ValueError, match="shift"):
+        ImportanceSampling(shift="newton")
+    with pytest.raises(TypeError, match="ImportanceSampling"):
+        analyze(spec=spec, importance="pilot", **IS_COMMON)
+    with pytest.raises(ValueError, match="streaming"):
+        analyze(spec=spec, importance=ImportanceSampling(),
+                streaming=True, **IS_COMMON)
+    with pytest.raises(ValueError, match="unknown dimension"):
+        analyze(spec=spec, importance=ImportanceSampling(shift={"R9": 3}),
+                **IS_COMMON)
+
+
+# ---------- Control variates ----------
+
+from utils.tolerance import ControlVariates, Uniform
+
+CV_COMMON = dict(
+    nominal_values=SK_COMMON["nominal_values"],
+    passive_tolerances=SK_COMMON["passive_tolerances"],
+    metrics=_sk_batch, vectorized=True,
+    spec={"fc": ("within", 0.025), "Q": ("within", 0.03)},
+)
+
+
+def test_control_variate_cuts_yield_variance_without_bias():
+    ref = analyze(n_mc=400_000, seed=99, **CV_COMMON).yield_pct
+    plain, cv = [], []
+    for s in range(30):
+        plain.append(analyze(n_mc=400, seed=s, **CV_COMMON).yield_pct)
+        cv.append(analyze(n_mc=400, seed=s,
+                          control_variate=ControlVariates(),
+                          **CV_COMMON).yield_pct)
+    assert np.var(plain) > 3 * np.var(cv)
+    assert np.mean(cv) == pytest.approx(ref, abs=0.3)
+
+
+def test_control_variate_metric_means_and_report():
+    r = analyze(n_mc=400, seed=3, control_variate=ControlVariates(),
+                **CV_COMMON)
+    cv = r.control_variate
+    assert r.yield_pct == cv.yield_pct
+    assert cv.jacobian_evaluations == 8        # 2 · 4 components
+    assert cv.metric_variance_reduction["fc"] > 20
+    exact = analyze(n_mc=400_000, seed=99, **CV_COMMON)
+    assert cv.metric_means["fc"] == pytest.approx(
+        exact.metric_stats["fc"].mean, rel=2e-4)
+    lo, hi = r.yield_interval
+    assert lo <= cv.yield_pct <= hi
+    assert "control variate" in str(r)
+
+
+def test_control_variate_per_sample_with_temperature():
+    r = analyze(
+        nominal_values={"R1": 1e3, "C1": 1e-7},
+        passive_tolerances={"R": 0.01, "C": 0.05},
+        metrics=lambda R1, C1, T: {
+            "fc": 1 / (2 * math.pi * R1 * C1) * (1 + 1e-3 * (T - 25)),
+        },
+        spec={"fc": ("within", 0.04)},
+        temperature=Uniform(-20, 70),
+        n_mc=300, seed=4, control_variate=ControlVariates(),
+    )
+    cv = r.control_variate
+    assert cv.jacobian_evaluations == 6        # R1, C1 and T
+    assert cv.yield_variance_reduction > 1
+    assert 0 <= cv.yield_pct <= 100
+
+
+def test_control_variate_interval_never_zero_width():
+    from utils.tolerance.sequential import wilson_interval
+    loose = dict(CV_COMMON, spec={"fc": ("within", 0.5), "Q": ("within", 0.5)})
+    r = analyze(n_mc=200, seed=1, control_variate=ControlVariates(), **loose)
+    assert r.yield_pct == 100.0
+    lo, hi = r.yield_interval
+    assert lo < 100.0 and hi == 100.0
+    assert lo / 100 == pytest.approx(wilson_interval(200, 200)[0])
+
+
+def test_control_variate_validation():
+    with pytest.raises(ValueError, match="eps_frac"):
+        ControlVariates(eps_frac=0)
+    with pytest.raises(TypeError, match="ControlVariates"):
+        analyze(n_mc=10, control_variate=True, **CV_COMMON)
+    with pytest.raises(ValueError, match="streaming"):
+        analyze(n_mc=10, streaming=True,
+                control_variate=ControlVariates(), **CV_COMMON)
+
+
+# ---------- Checkpoint / resume ----------
+
+from utils.tolerance import EarlyStop
+
+class _Crash(Exception):
+    pass
+
+
+class _FlakyRC:
+    """RC metrics that die after ``fail_after`` calls — a stand-in for
+    a killed overnight run. ``signature()`` makes every instance the
+    same backend as far as the checkpoint is concerned."""
+
+    def __init__(self, fail_after=None, vectorized=False):
+        self.fail_after = fail_after
+        self.vectorized = vectorized
+        self.calls = 0
+
+    def signature(self):
+        return "flaky-rc"
+
+    def __call__(self, R1, C1):
+        self.calls += 1
+        if self.fail_after is not None and self.calls > self.fail_after:
+            raise _Crash()
+        return {"fc": 1 / (2 * np.pi * R1 * C1)}
+
+
+CKPT_COMMON = dict(
+    nominal_values={"R1": 1e3, "C1": 1e-7},
+    passive_tolerances={"R": 0.01, "C": 0.05},
+    spec={"fc": ("within", 0.06)},
+    n_mc=500, seed=21,
+)
+
+
+def _assert_same_report(a, b):
+    assert (a.samples_total, a.samples_pass) == (b.samples_total,
+                                                 b.samples_pass)
+    assert a.per_spec_pass == b.per_spec_pass
+    assert a.failure_modes == b.failure_modes
+    assert a.metric_stats == b.metric_stats
+    assert a.yield_interval == b.yield_interval
+    for k in a.metric_samples:
+        assert np.array_equal(a.metric_samples[k], b.metric_samples[k])
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_checkpoint_resume_matches_uninterrupted(tmp_path, vectorized):
+    ckpt = tmp_path / "run.ckpt"
+    kw = dict(CKPT_COMMON, vectorized=vectorized, chunk_size=100)
+    reference = analyze(metrics=_FlakyRC(), **kw)
+
+    # Per-sample: the nominal call + 250 samples, then death. Vectorized:
+    # the nominal + two 100-row batches.
+    flaky = _FlakyRC(fail_after=3 if vectorized else 251)
+    with pytest.raises(_Crash):
+        analyze(metrics=flaky, checkpoint=ckpt, **kw)
+
+    resumed_backend = _FlakyRC()
+    resumed = analyze(metrics=resumed_backend, checkpoint=ckpt, **kw)
+    _assert_same_report(resumed, reference)
+    # Only the missing rows were simulated (plus the nominal).
+    assert resumed_backend.calls == (1 + 3 if vectorized else 1 + 300)
+
+    # A finished run replays from the file; a new spec re-uses the rows.
+    replay = _FlakyRC()
+    respec = analyze(metrics=replay, checkpoint=ckpt,
+                     **dict(kw, spec={"fc": ("within", 0.03)}))
+    assert replay.calls == 1
+    assert respec.samples_pass < resumed.samples_pass
+
+
+@pytest.mark.parametrize("mode", [
+    dict(streaming=True, chunk_size=64, reservoir_size=50),
+    dict(early_stop=EarlyStop(width=1.5, batch_size=64)),
+    dict(streaming=True, chunk_size=64, sampling="lhs"),
+])
+def test_checkpoint_resume_chunked_modes(tmp_path, mode):
+    ckpt = tmp_path / "run.ckpt"
+    kw = dict(CKPT_COMMON, n_mc=600, **mode)
+    reference = analyze(metrics=_FlakyRC(), **kw)
+    with pytest.raises(_Crash):
+        analyze(metrics=_FlakyRC(fail_after=1 + 200), checkpoint=ckpt,
+                **kw)
+    resumed_backend = _FlakyRC()
+    resumed = analyze(metrics=resumed_backend, checkpoint=ckpt, **kw)
+    _assert_same_report(resumed, reference)
+    # Resumed from the last chunk boundary (192), not from zero.
+    assert resumed_backend.calls == 1 + reference.samples_total - 192
+
+
+def test_checkpoint_separates_runs_and_needs_seed(tmp_path):
+    ckpt = tmp_path / "run.ckpt"
+    a = analyze(metrics=_FlakyRC(), checkpoint=ckpt, **CKPT_COMMON)
+    other = _FlakyRC()
+    b = analyze(metrics=other, checkpoint=ckpt,
+                **dict(CKPT_COMMON, seed=22))
+    assert other.calls == 1 + CKPT_COMMON["n_mc"]
+    assert not np.array_equal(a.metric_samples["fc"],
+                              b.metric_samples["fc"])
+    with pytest.raises(ValueError, match="seed"):
+        analyze(metrics=_FlakyRC(), checkpoint=ckpt,
+                **dict(CKPT_COMMON, seed=None))
+
+
+def test_parametric_sweep_checkpoint_skips_finished_values(tmp_path):
+    from utils.tolerance import parametric_sweep
+
+    class FlakySupply(_FlakyRC):
+        def __call__(self, R1, C1, Vs):
+            return {"fc": super().__call__(R1, C1)["fc"] * Vs}
+
+    kw = dict(CKPT_COMMON, parameter="Vs", values=[1.0, 1.01, 1.02],
+              chunk_size=100, checkpoint=tmp_path / "sweep.ckpt")
+    kw["spec"] = {"fc": (">", 1000.0)}
+    with pytest.raises(_Crash):
+        # Dies part-way through the second value.
+        parametric_sweep(metrics=FlakySupply(fail_after=501 + 250), **kw)
+    backend = FlakySupply()
+    sweep = parametric_sweep(metrics=backend, **kw)
+    assert backend.calls == 1 + (1 + 300) + (1 + 500)
+    reference = parametric_sweep(metrics=FlakySupply(),
+                                 **{k: v for k, v in kw.items()
+                                    if k != "checkpoint"})
+    for (_, a), (_, b) in zip(sweep.corners, reference.corners):
+        _assert_same_report(a, b)
+
+
+# ---------- Re-spec / threshold curves ----------
+
+def _sk_batch_with_nan(R1, R2, C1, C2):
+    out = _sk_batch(R1, R2, C1, C2)
+    # A failed extraction on a few samples: NaN must fail every
+    # threshold in the curves, as it does in analyze.
+    gain = R2 / R1
+    return dict(out, gain=np.where(gain > 1.004, np.nan, gain))
+
+
+RESPEC_SPEC = {"fc": ("<", 730.0), "Q": (">=", 0.58),
+               "gain": ("within_db", 0.05)}
+
+
+def _respec_report():
+    return analyze(metrics=_sk_batch_with_nan, vectorized=True,
+                   nominal_values=SK_COMMON["nominal_values"],
+                   passive_tolerances=SK_COMMON["passive_tolerances"],
+                   spec=RESPEC_SPEC, n_mc=3000, seed=11)
+
+
+def test_respec_matches_fresh_analyze():
+    r = analyze(metrics=_sk_batch, vectorized=True, **SK_COMMON)
+    new_spec = {"fc": ("within", 0.03), "Q": ("<", 0.6)}
+    fresh = analyze(metrics=_sk_batch, vectorized=True,
+                    **dict(SK_COMMON, spec=new_spec))
+    again = r.respec(new_spec)
+    assert again.spec == new_spec
+    assert again.samples_pass == fresh.samples_pass
+    assert again.per_spec_pass == fresh.per_spec_pass
+    assert again.failure_modes == fresh.failure_modes
+    # The original report is untouched.
+    assert r.spec == SK_COMMON["spec"]
+
+
+def test_respec_rejects_unknown_metric():
+    r = analyze(metrics=_sk_batch, vectorized=True, **SK_COMMON)
+    with pytest.raises(KeyError, match="nope"):
+        r.respec({"nope": ("<", 1.0)})
+
+
+def test_threshold_curves_match_brute_force_respec():
+    r = _respec_report()
+    curves = r.threshold_curves(n_points=15)
+    assert set(curves) == set(RESPEC_SPEC)
+    n = r.samples_total
+    for name, curve in curves.items():
+        op, _ = RESPEC_SPEC[name]
+        assert curve.op == op and len(curve.thresholds) == 15
+        for t, alone, joint in zip(curve.thresholds, curve.yield_pct,
+                                   curve.joint_yield_pct):
+            brute = r.respec(dict(RESPEC_SPEC, **{name: (op, t)}))
+            assert alone == pytest.approx(
+                100.0 * brute.per_spec_pass[name] / n)
+            assert joint == pytest.approx(brute.yield_pct)
+
+
+def test_threshold_curves_exact_at_sample_values():
+    """Thresholds equal to sample values hit the < / <= boundary
+    exactly; the curve must agree with the strict/non-strict compare."""
+    r = _respec_report()
+    fc = r.metric_samples["fc"]
+    grid = np.sort(fc)[[0, 10, 1500, 2999]][::-1]      # unsorted order
+    for op in ("<", "<=", ">", ">="):
+        r2 = r.respec(dict(RESPEC_SPEC, fc=(op, 730.0)))
+        curve = r2.threshold_curves(specs=["fc"],
+                                    thresholds={"fc": grid})["fc"]
+        assert np.array_equal(curve.thresholds, grid)
+        expected = [100.0 * r2.respec({"fc": (op, t)}).samples_pass
+                    / r.samples_total for t in grid]
+        assert np.allclose(curve.yield_pct, expected)
+
+
+def test_yield_surface_matches_brute_force_respec():
+    r = _respec_report()
+    ta = np.array([740.0, 700.0, 720.0, 730.0])
+    tb = np.array([0.57, 0.59, 0.58])
+    s = r.yield_surface("fc", "Q", thresholds_a=ta, thresholds_b=tb)
+    assert s.specs == ("fc", "Q") and s.ops == ("<", ">=")
+    assert s.joint_yield_pct.shape == (4, 3)
+    for i, a in enumerate(ta):
+        for j, b in enumerate(tb):
+            brute = r.respec(dict(RESPEC_SPEC, fc=("<", a), Q=(">=", b)))
+            assert s.joint_yield_pct[i, j] == pytest.approx(brute.yield_pct)
+
+
+def test_yield_surface_rejects_same_spec_twice():
+    r = _respec_report()
+    with pytest.raises(ValueError, match="two different"):
+        r.yield_surface("fc", "fc")
+
+
+def test_respec_importance_report_stays_weighted():
+    """The likelihood ratios don't depend on the spec, so a re-spec of
+    an IS report is still an unbiased rare-event estimate."""
+    r = analyze(spec={"v": ("<", 2000 + 4.75 * _SIG_V)},
+                importance=ImportanceSampling(), **IS_COMMON)
+    k = 4.5
+    again = r.respec({"v": ("<", 2000 + k * _SIG_V)})
+    assert again.importance is not None
+    assert again.importance.failure_ppm == pytest.approx(
+        1e6 * _norm.sf(k), rel=0.15)
+    assert again.importance.effective_sample_size == \
+        r.importance.effective_sample_size
+    curve = r.threshold_curves(
+        thresholds={"v": [2000 + k * _SIG_V]})["v"]
+    assert curve.yield_pct[0] == pytest.approx(again.yield_pct)
+
+
 # ---------- CachedBackend ----------
 
 class _CountingBackend:
@@ -765,6 +1571,532 @@ def test_cached_backend_clear_drops_only_own_signature(tmp_path):
     cached_a2.close(); cached_b2.close()
 
 
+def _stored_keys(db):
+    import sqlite3
+    con = sqlite3.connect(str(db))
+    try:
+        return {k for (k,) in con.execute("SELECT key FROM entries")}
+    finally:
+        con.close()
+
+
+def test_cached_backend_uses_wal_journal(tmp_path):
+    import sqlite3
+    db = tmp_path / "cache.sqlite"
+    CachedBackend(_CountingBackend(), path=db).close()
+    con = sqlite3.connect(str(db))
+    assert con.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    con.close()
+
+
+def test_cached_backend_writes_behind_in_batches(tmp_path):
+    """Misses queue until flush_every entries are pending (or the
+    timer fires); queued entries are still served as hits."""
+    db = tmp_path / "cache.sqlite"
+    base = _CountingBackend()
+    cached = CachedBackend(base, path=db, flush_every=1000,
+                           flush_interval=3600)
+    for i in range(10):
+        cached(x=float(i))
+    assert _stored_keys(db) == set()
+    cached._mem.clear()                 # force the disk/queue path
+    assert cached(x=3.0) == {"sum": 3.0}
+    assert base.calls == 10
+    cached.flush()
+    assert len(_stored_keys(db)) == 10
+    cached.close()
+
+
+def test_cached_backend_flushes_on_size_and_timer(tmp_path):
+    import time
+    db = tmp_path / "cache.sqlite"
+    by_size = CachedBackend(_CountingBackend(name="A"), path=db,
+                            flush_every=5, flush_interval=3600)
+    by_time = CachedBackend(_CountingBackend(name="B"), path=db,
+                            flush_every=1000, flush_interval=0.05)
+    for i in range(5):
+        by_size(x=float(i))
+    by_time(y=1.0)
+    deadline = time.monotonic() + 5.0
+    while len(_stored_keys(db)) < 6 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(_stored_keys(db)) == 6
+    by_size.close(); by_time.close()
+
+
+def test_cached_backend_flushes_on_close_and_collection(tmp_path):
+    import gc
+    db = tmp_path / "cache.sqlite"
+    cached = CachedBackend(_CountingBackend(), path=db,
+                           flush_every=1000, flush_interval=3600)
+    cached(x=1.0)
+    cached.close()
+    cached.close()                      # idempotent
+    assert len(_stored_keys(db)) == 1
+
+    dropped = CachedBackend(_CountingBackend(), path=db,
+                            flush_every=1000, flush_interval=3600)
+    dropped(x=2.0)
+    del dropped
+    gc.collect()
+    assert len(_stored_keys(db)) == 2
+
+
+def test_cached_backend_numpy_scalars_and_unencodable_values(tmp_path):
+    db = tmp_path / "cache.sqlite"
+    cached = CachedBackend(lambda x: {"y": np.float32(x), "n": np.int64(2)},
+                           path=db, flush_every=1)
+    out = cached(x=np.float32(1.5))
+    assert out == {"y": 1.5, "n": 2} and type(out["y"]) is float
+    # Fails on the caller's thread, and the flusher keeps going.
+    bad = CachedBackend(lambda x: {"y": object()}, path=db, flush_every=1)
+    with pytest.raises(TypeError, match="can't cache"):
+        bad(x=1.0)
+    assert bad._store._flusher.is_alive()
+    # One entry the flusher can't encode is dropped, not the queue.
+    bad._store._pending[("x", b"k" * 16)] = ({}, {"y": object()})
+    with pytest.warns(RuntimeWarning, match="not written"):
+        cached(x=2.0)
+        bad.flush()
+    bad.close(); cached.close()
+    assert len(_stored_keys(db)) == 2
+
+
+def test_cached_backend_threads_lose_no_entries(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    db = tmp_path / "cache.sqlite"
+    cached = CachedBackend(_CountingBackend(), path=db, flush_every=7)
+    with ThreadPoolExecutor(16) as pool:
+        list(pool.map(lambda i: cached(x=float(i % 400)), range(2000)))
+    cached.close()
+    assert len(_stored_keys(db)) == 400
+    again = CachedBackend(_CountingBackend(), path=db)
+    assert all(again(x=float(i)) == {"sum": float(i)} for i in range(400))
+    assert again.misses == 0
+    again.close()
+
+
+def test_cached_backend_lookup_many_and_prefetch(tmp_path):
+    db = tmp_path / "cache.sqlite"
+    first = CachedBackend(_CountingBackend(), path=db)
+    for i in range(0, 2000, 2):
+        first(x=float(i))
+    first.close()
+
+    cached = CachedBackend(_CountingBackend(), path=db)
+    batch = [{"x": float(i)} for i in range(2000)]
+    out = cached.lookup_many(batch)
+    assert out[::2] == [{"sum": float(i)} for i in range(0, 2000, 2)]
+    assert all(r is None for r in out[1::2])
+    assert cached.hits == 1000 and cached.misses == 0
+
+    fresh = CachedBackend(_CountingBackend(), path=db)
+    assert fresh.prefetch(batch) == 1000
+    assert fresh.hits == 0              # counted when used, not here
+    assert fresh(x=4.0) == {"sum": 4.0}
+    assert fresh.hits == 1
+    cached.close(); fresh.close()
+
+
+def test_analyze_prefetches_from_cache_and_runs_only_misses(tmp_path):
+    """A replay resolves every sample in bulk: the backend is only
+    called per-sample for the nominal and for genuine misses."""
+    class CallCounting(CachedBackend):
+        calls = 0
+        def __call__(self, **values):
+            CallCounting.calls += 1
+            return super().__call__(**values)
+
+    common = dict(
+        nominal_values={"R": 1e3, "C": 1e-9},
+        passive_tolerances={"R": 0.01, "C": 0.05},
+        spec={"fc": ("within", 0.05)},
+        seed=5, workers=4,
+    )
+    fc = lambda R, C: {"fc": 1 / (2 * math.pi * R * C)}
+    db = tmp_path / "cache.sqlite"
+    warm = CachedBackend(fc, path=db, signature="fc")
+    analyze(metrics=warm, n_mc=500, **common)
+    warm.close()
+    # Forget 200 of the MC samples (but not the nominal).
+    import sqlite3
+    from utils.tolerance.cache import _key
+    con = sqlite3.connect(str(db))
+    con.execute("DELETE FROM entries WHERE rowid IN (SELECT rowid FROM "
+                "entries WHERE key != ? LIMIT 200)",
+                (_key(common["nominal_values"]),))
+    con.commit(); con.close()
+
+    CallCounting.calls = 0
+    replay = CallCounting(fc, path=db, signature="fc")
+    r = analyze(metrics=replay, n_mc=500, **common)
+    assert CallCounting.calls == 1 + 200     # nominal + the misses
+    assert replay.misses == 200
+    reference = analyze(metrics=fc, n_mc=500, **common)
+    assert r.samples_pass == reference.samples_pass
+    assert np.array_equal(r.metric_samples["fc"],
+                          reference.metric_samples["fc"])
+    replay.close()
+
+
+class _SlowBackend:
+    """Blocks inside the call until released, so concurrent callers
+    provably overlap."""
+    def __init__(self, fail=False):
+        import threading
+        self.calls = 0
+        self.fail = fail
+        self.entered = threading.Event()
+        self.release = threading.Event()
+    def __call__(self, **values):
+        self.calls += 1
+        self.entered.set()
+        self.release.wait(5.0)
+        if self.fail:
+            raise RuntimeError("simulator crashed")
+        return {"sum": sum(values.values())}
+
+
+def _concurrent_calls(cached, base, n, **values):
+    """Start ``n`` identical calls, release the backend once the first
+    is inside it and the rest are waiting; return results/exceptions."""
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    pool = ThreadPoolExecutor(n)
+    futures = [pool.submit(cached, **values)]
+    base.entered.wait(5.0)
+    futures += [pool.submit(cached, **values) for _ in range(n - 1)]
+    deadline = time.monotonic() + 5.0
+    while cached.deduplicated < n - 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    base.release.set()
+    pool.shutdown(wait=True)
+    return [f.exception() or f.result() for f in futures]
+
+
+def test_cached_backend_single_flights_identical_calls(tmp_path):
+    base = _SlowBackend()
+    cached = CachedBackend(base, path=tmp_path / "cache.sqlite")
+    results = _concurrent_calls(cached, base, 8, x=1.0)
+    assert results == [{"sum": 1.0}] * 8
+    assert base.calls == 1
+    assert (cached.misses, cached.deduplicated, cached.hits) == (1, 7, 0)
+    cached(x=1.0)
+    assert cached.hits == 1
+    assert cached.stats.latency["wait"].count == 7
+    cached.close()
+
+
+def test_cached_backend_single_flight_shares_exception():
+    """A crashed computation fails every waiter and isn't cached."""
+    base = _SlowBackend(fail=True)
+    cached = CachedBackend(base)
+    results = _concurrent_calls(cached, base, 4, x=1.0)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert base.calls == 1
+    base.fail = False
+    assert cached(x=1.0) == {"sum": 1.0}
+    assert base.calls == 2
+
+
+def test_cached_backend_memory_tier_is_lru_bounded():
+    base = _CountingBackend()
+    cached = CachedBackend(base, memory_entries=3)
+    for x in (0.0, 1.0, 2.0):
+        cached(x=x)
+    cached(x=0.0)                       # refresh 0 → 1 is now oldest
+    cached(x=3.0)
+    assert len(cached._mem) == 3
+    calls = base.calls
+    cached(x=0.0); cached(x=2.0); cached(x=3.0)
+    assert base.calls == calls          # all still in memory
+    cached(x=1.0)
+    assert base.calls == calls + 1      # evicted, recomputed
+
+
+def _cached_xs(db, name, xs):
+    """Which ``x`` values a fresh backend finds in the file."""
+    probe = CachedBackend(_CountingBackend(name=name), path=db)
+    try:
+        found = probe.lookup_many([{"x": float(x)} for x in xs])
+    finally:
+        probe.close()
+    return {float(x) for x, r in zip(xs, found) if r is not None}
+
+
+def test_disk_limits_evict_least_recently_used_per_signature(tmp_path):
+    import time
+    from utils.tolerance import DiskLimits
+    db = tmp_path / "cache.sqlite"
+    limits = DiskLimits(max_rows=20, interval=3600)
+    a = CachedBackend(_CountingBackend(name="A"), path=db,
+                      disk_limits=limits, memory_entries=5)
+    b = CachedBackend(_CountingBackend(name="B"), path=db,
+                      disk_limits=limits)
+    for i in range(30):
+        a(x=float(i))
+    a.flush(); time.sleep(0.01)
+    for i in range(30, 50):
+        a(x=float(i))
+    for i in range(10):
+        b(x=float(i))
+    a.flush(); b.flush(); time.sleep(0.01)
+    for i in range(5):                  # disk hits: refresh access time
+        a(x=float(i))
+    assert a.enforce_limits() == 30
+    assert _cached_xs(db, "A", range(50)) == set(map(float, range(5))) | \
+        set(map(float, range(35, 50)))
+    assert len(_cached_xs(db, "B", range(10))) == 10  # own quota, untouched
+    a.close(); b.close()
+
+
+def test_disk_limits_age_and_bytes(tmp_path):
+    import sqlite3, time
+    from utils.tolerance import DiskLimits
+    db = tmp_path / "cache.sqlite"
+    aged = CachedBackend(_CountingBackend(), path=db,
+                         disk_limits=DiskLimits(max_age=60, interval=3600))
+    for i in range(10):
+        aged(x=float(i))
+    aged.flush()
+    con = sqlite3.connect(str(db))
+    con.execute("UPDATE entries SET atime=?", (time.time() - 120,))
+    con.commit(); con.close()
+    aged(x=1.0); aged(x=2.0)            # memory hits still count as use
+    assert aged.enforce_limits() == 8
+    aged.close()
+    assert _cached_xs(db, "default", range(10)) == {1.0, 2.0}
+
+    con = sqlite3.connect(str(db))
+    row = con.execute("SELECT MAX(length(key) + length(value)) "
+                      "FROM entries").fetchone()[0]
+    con.close()
+    capped = CachedBackend(
+        _CountingBackend(name="other"), path=db,
+        disk_limits=DiskLimits(max_bytes=4 * row, per_signature=False,
+                               interval=3600))
+    capped(x=100.0)
+    capped.enforce_limits()
+    capped.close()
+    assert len(_stored_keys(db)) <= 4
+    assert _cached_xs(db, "other", [100.0]) == {100.0}  # newest survives
+
+
+def test_disk_limits_enforced_in_background(tmp_path):
+    import time
+    from utils.tolerance import DiskLimits
+    db = tmp_path / "cache.sqlite"
+    cached = CachedBackend(_CountingBackend(), path=db, flush_interval=0.02,
+                           disk_limits=DiskLimits(max_rows=5,
+                                                  interval=0.02))
+    for i in range(20):
+        cached(x=float(i))
+    deadline = time.monotonic() + 5.0
+    while len(_stored_keys(db)) != 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(_stored_keys(db)) == 5
+    cached.close()
+
+
+def test_cached_backend_migrates_json_layout(tmp_path):
+    """Cache files written with the old JSON-text table (with or
+    without access times) are converted on open and keep serving."""
+    import sqlite3
+    db = tmp_path / "cache.sqlite"
+    con = sqlite3.connect(str(db))
+    con.execute("CREATE TABLE cache (signature TEXT, key TEXT, "
+                "value TEXT, PRIMARY KEY (signature, key))")
+    con.executemany("INSERT INTO cache VALUES (?, ?, ?)", [
+        ("counting:default", '[["x",1.0]]', '{"sum":1.0}'),
+        ("counting:default", '[["a",0.1],["b",-2e-09]]', '{"sum":0.1}'),
+        ("other", '[["x",1.0]]', '{"n":3,"ok":true}'),
+    ])
+    con.commit(); con.close()
+    base = _CountingBackend()
+    cached = CachedBackend(base, path=db)
+    assert cached(x=1.0) == {"sum": 1.0}
+    assert cached(b=-2e-09, a=0.1) == {"sum": 0.1}
+    assert base.calls == 0
+    cached.close()
+    other = CachedBackend(_CountingBackend(), path=db, signature="other")
+    assert other(x=1.0) == {"n": 3, "ok": True}
+    other.close()
+    from utils.tolerance import iter_entries
+    assert sorted(iter_entries(db), key=repr) == sorted([
+        ("counting:default", {"x": 1.0}, {"sum": 1.0}),
+        ("counting:default", {"a": 0.1, "b": -2e-09}, {"sum": 0.1}),
+        ("other", {"x": 1.0}, {"n": 3, "ok": True}),
+    ], key=repr)
+    con = sqlite3.connect(str(db))
+    tables = {t for (t,) in con.execute(
+        "SELECT name FROM sqlite_master WHERE type='table'")}
+    assert "cache" not in tables
+    assert con.execute("SELECT COUNT(*) FROM entries "
+                       "WHERE atime IS NULL").fetchone()[0] == 0
+    con.close()
+
+
+def test_cached_backend_stores_compact_binary_rows(tmp_path):
+    import sqlite3
+    db = tmp_path / "cache.sqlite"
+    cached = CachedBackend(lambda **v: {"fc": 1.5, "Q": float("nan")},
+                           path=db, signature="sk")
+    values = {f"R{i}": 1e3 + i for i in range(30)}
+    r = cached(**values)
+    cached(**dict(values, R0=2e3))
+    mixed = CachedBackend(lambda **v: {"n": 3, "x": 0.5}, path=db,
+                          signature="mixed")
+    mixed(x=1.0)
+    cached.close(); mixed.close()
+    con = sqlite3.connect(str(db))
+    lengths = con.execute("SELECT length(key), length(value) FROM entries "
+                          "WHERE sig=(SELECT id FROM signatures "
+                          "WHERE signature='sk')").fetchall()
+    con.close()
+    # 16-byte digest; tag + layout id + two float64s.
+    assert lengths == [(16, 1 + 4 + 16)] * 2
+    again = CachedBackend(lambda **v: {}, path=db, signature="sk")
+    hit = again(**values)
+    assert list(hit) == ["fc", "Q"] and hit["fc"] == 1.5
+    assert math.isnan(hit["Q"]) and math.isnan(r["Q"])
+    again.close()
+    mixed = CachedBackend(lambda **v: {}, path=db, signature="mixed")
+    assert mixed(x=1.0) == {"n": 3, "x": 0.5}    # int stays an int
+    mixed.close()
+
+
+def test_iter_entries_streams_inputs_and_outputs(tmp_path):
+    from utils.tolerance import iter_entries
+    db = tmp_path / "cache.sqlite"
+    a = CachedBackend(_CountingBackend(name="A"), path=db)
+    b = CachedBackend(_CountingBackend(name="B"), path=db)
+    for i in range(7000):
+        a(x=float(i), y=2.0)
+    b(x=-1.0)
+    a.close(); b.close()
+    rows = list(iter_entries(db, signature="counting:A"))
+    assert len(rows) == 7000
+    assert all(sig == "counting:A" and out == {"sum": inp["x"] + 2.0}
+               for sig, inp, out in rows)
+    assert list(iter_entries(db, signature="counting:B")) == [
+        ("counting:B", {"x": -1.0}, {"sum": -1.0})]
+    assert list(iter_entries(db, signature="nope")) == []
+    assert len(list(iter_entries(db))) == 7001
+
+
+def _fill_shared_cache(db, start):
+    """Process-pool worker: one process's slice of a shared sweep."""
+    cached = CachedBackend(_CountingBackend(), path=db, flush_every=5)
+    for i in range(start, start + 300):
+        cached(x=float(i))
+    cached.close()
+    return cached.misses
+
+
+def test_cached_backend_processes_share_one_file(tmp_path):
+    import multiprocessing
+    db = tmp_path / "cache.sqlite"
+    CachedBackend(_CountingBackend(), path=db).close()   # create the file
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Pool(6) as pool:
+        # Overlapping slices: every x in [0, 1050) by one or two writers.
+        pool.starmap(_fill_shared_cache, [(db, 150 * k) for k in range(6)])
+    assert len(_stored_keys(db)) == 1050
+    again = CachedBackend(_CountingBackend(), path=db)
+    assert again.lookup_many([{"x": float(i)} for i in range(1050)]) == [
+        {"sum": float(i)} for i in range(1050)]
+    again.close()
+
+
+def _use_inherited(cached):
+    for i in range(50):
+        cached(x=float(i))
+
+
+def test_cached_backend_reopens_after_fork(tmp_path):
+    """A backend inherited by a forked child opens its own connections
+    there, and the child's entries are committed when it exits."""
+    import multiprocessing
+    db = tmp_path / "cache.sqlite"
+    cached = CachedBackend(_CountingBackend(name="A"), path=db)
+    cached(x=-1.0)
+    child = multiprocessing.get_context("fork").Process(
+        target=_use_inherited, args=(cached,))
+    child.start(); child.join()
+    assert child.exitcode == 0
+    cached(x=-2.0)                      # the parent's store is unaffected
+    cached.close()
+    assert _cached_xs(db, "A", range(-2, 50)) == set(
+        float(x) for x in range(-2, 50))
+
+
+def test_cached_backend_pickles_for_process_pool_analyze(tmp_path):
+    import pickle
+    db = tmp_path / "cache.sqlite"
+    cached = CachedBackend(_rc_fc, path=db, signature="fc", timeout=5.0)
+    copy = pickle.loads(pickle.dumps(cached))
+    assert (copy.path, copy.signature) == (cached.path, "fc")
+    assert copy is not cached
+    # Every task pickles the backend again: one rebuild per process.
+    assert pickle.loads(pickle.dumps(cached)) is copy
+    copy.close()
+    reopened = pickle.loads(pickle.dumps(cached))
+    assert reopened is not copy
+    assert reopened(R=1e3, C=1e-9) == cached(R=1e3, C=1e-9)
+    reopened.close()
+
+    r = analyze(metrics=cached, workers=3, executor="process",
+                **RC_PROCESS_COMMON)
+    cached.close()
+    replay = CachedBackend(_rc_fc, path=db, signature="fc")
+    again = analyze(metrics=replay, workers=3, executor="process",
+                    **RC_PROCESS_COMMON)
+    assert replay.misses == 0           # every worker's entry was kept
+    assert replay.hits == RC_PROCESS_COMMON["n_mc"] + 1
+    assert np.array_equal(again.metric_samples["fc"], r.metric_samples["fc"])
+    assert again.samples_pass == analyze(
+        metrics=_rc_fc, **RC_PROCESS_COMMON).samples_pass
+    replay.close()
+
+
+def test_cached_backend_waits_out_another_writer(tmp_path):
+    import sqlite3, threading, time
+    db = tmp_path / "cache.sqlite"
+    cached = CachedBackend(_CountingBackend(), path=db, timeout=0.05,
+                           flush_interval=3600)
+    other = sqlite3.connect(str(db), check_same_thread=False)
+    other.execute("BEGIN IMMEDIATE")    # hold the write lock
+    cached(x=1.0)
+    with pytest.raises(sqlite3.OperationalError, match="locked"):
+        cached.flush()
+    assert cached(x=1.0) == {"sum": 1.0}     # still queued, still served
+    assert cached.misses == 1
+
+    patient = CachedBackend(_CountingBackend(name="B"), path=db,
+                            timeout=10.0, flush_interval=3600)
+    patient(x=2.0)
+    release = threading.Timer(0.3, other.rollback)
+    release.start()
+    start = time.monotonic()
+    patient.flush()
+    assert time.monotonic() - start >= 0.2
+    release.join(); other.close()
+    cached.close(); patient.close()
+    assert len(_stored_keys(db)) == 2
+
+
+def test_disk_limits_validation():
+    from utils.tolerance import DiskLimits
+    with pytest.raises(ValueError, match="needs"):
+        DiskLimits()
+    with pytest.raises(ValueError, match="max_rows"):
+        DiskLimits(max_rows=0)
+    with pytest.raises(TypeError, match="DiskLimits"):
+        CachedBackend(_CountingBackend(), disk_limits={"max_rows": 5})
+    with pytest.raises(ValueError, match="timeout"):
+        CachedBackend(_CountingBackend(), timeout=-1)
+
+
 def test_cached_backend_thread_safe_with_workers():
     """Cache must be safe under analyze(workers=N). Repeat the same
     yield computation twice; the second run is fully cache-served and
@@ -814,6 +2146,364 @@ def test_cached_backend_explicit_signature_overrides_auto():
     assert cached.signature == "custom-namespace"
 
 
+class _FlakyBackend(_CountingBackend):
+    """Times out on the first ``n_timeouts`` runs of each sample, and
+    returns NaN for x < 0 — a real convergence failure. ``runs`` logs
+    ``(x, timeout)``, shared with ``with_timeout`` copies."""
+    def __init__(self, n_timeouts=1, timeout=10.0, runs=None):
+        super().__init__()
+        self.n_timeouts = n_timeouts
+        self.timeout = timeout
+        self.runs = [] if runs is None else runs
+    def with_timeout(self, timeout):
+        return _FlakyBackend(self.n_timeouts, timeout, self.runs)
+    def __call__(self, **values):
+        from utils.tolerance import TimedOut
+        x = values["x"]
+        self.runs.append((x, self.timeout))
+        if sum(r[0] == x for r in self.runs) <= self.n_timeouts:
+            return TimedOut.of(["sum"])
+        return {"sum": x if x >= 0 else float("nan")}
+
+
+def test_cached_backend_retries_timeouts_not_nan(tmp_path):
+    from utils.tolerance import cache_stats
+    base = _FlakyBackend()
+    path = tmp_path / "cache.sqlite"
+    cached = CachedBackend(base, path=path)
+    assert math.isnan(cached(x=1.0)["sum"])          # timed out
+    assert math.isnan(cached(x=-1.0)["sum"])         # timed out
+    cached.close()
+    by_status = cache_stats(path)[0].statuses
+    assert by_status == {"timeout": 2}
+    # A later run retries both, with twice the timeout; the NaN that
+    # comes back for x=-1 is a real failure and stays cached.
+    cached = CachedBackend(base, path=path)
+    assert cached.lookup_many([{"x": 1.0}, {"x": -1.0}]) == [None, None]
+    assert cached(x=1.0) == {"sum": 1.0}
+    assert math.isnan(cached(x=-1.0)["sum"])
+    assert math.isnan(cached(x=-1.0)["sum"])
+    assert cached(x=1.0) == {"sum": 1.0}
+    assert base.runs == [(1.0, 10.0), (-1.0, 10.0),
+                         (1.0, 20.0), (-1.0, 20.0)]
+    cached.close()
+    assert cache_stats(path)[0].statuses == {"ok": 1, "nan": 1}
+
+
+def test_cached_backend_retry_policy_backoff_and_attempts():
+    from utils.tolerance import RetryPolicy
+    base = _FlakyBackend(n_timeouts=10)
+    cached = CachedBackend(base, retry=RetryPolicy(
+        max_attempts=3, timeout_factor=3.0, max_timeout=50.0))
+    for _ in range(5):
+        out = cached(x=1.0)
+    assert base.runs == [(1.0, 10.0), (1.0, 30.0), (1.0, 50.0)]
+    assert (out.attempts, out.retry_at) == (3, None)   # given up
+    waiting = CachedBackend(_FlakyBackend(), retry=RetryPolicy(backoff=60))
+    waiting(x=1.0)
+    waiting(x=1.0)
+    assert waiting.wrapped.runs == [(1.0, 10.0)]       # not yet due
+    never = CachedBackend(_FlakyBackend(), retry=None)
+    never(x=1.0)
+    never(x=1.0)
+    assert len(never.wrapped.runs) == 1
+    with pytest.raises(ValueError, match="max_attempts"):
+        RetryPolicy(max_attempts=0)
+    with pytest.raises(ValueError, match="factor"):
+        RetryPolicy(timeout_factor=0.5)
+    with pytest.raises(TypeError, match="RetryPolicy"):
+        CachedBackend(_CountingBackend(), retry=3)
+    import dataclasses
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        CachedBackend(_CountingBackend()).retry.max_attempts = 1
+
+
+def test_cached_backend_purge_keeps_good_entries(tmp_path):
+    from utils.tolerance import cache_stats
+    base = _FlakyBackend()
+    base(x=2.0), base(x=-1.0)               # their timeouts are spent
+    path = tmp_path / "cache.sqlite"
+    cached = CachedBackend(base, path=path, retry=None)
+    for x in (1.0, 2.0, -1.0):
+        cached(x=x)
+    cached.flush()
+    assert cache_stats(path)[0].statuses == {
+        "ok": 1, "nan": 1, "timeout": 1}
+    assert cached.purge("timeout") == 1
+    assert cached(x=1.0) == {"sum": 1.0}    # re-run, not served
+    assert cached.purge() == 1              # the NaN
+    cached.flush()
+    assert cache_stats(path)[0].statuses == {"ok": 2}
+    assert cached(x=2.0) == {"sum": 2.0}
+    assert len(base.runs) == 6
+    cached.close()
+    with pytest.raises(ValueError, match="status"):
+        CachedBackend(base).purge("failed")
+    memory = CachedBackend(_FlakyBackend(n_timeouts=0))
+    memory(x=-1.0), memory(x=1.0)
+    assert memory.purge() == 1
+
+
+def test_cached_backend_tags_nan_entries_of_older_files(tmp_path):
+    import sqlite3
+    from utils.tolerance import cache_stats
+    path = tmp_path / "cache.sqlite"
+    cached = CachedBackend(_FlakyBackend(n_timeouts=0), path=path)
+    cached(x=1.0), cached(x=-1.0)
+    cached.close()
+    con = sqlite3.connect(path)
+    for column in ("status", "attempts", "retry_at"):
+        con.execute(f"ALTER TABLE entries DROP COLUMN {column}")
+    con.commit()
+    con.close()
+    CachedBackend(_CountingBackend(), path=path).close()
+    assert cache_stats(path)[0].statuses == {"ok": 1, "nan": 1}
+
+
+# ---------- Cache export / import / merge ----------
+
+def _two_host_caches(tmp_path):
+    """Two hosts' caches of the same circuit, overlapping on x = 5..9,
+    disagreeing at x = 7; host A also holds another circuit."""
+    a, b = tmp_path / "hv2.sqlite", tmp_path / "hv3.sqlite"
+    host_a = CachedBackend(_CountingBackend(), path=a)
+    for i in range(10):
+        host_a(x=float(i))
+    other = CachedBackend(_CountingBackend(name="other"), path=a)
+    other(x=100.0)
+    host_b = CachedBackend(
+        lambda x: {"sum": x + (0.5 if x == 7.0 else 0.0)}, path=b,
+        signature="counting:default")
+    for i in range(5, 15):
+        host_b(x=float(i))
+    for c in (host_a, other, host_b):
+        c.close()
+    return a, b
+
+
+def test_export_cache_copies_one_signature_to_portable_file(tmp_path):
+    from utils.tolerance import export_cache, iter_entries
+    a, _ = _two_host_caches(tmp_path)
+    out = tmp_path / "hv2.cache"
+    assert export_cache(a, out, signature="counting:default") == 10
+    assert not (tmp_path / "hv2.cache-wal").exists()   # one file to copy
+    assert {s for s, _, _ in iter_entries(out)} == {"counting:default"}
+    replay = CachedBackend(_CountingBackend(), path=out)
+    assert [replay(x=float(i)) for i in range(10)] == [
+        {"sum": float(i)} for i in range(10)]
+    assert replay.misses == 0
+    replay.close()
+    with pytest.raises(FileExistsError):
+        export_cache(a, out)
+    with pytest.raises(KeyError, match="nope"):
+        export_cache(a, tmp_path / "x.cache", signature="nope")
+
+
+@pytest.mark.parametrize("on_conflict, expected",
+                         [("keep", 7.0), ("replace", 7.5), ("newest", 7.5)])
+def test_merge_caches_reports_and_resolves_conflicts(tmp_path, monkeypatch,
+                                                     on_conflict, expected):
+    from utils.tolerance import merge_caches
+    from utils.tolerance import cache_tool
+    monkeypatch.setattr(cache_tool, "_ROWID_BATCH", 3)   # many batches
+    a, b = _two_host_caches(tmp_path)
+    out = tmp_path / "sweep.cache"
+    report = merge_caches([a, b], out, on_conflict=on_conflict)
+    assert (report.entries, report.added, report.identical,
+            report.conflicts) == (21, 16, 4, 1)
+    (conflict,) = report.examples
+    assert conflict.inputs == {"x": 7.0}
+    assert (conflict.ours, conflict.theirs) == ({"sum": 7.0}, {"sum": 7.5})
+    assert conflict.source == str(b)
+    assert "1 conflicting" in str(report)
+    merged = CachedBackend(_CountingBackend(), path=out)
+    assert merged(x=7.0) == {"sum": expected}
+    assert merged(x=14.0) == {"sum": 14.0}
+    assert merged.misses == 0
+    merged.close()
+
+
+def test_import_cache_into_live_cache(tmp_path):
+    from utils.tolerance import export_cache, import_cache
+    a, b = _two_host_caches(tmp_path)
+    local = tmp_path / "local.sqlite"
+    live = CachedBackend(_CountingBackend(), path=local)
+    live(x=-1.0)
+    live.flush()
+    export_cache(b, tmp_path / "hv3.cache")
+    report = import_cache([a, tmp_path / "hv3.cache"], local,
+                          signature="counting:default")
+    assert (report.added, report.conflicts) == (15, 1)
+    assert live(x=12.0) == {"sum": 12.0}     # served from disk
+    assert live.misses == 1
+    live.close()
+    assert _cached_xs(local, "default", range(-1, 15)) == {
+        float(x) for x in range(-1, 15)}
+    assert _cached_xs(local, "other", [100.0]) == set()
+    with pytest.raises(ValueError, match="destination"):
+        import_cache(local, local)
+    with pytest.raises(ValueError, match="on_conflict"):
+        import_cache(a, local, on_conflict="last")
+
+
+def test_cache_tool_command_line(tmp_path, capsys):
+    from utils.tolerance.__main__ import main
+    a, b = _two_host_caches(tmp_path)
+    assert main(["cache", "list", str(a)]) == 0
+    out = capsys.readouterr().out
+    assert "10  counting:default" in out and "1  counting:other" in out
+    assert main(["cache", "export", str(b),
+                 str(tmp_path / "hv3.cache")]) == 0
+    merged = str(tmp_path / "m.cache")
+    assert main(["cache", "merge", str(a), str(tmp_path / "hv3.cache"),
+                 "-o", merged, "--strict"]) == 1
+    assert "{'x': 7.0}" in capsys.readouterr().out
+    assert main(["cache", "import", merged, "--into",
+                 str(tmp_path / "local.sqlite")]) == 0
+    assert "16 entries read: 16 added" in capsys.readouterr().out
+
+
+
+def test_merge_prefers_results_over_timeouts(tmp_path, capsys):
+    from utils.tolerance import cache_stats, merge_caches
+    from utils.tolerance.__main__ import main
+    slow, fast = tmp_path / "overloaded.sqlite", tmp_path / "idle.sqlite"
+    for path, n_timeouts in ((slow, 1), (fast, 0)):
+        c = CachedBackend(_FlakyBackend(n_timeouts), path=path,
+                          signature="flaky")
+        c(x=1.0), c(x=2.0)
+        c.close()
+    out = tmp_path / "merged.cache"
+    # Either order, and even on_conflict="keep": no conflict, the
+    # results win.
+    report = merge_caches([slow, fast], out)
+    assert (report.conflicts, report.identical) == (0, 2)
+    merge_caches([slow], out, on_conflict="replace")
+    assert cache_stats(out)[0].statuses == {"ok": 2}
+    assert main(["cache", "purge", str(slow), "--status", "timeout"]) == 0
+    assert "purged 2 entries" in capsys.readouterr().out
+    assert cache_stats(slow)[0].entries == 0
+
+
+
+def test_export_and_merge_leave_older_sources_untouched(tmp_path):
+    import sqlite3
+    from utils.tolerance import export_cache, iter_entries, merge_caches
+    legacy = tmp_path / "legacy.sqlite"
+    con = sqlite3.connect(str(legacy))
+    con.execute("CREATE TABLE cache (signature TEXT, key TEXT, "
+                "value TEXT, PRIMARY KEY (signature, key))")
+    con.execute("INSERT INTO cache VALUES (?, ?, ?)",
+                ("counting:default", '[["x",1.0]]', '{"sum":1.0}'))
+    con.commit(); con.close()
+    unstatused = tmp_path / "older.sqlite"
+    cached = CachedBackend(_CountingBackend(), path=unstatused)
+    cached(x=2.0)
+    cached.close()
+    con = sqlite3.connect(str(unstatused))
+    for column in ("status", "attempts", "retry_at"):
+        con.execute(f"ALTER TABLE entries DROP COLUMN {column}")
+    con.commit(); con.close()
+    before = {p: p.read_bytes() for p in (legacy, unstatused)}
+
+    assert export_cache(legacy, tmp_path / "legacy.cache") == 1
+    merge_caches([legacy, unstatused], tmp_path / "merged.cache")
+    assert {p: p.read_bytes() for p in (legacy, unstatused)} == before
+    assert sorted(iter_entries(tmp_path / "merged.cache"), key=repr) == [
+        ("counting:default", {"x": 1.0}, {"sum": 1.0}),
+        ("counting:default", {"x": 2.0}, {"sum": 2.0})]
+
+
+# ---------- Cache statistics ----------
+
+def test_latency_histogram_buckets_and_quantiles():
+    from utils.tolerance import LatencyHistogram
+    h = LatencyHistogram()
+    h.add(3e-6, n=98)                   # bucket [2 µs, 4 µs)
+    h.add(0.3)
+    h.add(0.0)                          # clamps into the first bucket
+    assert h.count == 100
+    assert h.seconds == pytest.approx(98 * 3e-6 + 0.3)
+    assert h.quantile(0.5) == 2.0 ** -18
+    assert h.quantile(1.0) == 0.5
+    h.add(1e9)                          # clamps into the last bucket
+    assert h.counts[-1] == 1
+    h2 = LatencyHistogram()
+    h2.merge(h)
+    assert LatencyHistogram._unpack(h2._pack(), h2.seconds) == h
+    assert math.isnan(LatencyHistogram().mean)
+
+
+class _TimedBackend(_CountingBackend):
+    """5 ms a call, like a (very) short simulation."""
+    def __call__(self, **values):
+        import time
+        time.sleep(0.005)
+        return super().__call__(**values)
+
+
+def test_cached_backend_session_stats():
+    cached = CachedBackend(_TimedBackend())
+    for x in (1.0, 2.0, 1.0, 1.0):
+        cached(x=x)
+    cached.lookup_many([{"x": 1.0}, {"x": 2.0}, {"x": 3.0}])
+    st = cached.stats
+    assert (st.hits, st.misses, st.deduplicated) == (4, 2, 0)
+    assert st.latency["memory_hit"].count == 2
+    assert st.latency["bulk_hit"].count == 2
+    assert "disk_hit" not in st.latency        # no file
+    assert st.simulator_seconds >= 0.01
+    # Four hits at >= 5 ms a simulation, each served in far less.
+    assert 0.015 < st.saved_seconds < 4 * st.latency["simulate"].mean
+    assert st.entries is None
+    assert "4 hits, 2 misses" in str(st)
+    cached.clear()
+    assert cached.stats.latency == {}
+
+
+def test_cache_stats_persist_across_runs(tmp_path):
+    from utils.tolerance import cache_stats
+    path = tmp_path / "c.sqlite"
+    for _ in range(2):
+        cached = CachedBackend(_TimedBackend(), path=path)
+        for i in range(5):
+            cached(x=float(i))
+        cached.close()
+    cheap = CachedBackend(_CountingBackend("cheap"), path=path)
+    cheap(x=1.0)
+    cheap.clear()                       # entries go, the cost stays
+    cheap.close()
+    slow, cheap = cache_stats(path)     # costliest first
+    assert slow.signature == "counting:default"
+    assert (slow.entries, slow.hits, slow.misses) == (5, 5, 5)
+    assert slow.latency["disk_hit"].count == 5
+    assert slow.latency["disk_miss"].count == 5
+    assert slow.bytes > 5 * 16
+    assert slow.saved_seconds > 0.02
+    assert (cheap.entries, cheap.bytes, cheap.misses) == (0, 0, 1)
+    assert [st.signature for st in cache_stats(
+        path, signature="counting:cheap")] == ["counting:cheap"]
+    with pytest.raises(KeyError):
+        cache_stats(path, signature="nope")
+
+
+def test_cache_stats_merge_with_entries(tmp_path, capsys):
+    from utils.tolerance import cache_stats, merge_caches
+    from utils.tolerance.__main__ import main
+    a, b = _two_host_caches(tmp_path)
+    out = tmp_path / "sweep.cache"
+    merge_caches([a, b], out)
+    by_sig = {st.signature: st for st in cache_stats(out)}
+    assert by_sig["counting:default"].misses == 20      # 10 per host
+    assert by_sig["counting:default"].entries == 15
+    assert by_sig["counting:other"].misses == 1
+    assert main(["cache", "stats", str(out), "--signature",
+                 "counting:default"]) == 0
+    printed = capsys.readouterr().out
+    assert "counting:default: 0 hits, 20 misses" in printed
+    assert "15 entries" in printed and "simulate" in printed
+
+
 # ---------- Monotonicity ----------
 
 def test_looser_spec_yields_at_least_as_much_as_tighter():
@@ -11,12 +11,14 @@ import math
 import os
 import subprocess
 import sys
+from pathlib import Path
 from unittest.mock import patch, MagicMock
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import numpy as np
 import pytest
 
-from utils.tolerance import NgspiceBackend
+from utils.tolerance import CachedBackend, NgspiceBackend, TimedOut
 
 
 RC_TEMPLATE = """* RC LP
@@ -194,6 +196,324 @@ def test_timeout_returns_all_nan():
         out = backend(R=1e3, C=1e-9)
     assert math.isnan(out["fc"])
     assert math.isnan(out["peak"])
+    assert isinstance(out, TimedOut)
+
+
+def test_cached_timeout_retried_with_longer_timeout(tmp_path):
+    """An overloaded run times out; the cache re-runs it on the next
+    lookup with twice the timeout and keeps the real result."""
+    backend = _make_backend(timeout=5.0)
+    timeouts = []
+    def run(argv, *args, timeout, **kwargs):
+        timeouts.append(timeout)
+        if len(timeouts) == 1:
+            raise subprocess.TimeoutExpired(cmd="ngspice", timeout=timeout)
+        return MagicMock(returncode=0, stdout="fc = 1.5e5\n", stderr="")
+    cached = CachedBackend(backend, path=tmp_path / "cache.sqlite")
+    with patch("utils.tolerance.ngspice.subprocess.run", side_effect=run):
+        assert math.isnan(cached(R=1e3, C=1e-9)["fc"])
+        assert cached(R=1e3, C=1e-9)["fc"] == pytest.approx(1.5e5)
+        assert cached(R=1e3, C=1e-9)["fc"] == pytest.approx(1.5e5)
+    assert timeouts == [5.0, 10.0]
+    assert backend.timeout == 5.0
+    cached.close()
+
+
+# ---------- Batching ----------
+
+def _batch_run(calls, crash_after=None, timeout_after=None):
+    """subprocess.run stand-in that simulates a batch netlist: an RC
+    low-pass ``fc`` per ``alterparam`` block, echoing each sample's
+    end marker. ``crash_after`` / ``timeout_after`` stop it after that
+    many samples (a crash exits 1; a timeout raises with the output so
+    far)."""
+    def side_effect(argv, *args, timeout=None, **kwargs):
+        with open(argv[2]) as f:
+            netlist = f.read()
+        calls.append(netlist)
+        params, elements, out, done = {}, {}, [], 0
+        value = lambda v: params[v[1:-1]] if v[0] == "{" else float(v)
+        for line in netlist.splitlines():
+            if line.startswith((".param ", "alterparam ")):
+                name, v = line.split(" ", 1)[1].split("=")
+                params[name] = float(v)
+            elif line.startswith(("R1 ", "C1 ")):
+                elements[line[0]] = line.split()[3]
+            elif line.startswith("meas ac fc"):
+                fc = 1 / (2 * math.pi * value(elements["R"])
+                          * value(elements["C"]))
+                out.append(f"fc = {fc:e}")
+            elif line.startswith("echo "):
+                if done == crash_after:
+                    return MagicMock(returncode=1, stdout="\n".join(out),
+                                     stderr="")
+                if done == timeout_after:
+                    raise subprocess.TimeoutExpired(
+                        cmd="ngspice", timeout=timeout,
+                        output="\n".join(out).encode())
+                out.append(line[5:])
+                done += 1
+        return MagicMock(returncode=0, stdout="\n".join(out) + "\n",
+                         stderr="")
+    return side_effect
+
+
+SAMPLES = [{"R": 1e3, "C": 1e-9}, {"R": 2e3, "C": 1e-9},
+           {"R": 1e3, "C": 4.7e-9}, {"R": 3.3e3, "C": 1e-9}]
+
+
+def _fc(s):
+    return 1 / (2 * math.pi * s["R"] * s["C"])
+
+
+def test_run_many_runs_k_samples_per_process():
+    backend = _make_backend(batch_size=3)
+    calls = []
+    with patch("utils.tolerance.ngspice.subprocess.run",
+               side_effect=_batch_run(calls)):
+        out = backend.run_many(SAMPLES)
+    assert [o["fc"] for o in out] == pytest.approx([_fc(s) for s in SAMPLES],
+                                                   rel=1e-5)
+    assert len(calls) == 2              # 3 + 1 samples
+    lines = calls[0].splitlines()
+    assert lines[:3] == ["* RC LP", ".param R=1000.0", ".param C=1e-09"]
+    assert "R1 in out {R}" in lines
+    assert lines.count("reset") == 3
+    assert [l for l in lines if l.startswith("echo")] == [
+        "echo @@done 0@@", "echo @@done 1@@", "echo @@done 2@@"]
+    assert "alterparam R=2000.0" in lines
+    assert lines[-3:] == ["quit", ".endc", ".end"]
+    assert lines.count(".control") == 1
+
+
+def test_run_many_reruns_samples_after_a_crash_one_at_a_time():
+    backend = _make_backend(batch_size=4)
+    calls = []
+    with patch("utils.tolerance.ngspice.subprocess.run",
+               side_effect=_batch_run(calls, crash_after=1)):
+        out = backend.run_many(SAMPLES)
+    # Samples 1..3 re-ran alone.
+    assert len(calls) == 4
+    assert out[0]["fc"] == pytest.approx(_fc(SAMPLES[0]), rel=1e-5)
+    assert [o["fc"] for o in out[1:]] == pytest.approx(
+        [_fc(s) for s in SAMPLES[1:]], rel=1e-5)
+
+
+def test_run_many_timeout_keeps_finished_samples():
+    backend = _make_backend(batch_size=4, timeout=2.0)
+    timeouts = []
+    calls = []
+    batch = _batch_run(calls, timeout_after=2)
+    def run(argv, *args, timeout, **kwargs):
+        timeouts.append(timeout)
+        if len(timeouts) == 1:
+            return batch(argv, timeout=timeout)
+        raise subprocess.TimeoutExpired(cmd="ngspice", timeout=timeout)
+    with patch("utils.tolerance.ngspice.subprocess.run", side_effect=run):
+        out = backend.run_many(SAMPLES)
+    assert timeouts == [8.0, 2.0, 2.0]
+    assert [o["fc"] for o in out[:2]] == pytest.approx(
+        [_fc(s) for s in SAMPLES[:2]], rel=1e-5)
+    assert all(isinstance(o, TimedOut) for o in out[2:])
+
+
+def test_batch_size_needs_a_param_template():
+    with pytest.raises(ValueError, match="batch_size"):
+        _make_backend(batch_size=0)
+    with pytest.raises(ValueError, match="one sample at a time"):
+        _make_backend(template=lambda **v: RC_TEMPLATE.format(**v),
+                      batch_size=4)
+    with pytest.raises(ValueError, match="one sample at a time"):
+        _make_backend(template=RC_TEMPLATE.replace(
+            "ac dec 200", "ac dec {N}"), batch_size=4)
+
+
+def test_analyze_feeds_batches_and_cache_batches_misses(tmp_path):
+    from utils.tolerance import analyze
+    backend = _make_backend(batch_size=4)
+    cached = CachedBackend(backend, path=tmp_path / "cache.sqlite")
+    assert cached.batch_size == 4
+    kwargs = dict(nominal_values={"R": 1e3, "C": 1e-9},
+                  passive_tolerances={"R": 0.01, "C": 0.05},
+                  spec={"fc": ("within", 0.2)}, n_mc=10, seed=3,
+                  workers=2)
+    calls = []
+    with patch("utils.tolerance.ngspice.subprocess.run",
+               side_effect=_batch_run(calls)):
+        first = analyze(metrics=cached, **kwargs)
+        assert len(calls) == 1 + 3      # nominal + ceil(10 / 4)
+        again = analyze(metrics=cached, **kwargs)
+        assert len(calls) == 4
+        # SAMPLES[0] is the nominal, cached; 1..3 run in one batch
+        # and the repeat of 1 rides along.
+        out = cached.run_many(SAMPLES + SAMPLES[1:2])
+        assert len(calls) == 5
+    assert "alterparam R=3300.0" in calls[-1]
+    assert [o["fc"] for o in out] == pytest.approx(
+        [_fc(s) for s in SAMPLES + SAMPLES[1:2]], rel=1e-5)
+    assert first.samples_pass == again.samples_pass == 10
+    assert cached.misses == cached.stats.misses == 11 + 3
+    cached.close()
+
+
+# ---------- Work area ----------
+
+def test_scratch_dirs_are_isolated_and_removed(tmp_path):
+    from utils.tolerance import WorkArea
+    area = WorkArea(root=str(tmp_path))
+    with area.scratch() as a, area.scratch() as b:
+        assert a != b and a.parent == b.parent == tmp_path
+        (a / "run.data").write_text("1 2\n")
+    assert list(tmp_path.iterdir()) == []
+    with WorkArea(root=str(tmp_path), keep=True).scratch() as kept:
+        pass
+    assert kept.exists()
+
+
+def test_work_area_validation_and_tmpfs(tmp_path):
+    from utils.tolerance import WorkArea
+    from utils.tolerance import workarea
+    with pytest.raises(ValueError, match="stdin"):
+        WorkArea(stdin="yes")
+    with pytest.raises(ValueError, match="not a directory"):
+        WorkArea(root=str(tmp_path / "missing"))
+    with patch.object(workarea, "_TMPFS_CANDIDATES",
+                      (None, str(tmp_path / "missing"), str(tmp_path))):
+        assert WorkArea.tmpfs(stdin=True) == WorkArea(root=str(tmp_path),
+                                                      stdin=True)
+    with patch.object(workarea, "_TMPFS_CANDIDATES", ()):
+        assert WorkArea.tmpfs().root is None
+
+
+def test_stdin_auto_probes_the_ngspice_version():
+    from utils.tolerance import WorkArea
+    from utils.tolerance import workarea
+    area = WorkArea(stdin="auto")
+    for banner, expected in (
+            ("******\n** ngspice-45.2 : Circuit level simulation\n", True),
+            ("** ngspice-44 : Circuit level simulation\n", False),
+            ("garbage\n", False)):
+        workarea._ngspice_version.cache_clear()
+        with patch("utils.tolerance.workarea.subprocess.run",
+                   return_value=MagicMock(stdout=banner, stderr="")) as run:
+            assert area.use_stdin("/opt/ngspice") is expected
+            area.use_stdin("/opt/ngspice")
+        assert run.call_count == 1          # probed once per binary
+        assert run.call_args[0][0] == ["/opt/ngspice", "-v"]
+    workarea._ngspice_version.cache_clear()
+    assert WorkArea(stdin=True).use_stdin("x") is True
+
+
+def test_backend_pipes_netlist_on_stdin():
+    from utils.tolerance import WorkArea
+    backend = _make_backend(work_area=WorkArea(stdin=True))
+    calls = []
+    def run(argv, *args, **kwargs):
+        calls.append((argv, kwargs.get("input")))
+        return MagicMock(returncode=0, stdout="fc = 1.5e5\n", stderr="")
+    with patch("utils.tolerance.ngspice.subprocess.run", side_effect=run):
+        assert backend(R=1e3, C=1e-9)["fc"] == pytest.approx(1.5e5)
+    (argv, netlist), = calls
+    assert argv == ["ngspice", "-b"]
+    assert "R1 in out 1000.0" in netlist
+
+
+def test_backend_netlist_file_in_work_area(tmp_path):
+    from utils.tolerance import WorkArea
+    backend = _make_backend(work_area=WorkArea(root=str(tmp_path)))
+    captured = {}
+    with patch("utils.tolerance.ngspice.subprocess.run",
+               side_effect=_mock_run(capture_netlist=captured)):
+        backend(R=1e3, C=1e-9)
+    cir = Path(captured["argv"][2])
+    assert cir.parent.parent == tmp_path
+    assert "R1 in out 1000.0" in captured["netlist"]
+    assert list(tmp_path.iterdir()) == []
+    with pytest.raises(TypeError, match="WorkArea"):
+        _make_backend(work_area=str(tmp_path))
+
+
+# ---------- Waveforms ----------
+
+def _write_run(calls):
+    """subprocess.run stand-in that answers each ``write <path>`` with a
+    binary rawfile of a transient whose ``v(out)`` ramps up to the
+    sample's ``R`` (in kΩ), plus the usual ``fc`` line."""
+    def side_effect(argv, *args, **kwargs):
+        with open(argv[2]) as f:
+            netlist = f.read()
+        calls.append(netlist)
+        r, out = None, []
+        for line in netlist.splitlines():
+            if line.startswith((".param R=", "alterparam R=")):
+                r = float(line.split("=")[1])
+            elif line.startswith("R1 ") and "{" not in line:
+                r = float(line.split()[3])
+            elif line.startswith("write "):
+                t = np.linspace(0, 1e-3, 11)
+                data = np.column_stack([t, r / 1e3 * t / t[-1]])
+                header = ("Title: t\nPlotname: Transient Analysis\n"
+                          "Flags: real\nNo. Variables: 2\n"
+                          f"No. Points: {len(t)}\nVariables:\n"
+                          "\t0\ttime\ttime\n\t1\tv(out)\tvoltage\nBinary:\n")
+                with open(line.split()[1], "wb") as raw:
+                    raw.write(header.encode() + data.astype("<f8").tobytes())
+                out.append("fc = 1.5e5")
+            elif line.startswith("echo "):
+                out.append(line[5:])
+        return MagicMock(returncode=0, stdout="\n".join(out) + "\n",
+                         stderr="")
+    return side_effect
+
+
+def _peak(plot):
+    return {"peak": plot["out"].max()}
+
+
+def test_waveforms_measured_from_binary_write(tmp_path):
+    from utils.tolerance import WorkArea
+    backend = _make_backend(outputs=("fc", "peak"), waveforms=_peak,
+                            work_area=WorkArea(root=str(tmp_path)))
+    calls = []
+    with patch("utils.tolerance.ngspice.subprocess.run",
+               side_effect=_write_run(calls)):
+        out = backend(R=2e3, C=1e-9)
+    assert out["fc"] == pytest.approx(1.5e5)
+    assert out["peak"] == pytest.approx(2.0)
+    lines = calls[0].splitlines()
+    control = lines[lines.index(".control"):]
+    assert control[1:4] == ["ac dec 200 1 1Meg",
+                            "meas ac fc when vdb(out)=-3",
+                            "set filetype=binary"]
+    assert control[4].startswith("write ") and control[4].endswith(
+        "run.raw")
+    assert lines.count(".control") == 1 and lines[-1] == ".end"
+    assert list(tmp_path.iterdir()) == []
+    with pytest.raises(TypeError, match="waveforms"):
+        _make_backend(waveforms="peak")
+
+
+def test_waveforms_per_sample_in_batches():
+    backend = _make_backend(outputs=("fc", "peak"), waveforms=_peak,
+                            batch_size=4)
+    calls = []
+    with patch("utils.tolerance.ngspice.subprocess.run",
+               side_effect=_write_run(calls)):
+        out = backend.run_many(SAMPLES)
+    assert len(calls) == 1
+    assert [o["peak"] for o in out] == pytest.approx(
+        [s["R"] / 1e3 for s in SAMPLES])
+    writes = [l for l in calls[0].splitlines() if l.startswith("write ")]
+    assert len(set(writes)) == 4
+
+
+def test_waveforms_missing_rawfile_is_nan():
+    backend = _make_backend(outputs=("fc", "peak"), waveforms=_peak)
+    with patch("utils.tolerance.ngspice.subprocess.run",
+               side_effect=_mock_run()):
+        out = backend(R=1e3, C=1e-9)
+    assert out["fc"] == pytest.approx(1.59155e5)
+    assert math.isnan(out["peak"])
 
 
 # ---------- Signature ----------
@@ -214,3 +534,92 @@ def test_signature_differs_for_different_outputs():
     a = _make_backend(template=RC_TEMPLATE, outputs=["fc"])
     b = _make_backend(template=RC_TEMPLATE, outputs=["fc", "peak"])
     assert a.signature() != b.signature()
+
+
+# ---------- Netlist content keys ----------
+
+from utils.tolerance.netlist import netlist_digest, normalize_netlist
+
+
+def test_normalize_netlist_drops_what_ngspice_ignores():
+    text = """* title line
+V1 in 0 AC 1
+*  a comment
+R1   in out {R} ; inline
+C1 out 0
++ {C} $ cap
+
+.control
+echo "a ; b"
+.endc
+.end
+anything after .end
+"""
+    assert normalize_netlist(text.format(R="1k", C="1n")) == [
+        "V1 in 0 AC 1", "R1 in out 1k", "C1 out 0 1n",
+        ".control", 'echo "a ; b"', ".endc", ".end"]
+
+
+def test_netlist_digest_equivalent_and_distinct_netlists(tmp_path):
+    lib = tmp_path / "models" / "uopamp.lib"
+    lib.parent.mkdir()
+    lib.write_text(".subckt uopamp 1 2 3\nR1 1 2 1k\n.ends\n")
+    a = "RC\nR1 in out 1k\n.include models/uopamp.lib\n.end\n"
+    b = (f"other title\n  R1 in   out 1k  ; same part\n"
+         f".inc '{lib}'\n.end\n")
+    assert netlist_digest(a, ["fc"], base_dir=tmp_path) == \
+        netlist_digest(b, ["fc"], base_dir=tmp_path)
+    assert netlist_digest(a, ["fc"], base_dir=tmp_path) != \
+        netlist_digest(a.replace("1k", "1.1k"), ["fc"], base_dir=tmp_path)
+    assert netlist_digest(a, ["fc"], base_dir=tmp_path) != \
+        netlist_digest(a, ["fc", "q"], base_dir=tmp_path)
+
+
+def test_netlist_digest_follows_include_contents(tmp_path):
+    inner = tmp_path / "inner.lib"
+    outer = tmp_path / "outer.lib"
+    inner.write_text(".model D1 D(Is=1e-14)\n")
+    outer.write_text("* wrapper\n.include inner.lib\n")
+    net = f"t\nD1 a 0 D1\n.include {outer}\n.end\n"
+    before = netlist_digest(net)
+    # Comment-only edits don't matter; a model parameter does — even
+    # two includes deep, after the outer file's hash was memoised.
+    inner.write_text(".model D1 D(Is=1e-14) ; tweaked comment\n")
+    assert netlist_digest(net) == before
+    inner.write_text(".model D1 D(Is=2e-14)\n")
+    assert netlist_digest(net) != before
+    # An unreadable include is keyed by its path.
+    missing = net.replace(str(outer), str(tmp_path / "nope.lib"))
+    assert netlist_digest(missing) == netlist_digest(missing)
+    assert netlist_digest(missing) != netlist_digest(net)
+
+
+def test_cached_backend_netlist_key_shares_across_templates(tmp_path):
+    """A string template and a callable rendering the same circuit
+    (different title, spacing, comments) share one cache entry."""
+    from utils.tolerance import CachedBackend
+    as_string = _make_backend()
+    as_callable = _make_backend(
+        template=lambda R, C: RC_TEMPLATE.format(R=R, C=C).replace(
+            "* RC LP", "* generated").replace("R1 in out", "R1  in  out"))
+    db = tmp_path / "cache.sqlite"
+    with patch("utils.tolerance.ngspice.subprocess.run",
+               side_effect=_mock_run()) as run:
+        first = CachedBackend(as_string, path=db, key="netlist")
+        first(R=1e3, C=1e-9)
+        first.close()
+        second = CachedBackend(as_callable, path=db, key="netlist")
+        assert second(R=1e3, C=1e-9) == {"fc": 1.591550e+05}
+        assert second(R=1e3, C=2e-9) == {"fc": 1.591550e+05}
+        second.close()
+    assert run.call_count == 2          # the C=2e-9 netlist is new
+    assert (second.hits, second.misses) == (1, 1)
+    assert second.signature == "netlist"
+
+
+def test_cached_backend_netlist_key_needs_a_backend_that_renders():
+    from utils.tolerance import CachedBackend
+    with pytest.raises(TypeError, match="netlist_key"):
+        CachedBackend(lambda **v: {}, key="netlist")
+    with pytest.raises(ValueError, match="key"):
+        CachedBackend(_make_backend(), key="template")
@@ -0,0 +1,289 @@
+"""Tests for the persistent ngspice worker pool.
+
+ngspice itself isn't needed: the workers run a small Python stand-in
+for ``ngspice -p`` that reads the same commands from stdin — ``source``,
+``alterparam`` / ``reset``, ``ac`` / ``run``, ``meas``, ``echo`` — and
+prints ``.meas``-style results for an RC low-pass. ``R < 0`` makes it
+crash and ``R == 0`` makes it hang, so the recycling paths run against
+real processes and pipes.
+"""
+import math
+import os
+import pickle
+import stat
+import sys
+import textwrap
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pytest
+
+from utils.tolerance import NgspicePool, TimedOut, WorkArea, analyze
+from utils.tolerance import pool as pool_mod
+
+
+RC_TEMPLATE = """* RC LP
+V1 in 0 AC 1
+R1 in out {R}
+C1 out 0 {C}
+.control
+ac dec 200 1 1Meg
+meas ac fc when vdb(out)=-3
+quit
+.endc
+.end
+"""
+
+FAKE_NGSPICE = textwrap.dedent("""\
+    #!{python}
+    import math, os, re, sys, time
+    params, altered, elements, log = {{}}, {{}}, {{}}, {log!r}
+
+    def value(text):
+        text = text.strip("{{}}")
+        return params[text] if text in params else float(text)
+
+    for line in sys.stdin:
+        cmd = line.strip()
+        with open(log, "a") as f:
+            f.write(f"{{os.getpid()}} {{cmd}}\\n")
+        if cmd.startswith("source "):
+            for l in open(cmd[7:]):
+                if l.startswith(".param "):
+                    name, v = l[7:].split("=")
+                    params[name] = float(v)
+                elif l[:1] in "RC" and l.strip():
+                    f = l.split()
+                    elements[f[0]] = f[3]
+                elif l.startswith("X"):
+                    print("Error: unknown subckt: " + l.strip())
+        elif cmd.startswith("alterparam "):
+            name, v = cmd[11:].split("=")
+            altered[name] = float(v)
+        elif cmd == "reset":
+            params.update(altered)
+        elif cmd.split()[0] in ("ac", "run") and "R1" in elements:
+            r = value(elements["R1"])
+            if r < 0:
+                os._exit(3)
+            if r == 0:
+                time.sleep(60)
+        elif cmd.startswith("meas ac fc"):
+            fc = 1 / (2 * math.pi * value(elements["R1"])
+                      * value(elements["C1"]))
+            print(f"fc                  =  {{fc:e}} targ=  1e5")
+        elif cmd.startswith("echo "):
+            print(cmd[5:])
+        sys.stdout.flush()
+""")
+
+
+@pytest.fixture
+def fake_ngspice(tmp_path):
+    """Path to the stand-in ngspice, and a function returning the
+    ``(pid, command)`` pairs it has logged."""
+    log = tmp_path / "commands.log"
+    log.touch()
+    path = tmp_path / "ngspice"
+    path.write_text(FAKE_NGSPICE.format(python=sys.executable, log=str(log)))
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+
+    def commands():
+        return [tuple(line.split(" ", 1))
+                for line in log.read_text().splitlines()]
+    return str(path), commands
+
+
+def _fc(R, C):
+    return 1 / (2 * math.pi * R * C)
+
+
+# ---------- Running ----------
+
+def test_pool_loads_once_per_worker(fake_ngspice):
+    ngspice, commands = fake_ngspice
+    with NgspicePool(RC_TEMPLATE, ["fc"], size=1,
+                     ngspice=ngspice) as backend:
+        for R, C in [(1e3, 1e-9), (2e3, 1e-9), (1e3, 4.7e-9)]:
+            assert backend(R=R, C=C)["fc"] == pytest.approx(_fc(R, C),
+                                                           rel=1e-5)
+    sent = [cmd for _, cmd in commands()]
+    assert len({pid for pid, _ in commands()}) == 1
+    assert sum(cmd.startswith("source ") for cmd in sent) == 1
+    assert sent.count("reset") == 3
+    assert "alterparam R=2000.0" in sent
+    assert "quit" not in sent
+
+
+def test_callable_template_sourced_per_sample(fake_ngspice):
+    ngspice, commands = fake_ngspice
+    with NgspicePool(lambda **v: RC_TEMPLATE.format(**v), ["fc"], size=1,
+                     ngspice=ngspice) as backend:
+        assert backend(R=1e3, C=1e-9)["fc"] == pytest.approx(
+            _fc(1e3, 1e-9), rel=1e-5)
+        assert backend(R=2e3, C=1e-9)["fc"] == pytest.approx(
+            _fc(2e3, 1e-9), rel=1e-5)
+    sent = [cmd for _, cmd in commands()]
+    assert sum(cmd.startswith("source ") for cmd in sent) == 2
+    assert sent.count("remcirc") == 1
+    assert len({pid for pid, _ in commands()}) == 1
+
+
+def test_concurrent_calls_use_up_to_size_workers(fake_ngspice):
+    ngspice, commands = fake_ngspice
+    with NgspicePool(RC_TEMPLATE, ["fc"], size=3,
+                     ngspice=ngspice) as backend:
+        report = analyze(nominal_values={"R": 1e3, "C": 1e-9},
+                         passive_tolerances={"R": 0.01, "C": 0.05},
+                         metrics=backend, spec={"fc": ("within", 0.2)},
+                         n_mc=30, workers=6, seed=1)
+    assert report.samples_pass == report.samples_total == 30
+    assert 1 <= len({pid for pid, _ in commands()}) <= 3
+
+
+def test_missing_measurement_is_nan(fake_ngspice):
+    ngspice, _ = fake_ngspice
+    with NgspicePool(RC_TEMPLATE, ["fc", "peak"], size=1,
+                     ngspice=ngspice) as backend:
+        out = backend(R=1e3, C=1e-9)
+    assert out["fc"] > 0 and math.isnan(out["peak"])
+
+
+# ---------- Recycling ----------
+
+def test_hang_returns_timed_out_and_replaces_worker(fake_ngspice):
+    ngspice, commands = fake_ngspice
+    with NgspicePool(RC_TEMPLATE, ["fc"], size=1, ngspice=ngspice,
+                     timeout=1.0) as backend:
+        out = backend(R=0.0, C=1e-9)
+        assert isinstance(out, TimedOut) and math.isnan(out["fc"])
+        assert backend(R=1e3, C=1e-9)["fc"] > 0
+    assert len({pid for pid, _ in commands()}) == 2
+
+
+def test_crash_retried_once_then_raises(fake_ngspice):
+    ngspice, commands = fake_ngspice
+    with NgspicePool(RC_TEMPLATE, ["fc"], size=1,
+                     ngspice=ngspice) as backend:
+        with pytest.raises(RuntimeError, match="exited"):
+            backend(R=-1.0, C=1e-9)
+        assert backend(R=1e3, C=1e-9)["fc"] > 0
+    assert len({pid for pid, _ in commands()}) == 3
+
+
+def test_template_error_raises_and_replaces_worker(fake_ngspice):
+    ngspice, commands = fake_ngspice
+    with NgspicePool("* t\nX1 in out opamp\n.end\n", ["fc"], size=1,
+                     ngspice=ngspice) as backend:
+        with pytest.raises(RuntimeError, match="unknown subckt"):
+            backend()
+        with pytest.raises(RuntimeError):
+            backend()
+    assert len({pid for pid, _ in commands()}) == 2
+
+
+def test_max_runs_and_max_rss_recycle(fake_ngspice):
+    ngspice, commands = fake_ngspice
+    with NgspicePool(RC_TEMPLATE, ["fc"], size=1, ngspice=ngspice,
+                     max_runs=2, max_rss=None) as backend:
+        for _ in range(5):
+            backend(R=1e3, C=1e-9)
+    assert len({pid for pid, _ in commands()}) == 3
+
+    with NgspicePool(RC_TEMPLATE, ["fc"], size=1, ngspice=ngspice,
+                     max_runs=None, max_rss=2**20) as backend, \
+            patch.object(pool_mod, "_rss", return_value=2**21):
+        backend(R=1e3, C=1e-9)
+        backend(R=1e3, C=1e-9)
+    assert len({pid for pid, _ in commands()}) == 5
+
+
+def test_close_stops_workers_and_pool_restarts(fake_ngspice, tmp_path):
+    ngspice, _ = fake_ngspice
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    backend = NgspicePool(RC_TEMPLATE, ["fc"], size=2, ngspice=ngspice,
+                          work_area=WorkArea(root=str(scratch)))
+    backend(R=1e3, C=1e-9)
+    workers = set(backend._workers.all)
+    assert all(w.dir.parent == scratch for w in workers)
+    backend.close()
+    assert all(w.proc.poll() is not None for w in workers)
+    assert list(scratch.iterdir()) == []
+    assert backend(R=1e3, C=1e-9)["fc"] > 0
+    backend.close()
+
+
+def test_close_retires_taken_workers_and_wakes_takers(fake_ngspice,
+                                                      tmp_path):
+    import threading
+    ngspice, _ = fake_ngspice
+    workers = pool_mod._Workers(1)
+    args = (ngspice, str(tmp_path), WorkArea(root=str(tmp_path)))
+    busy = workers.take(*args)
+    taken = []
+    waiter = threading.Thread(target=lambda: taken.append(
+        workers.take(*args)), daemon=True)
+    waiter.start()                      # blocks: the one slot is busy
+    waiter.join(0.2)
+    assert waiter.is_alive()
+    workers.close()
+    waiter.join(10)
+    assert not waiter.is_alive()        # woken, and started a fresh one
+    workers.give(busy, keep=True)       # taken before close: retired
+    assert busy.proc.poll() is not None
+    assert workers.all == set(taken) and workers.started == 1
+    workers.give(taken[0], keep=True)
+    assert workers.take(*args) is taken[0]
+    workers.close()
+
+
+# ---------- Contract ----------
+
+def test_validation():
+    with pytest.raises(RuntimeError, match="not found"):
+        NgspicePool(RC_TEMPLATE, ["fc"], ngspice="/nonexistent/ngspice")
+    with patch("utils.tolerance.pool.shutil.which", return_value="x"):
+        with pytest.raises(ValueError, match="size"):
+            NgspicePool(RC_TEMPLATE, ["fc"], size=0)
+        with pytest.raises(ValueError, match="max_runs"):
+            NgspicePool(RC_TEMPLATE, ["fc"], max_runs=0)
+        with patch("utils.tolerance.pool.os.cpu_count", return_value=3):
+            assert NgspicePool(RC_TEMPLATE, ["fc"]).size == 3
+
+
+def test_signature_pickle_and_with_timeout(fake_ngspice):
+    from utils.tolerance import NgspiceBackend
+    ngspice, _ = fake_ngspice
+    backend = NgspicePool(RC_TEMPLATE, ["fc"], size=1, ngspice=ngspice,
+                          timeout=5.0)
+    local = NgspiceBackend(RC_TEMPLATE, ["fc"], ngspice=ngspice)
+    assert backend.signature() == local.signature()
+    assert backend.netlist_key(R=1.0, C=2.0) == local.netlist_key(
+        R=1.0, C=2.0)
+    backend(R=1e3, C=1e-9)
+    longer = backend.with_timeout(10.0)
+    assert longer.timeout == 10.0 and longer._workers is backend._workers
+    clone = pickle.loads(pickle.dumps(backend))
+    assert clone._workers is not backend._workers
+    assert not clone._workers.all
+    assert clone(R=1e3, C=1e-9)["fc"] > 0
+    clone.close()
+    backend.close()
+
+
+def test_netlist_key_hashes_includes_from_pool_cwd(fake_ngspice, tmp_path,
+                                                   monkeypatch):
+    ngspice, _ = fake_ngspice
+    models = tmp_path / "models"
+    models.mkdir()
+    (models / "rc.lib").write_text(".param rs=1\n")
+    elsewhere = tmp_path / "elsewhere"
+    elsewhere.mkdir()
+    monkeypatch.chdir(elsewhere)        # not where the workers run
+    template = RC_TEMPLATE.replace("V1 in", ".include rc.lib\nV1 in", 1)
+    backend = NgspicePool(template, ["fc"], size=1, ngspice=ngspice,
+                          cwd=str(models))
+    before = backend.netlist_key(R=1.0, C=2.0)
+    (models / "rc.lib").write_text(".param rs=10\n")
+    assert backend.netlist_key(R=1.0, C=2.0) != before
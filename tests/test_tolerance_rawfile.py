@@ -0,0 +1,153 @@
+"""Tests for the rawfile / wrdata readers.
+
+The files are written here in ngspice's layouts — an ASCII header,
+then little-endian doubles after ``Binary:`` or one value per line
+after ``Values:`` — so ngspice isn't needed.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import numpy as np
+import pytest
+
+from utils.tolerance import RawPlot, read_raw, read_wrdata
+
+
+def _header(names, n_points, plotname="Transient Analysis", flags="real",
+            values=False):
+    lines = ["Title: * RC LP", "Date: Sun Oct 18 10:00:00  2026",
+             f"Plotname: {plotname}", f"Flags: {flags}",
+             f"No. Variables: {len(names)}", f"No. Points: {n_points}",
+             "Variables:"]
+    lines += [f"\t{i}\t{name}\t{'time' if i == 0 else 'voltage'}"
+              for i, name in enumerate(names)]
+    lines.append("Values:" if values else "Binary:")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def _binary_plot(names, columns, **kwargs):
+    data = np.column_stack(columns)
+    return _header(names, len(data), **kwargs) + data.astype(
+        "<c16" if np.iscomplexobj(data) else "<f8").tobytes()
+
+
+T = np.linspace(0.0, 1e-3, 7)
+OUT = np.sin(T * 1e4)
+IN = np.cos(T * 1e4)
+
+
+# ---------- Binary rawfiles ----------
+
+def test_binary_plot_is_a_memory_mapped_structured_array(tmp_path):
+    path = tmp_path / "run.raw"
+    path.write_bytes(_binary_plot(["time", "v(out)", "v(in)"],
+                                  [T, OUT, IN]))
+    plot, = read_raw(path)
+    assert isinstance(plot.data, np.memmap)
+    assert plot.data.dtype.names == ("time", "v(out)", "v(in)")
+    assert plot.names == ["time", "v(out)", "v(in)"]
+    assert (plot.title, plot.plotname, len(plot)) == (
+        "* RC LP", "Transient Analysis", 7)
+    np.testing.assert_array_equal(plot.scale, T)
+    np.testing.assert_array_equal(plot["v(out)"], OUT)
+    # A view of the mapped file, not a copy.
+    assert np.shares_memory(plot["v(in)"], plot.data)
+
+
+def test_vector_names_match_loosely(tmp_path):
+    path = tmp_path / "run.raw"
+    path.write_bytes(_binary_plot(["time", "v(out)", "n1"], [T, OUT, IN]))
+    plot, = read_raw(path)
+    np.testing.assert_array_equal(plot["out"], OUT)
+    np.testing.assert_array_equal(plot["V(OUT)"], OUT)
+    np.testing.assert_array_equal(plot["v(n1)"], IN)
+    assert "out" in plot and "v(missing)" not in plot
+    with pytest.raises(KeyError, match="v\\(missing\\)"):
+        plot["v(missing)"]
+
+
+def test_several_plots_and_complex_data(tmp_path):
+    freq = np.logspace(0, 6, 5) + 0j
+    gain = 1 / (1 + 1j * freq.real / 1.6e5)
+    path = tmp_path / "run.raw"
+    path.write_bytes(
+        _binary_plot(["time", "v(out)"], [T, OUT])
+        + _binary_plot(["frequency", "v(out)"], [freq, gain],
+                       plotname="AC Analysis", flags="complex"))
+    tran, ac = read_raw(path)
+    assert not tran.is_complex and ac.is_complex
+    assert ac.data.dtype["v(out)"] == np.dtype("<c16")
+    np.testing.assert_array_equal(ac["v(out)"], gain)
+    np.testing.assert_array_equal(ac.scale.real, freq.real)
+    np.testing.assert_array_equal(tran["v(out)"], OUT)
+
+
+def test_truncated_binary_plot_keeps_whole_points(tmp_path):
+    path = tmp_path / "run.raw"
+    path.write_bytes(_binary_plot(["time", "v(out)"], [T, OUT])[:-12])
+    plot, = read_raw(path)
+    assert len(plot) == 6
+    np.testing.assert_array_equal(plot["v(out)"], OUT[:6])
+
+
+def test_empty_and_malformed_files(tmp_path):
+    path = tmp_path / "run.raw"
+    path.write_bytes(b"")
+    assert read_raw(path) == []
+    path.write_bytes(_binary_plot(["time", "v(out)"], [T, OUT])
+                     .replace(b"No. Variables: 2", b"No. Variables: 3"))
+    with pytest.raises(ValueError, match="variable"):
+        read_raw(path)
+
+
+# ---------- ASCII rawfiles ----------
+
+def _values(columns):
+    text = ""
+    for i, row in enumerate(zip(*columns)):
+        text += f" {i}" + "".join(
+            f"\t{v.real:.17e},{v.imag:.17e}\n" if isinstance(v, complex)
+            else f"\t{v:.17e}\n" for v in row) + "\n"
+    return text.encode()
+
+
+def test_ascii_rawfile_reads_like_binary(tmp_path):
+    path = tmp_path / "run.raw"
+    gain = OUT + 1j * IN
+    path.write_bytes(
+        _header(["time", "v(out)"], 7, values=True) + _values([T, OUT])
+        + _header(["frequency", "v(out)"], 7, flags="complex", values=True)
+        + _values([list(T + 0j), list(gain)]))
+    tran, ac = read_raw(path)
+    assert isinstance(tran, RawPlot) and not isinstance(tran.data, np.memmap)
+    np.testing.assert_array_equal(tran["time"], T)
+    np.testing.assert_array_equal(tran["v(out)"], OUT)
+    np.testing.assert_array_equal(ac["v(out)"], gain)
+
+
+# ---------- wrdata ----------
+
+def _wrdata(path, columns, header=None):
+    rows = [" " + "  ".join(f"{v:.17e}" for v in row) + " "
+            for row in zip(*columns)]
+    path.write_text("\n".join(([header] if header else []) + rows) + "\n")
+
+
+def test_wrdata_matches_loadtxt(tmp_path):
+    path = tmp_path / "run.data"
+    _wrdata(path, [T, OUT, T, IN])
+    data = read_wrdata(path)
+    assert data.shape == (7, 4)
+    np.testing.assert_array_equal(data, np.loadtxt(path))
+
+
+def test_wrdata_header_and_truncated_last_row(tmp_path):
+    path = tmp_path / "run.data"
+    _wrdata(path, [T, OUT], header="time v(out)")
+    with open(path, "a") as f:
+        f.write(" 2.0e-3")              # killed mid-row
+    data = read_wrdata(path)
+    np.testing.assert_array_equal(data, np.column_stack([T, OUT]))
+    path.write_text("")
+    assert read_wrdata(path).shape == (0, 0)
@@ -17,7 +17,7 @@ from unittest.mock import patch, MagicMock
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import pytest
 
-from utils.tolerance import RemoteNgspiceBackend, NgspiceBackend
+from utils.tolerance import RemoteNgspiceBackend, NgspiceBackend, TimedOut
 
 
 RC_TEMPLATE = """* RC LP
@@ -216,6 +216,33 @@ def test_timeout_returns_all_nan():
         out = backend(R=1e3, C=1e-9)
     assert math.isnan(out["fc"])
     assert math.isnan(out["peak"])
+    assert isinstance(out, TimedOut)
+
+
+def test_with_timeout_shares_connections_and_signature():
+    backend = _make_backend(n_control_connections=2, timeout=10.0)
+    longer = backend.with_timeout(40.0)
+    assert (backend.timeout, longer.timeout) == (10.0, 40.0)
+    assert longer.signature() == backend.signature()
+    assert longer._slot_lock is backend._slot_lock
+
+
+def test_run_many_one_ssh_round_trip_per_chunk():
+    backend = _make_backend(batch_size=3)
+    inputs = []
+    def run(argv, *args, input, **kwargs):
+        inputs.append(input)
+        n = input.count("echo @@done")
+        return MagicMock(returncode=0, stderr="", stdout="".join(
+            f"fc = {i + 1}e5\n@@done {i}@@\n" for i in range(n))
+            or "fc = 1e5\n")
+    with patch("utils.tolerance.remote.subprocess.run", side_effect=run):
+        out = backend.run_many([{"R": 1e3 * k, "C": 1e-9}
+                                for k in range(1, 5)])
+    assert [o["fc"] for o in out] == [1e5, 2e5, 3e5, 1e5]
+    assert len(inputs) == 2
+    assert "alterparam R=3000.0" in inputs[0]
+    assert "R1 in out 4000.0" in inputs[1]       # a lone sample
 
 
 # ---------- close_connection ----------
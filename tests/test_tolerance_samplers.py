@@ -128,6 +128,31 @@ def test_constant_returns_fixed_value():
     assert s.nominal() == 42.0
 
 
+# ---------- Inverse CDFs (ppf) ----------
+
+@pytest.mark.parametrize("sampler", [
+    RelativeGaussian(nominal_value=1e3, tol=0.05),
+    RelativeUniform(nominal_value=1e3, tol=0.05),
+    AbsoluteGaussian(mean=0.0, sigma=1e-3),
+    Uniform(lo=-2.3, hi=-0.4),
+    LogUniform(lo=5e4, hi=1e6),
+])
+def test_ppf_matches_sample_distribution(sampler):
+    """ppf on a fine uniform grid reproduces the sampler's own
+    distribution: same median and spread as a large random draw."""
+    u = (np.arange(200_000) + 0.5) / 200_000
+    via_ppf = sampler.ppf(u)
+    via_rng = sampler.sample(_rng(1), 200_000)
+    assert np.median(via_ppf) == pytest.approx(np.median(via_rng),
+                                               rel=0.01, abs=2e-5)
+    assert via_ppf.std() == pytest.approx(via_rng.std(), rel=0.01)
+    assert np.all(np.diff(via_ppf) >= 0)
+
+
+def test_constant_ppf_is_flat():
+    assert np.all(Constant(value=4.7).ppf(np.array([0.1, 0.9])) == 4.7)
+
+
 # ---------- DEVICES library ----------
 
 def test_devices_library_contains_briefing_parts():
@@ -502,6 +527,96 @@ def test_correlations_default_none_unchanged_behaviour():
     assert a.metric_stats["fc"].mean == b.metric_stats["fc"].mean
 
 
+# ---------- Quasi-Monte-Carlo / LHS sampling ----------
+
+def _rc_batch(R, C):
+    return {"fc": 1 / (2 * np.pi * R * C)}
+
+
+QMC_COMMON = dict(
+    nominal_values={"R": 1e3, "C": 1e-9},
+    passive_tolerances={"R": 0.01, "C": 0.05},
+    metrics=_rc_batch, vectorized=True,
+    spec={"fc": ("within", 0.02)},
+)
+
+
+def test_qmc_yield_estimates_less_noisy_than_random():
+    """Across seeds, 256 scrambled-Sobol samples scatter the yield
+    estimate far less than 256 pseudo-random ones."""
+    def spread(sampling):
+        ys = [analyze(n_mc=256, seed=s, sampling=sampling,
+                      **QMC_COMMON).yield_pct for s in range(12)]
+        return np.std(ys)
+    assert spread("sobol") < 0.6 * spread("random")
+    assert spread("halton") < 0.8 * spread("random")
+
+
+def test_lhs_stratifies_every_column():
+    seen = {}
+
+    def metrics(A, B):
+        seen["A"], seen["B"] = A, B
+        return {"v": A + B}
+
+    analyze(nominal_values={"A": 0.5, "B": 0.5},
+            passive_tolerances={"A": 0.1, "B": 0.1},
+            distribution={"A": Uniform(0, 1), "B": Uniform(0, 1)},
+            metrics=metrics, vectorized=True, spec={"v": ("<", 3)},
+            n_mc=100, seed=0, sampling="lhs")
+    for col in (seen["A"], seen["B"]):
+        counts = np.bincount(np.floor(col * 100).astype(int),
+                             minlength=100)
+        assert np.all(counts == 1)
+
+
+def test_qmc_respects_correlations_and_marginals():
+    captured = {}
+
+    def metrics(R1, R2):
+        captured["R1"], captured["R2"] = R1, R2
+        return {"v": R1 + R2}
+
+    analyze(nominal_values={"R1": 1e3, "R2": 1e3},
+            passive_tolerances={"R": 0.03},
+            correlations=[(["R1", "R2"], 0.9)],
+            metrics=metrics, vectorized=True, spec={"v": ("<", 1e9)},
+            n_mc=4096, seed=2, sampling="sobol")
+    R1, R2 = captured["R1"], captured["R2"]
+    assert np.corrcoef(R1, R2)[0, 1] == pytest.approx(0.9, abs=0.02)
+    assert R1.std() == pytest.approx(10.0, rel=0.03)
+    assert R2.mean() == pytest.approx(1e3, rel=1e-4)
+
+
+def test_qmc_is_seed_deterministic_and_includes_T():
+    from utils.tolerance import Uniform as U
+    kw = dict(QMC_COMMON, n_mc=128, seed=5, sampling="halton",
+              temperature=U(-40, 85),
+              metrics=lambda R, C, T: {"fc": 1 / (2 * np.pi * R * C)})
+    a = analyze(**kw)
+    b = analyze(**kw)
+    assert np.array_equal(a.metric_samples["fc"], b.metric_samples["fc"])
+
+
+def test_qmc_rejects_sampler_without_ppf():
+    class NoPpf(Sampler):
+        def sample(self, rng, n):
+            return np.ones(n)
+        def nominal(self):
+            return 1.0
+
+    with pytest.raises(TypeError, match="ppf"):
+        analyze(**dict(QMC_COMMON, distribution={"R": NoPpf()},
+                       n_mc=16, sampling="sobol"))
+    # Still fine for plain pseudo-random sampling.
+    analyze(**dict(QMC_COMMON, distribution={"R": NoPpf()}, n_mc=16))
+
+
+def test_unknown_sampling_raises():
+    with pytest.raises(ValueError, match="sampling"):
+        analyze(**dict(QMC_COMMON, n_mc=16, sampling="sobel"))
+
+
 # ---------- Temperature dependence ----------
 
 def test_temperature_passes_T_to_metrics():
@@ -854,6 +969,31 @@ def test_robust_ranker_paired_seed_gives_stable_ranking():
     assert [c.yield_pct for c in r1] == [c.yield_pct for c in r2]
 
 
+def test_robust_ranker_vectorized_matches_per_sample():
+    """vectorized=True hands each target expr whole arrays; with
+    NumPy-safe exprs the ranking and yields match the per-sample run."""
+    from utils.eseries_opt import Problem, Resistor, Capacitor
+    from utils.tolerance import Robust
+
+    def make_problem():
+        p = Problem()
+        p.add(Resistor("R", e_series=12, range=(1e3, 1e4)))
+        p.add(Capacitor("C", e_series=12, range=(1e-9, 1e-7)))
+        p.add_target("fc", lambda R, C: 1 / (2 * np.pi * R * C),
+                     target=1591.55)
+        return p
+
+    rk_args = dict(passive_tolerances={"R": 0.01, "C": 0.05},
+                   spec={"fc": ("within", 0.03)},
+                   n_mc=500, seed=7)
+    r1 = make_problem().solve(strategy="brute", n_results=5,
+                              rank=Robust(**rk_args))
+    r2 = make_problem().solve(strategy="brute", n_results=5,
+                              rank=Robust(vectorized=True, **rk_args))
+    assert [c.values for c in r1] == [c.values for c in r2]
+    assert [c.yield_pct for c in r1] == [c.yield_pct for c in r2]
+
+
 def test_analyze_no_active_devices_yields_unchanged():
     """The active_devices=None path must produce the same yields as
     the pre-slice-3 API — regression check on the refactor."""
@@ -1279,6 +1419,24 @@ def test_parametric_sweep_over_supply_voltage():
         assert r.metric_stats["Vout"].mean == pytest.approx(v / 2, abs=1e-9)
 
 
+def test_parametric_sweep_early_stop_per_value():
+    """early_stop is applied per swept value: clearly-passing and
+    clearly-failing points stop after one batch."""
+    from utils.tolerance import parametric_sweep, EarlyStop
+    sweep = parametric_sweep(
+        parameter="Vin", values=[5.0, 12.0],
+        nominal_values={"R": 1e3},
+        passive_tolerances={"R": 0.01},
+        metrics=lambda R, Vin: {"I": Vin / R},
+        spec={"I": ("<", 10e-3)},
+        n_mc=2000, seed=0,
+        early_stop=EarlyStop(threshold=50.0, batch_size=100),
+    )
+    for _, r in sweep.corners:
+        assert r.stopped_early and r.samples_total == 100
+    assert [r.yield_pct for _, r in sweep.corners] == [100.0, 0.0]
+
+
 def test_parametric_sweep_T_uses_temperature_machinery():
     """When parameter='T', tempcos must apply (proves we're using the
     temperature= path, not just injecting T as a pinned input)."""
@@ -1332,6 +1490,29 @@ def test_parametric_dither_load_regulation_slope():
     assert s.std == pytest.approx(0.0, abs=1e-12)
 
 
+def _load_reg_metrics(R, Iload):
+    return {"Vout": 5.0 - R * Iload}
+
+
+def test_parametric_dither_runs_under_process_executor():
+    """The paired wrapper pickles, so dither sweeps can use a process
+    pool and still match the serial slopes sample for sample."""
+    from utils.tolerance import parametric_dither
+    kw = dict(
+        parameter="Iload", base=0.1, dither=0.01,
+        nominal_values={"R": 1.0},
+        passive_tolerances={"R": 0.05},
+        metrics=_load_reg_metrics,
+        spec={"Vout_dIload": (">", -1.05)},
+        n_mc=200, seed=4,
+    )
+    serial = parametric_dither(**kw)
+    par = parametric_dither(workers=2, executor="process", **kw)
+    assert par.samples_pass == serial.samples_pass
+    assert np.allclose(par.metric_samples["Vout_dIload"],
+                       serial.metric_samples["Vout_dIload"])
+
+
 def test_parametric_dither_clashes_with_existing_nominal():
     """If the swept parameter is also a nominal_values entry, the
     inject would silently overwrite — that's a usage bug, fail loud."""
@@ -0,0 +1,228 @@
+"""Tests for the in-process (libngspice) backend.
+
+Fully stubbed — libngspice is replaced by a small Python stand-in that
+speaks the same ctypes calls and callbacks, so these run without
+ngspice installed. Verified here: which templates load once and which
+re-load, the command sequence per sample, reading measurements from
+vectors and printed output, and the failure contract shared with
+``NgspiceBackend``.
+"""
+import ctypes
+import math
+import os
+import pickle
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pytest
+
+from utils.tolerance import SharedNgspiceBackend, TimedOut
+from utils.tolerance import shared
+
+
+RC_TEMPLATE = """* RC LP
+V1 in 0 AC 1
+R1 in out {R}
+C1 out 0 {C}
+.control
+ac dec 200 1 1Meg
+meas ac fc when vdb(out)=-3
+quit
+.endc
+.end
+"""
+
+
+class _FakeNgspice:
+    """Just enough of libngspice: ``.param`` / ``alterparam`` /
+    ``reset``, an RC low-pass ``ac`` whose ``meas`` stores ``fc``, and
+    the output / background-thread callbacks."""
+
+    def __init__(self):
+        self.commands = []
+        self.circuits = []
+        self.params = {}
+        self.altered = {}
+        self.vectors = {}
+        self.hang = False
+        self.circ_rc = 0
+        self.printed = []
+        self._keep = []
+
+    def ngSpice_Init(self, send_char, send_stat, controlled_exit, send_data,
+                     send_init, bg_running, user):
+        self.send_char, self.bg_running = send_char, bg_running
+        return 0
+
+    def ngSpice_Circ(self, array):
+        lines = []
+        while array[len(lines)] is not None:
+            lines.append(array[len(lines)].decode())
+        self.circuits.append(lines)
+        for line in lines:
+            if line.startswith(".param "):
+                name, value = line[7:].split("=")
+                self.params[name] = float(value)
+        return self.circ_rc
+
+    def ngSpice_Command(self, text):
+        cmd = text.decode()
+        self.commands.append(cmd)
+        if cmd.startswith("alterparam "):
+            name, value = cmd[11:].split("=")
+            self.altered[name] = float(value)
+        elif cmd == "reset":
+            self.params.update(self.altered)
+        elif cmd.startswith("bg_") and cmd != "bg_halt":
+            self.bg_running(False, 0, None)
+            if not self.hang:
+                for line in self.printed:
+                    self.send_char(("stdout " + line).encode(), 0, None)
+                self.bg_running(True, 0, None)
+        elif cmd == "bg_halt":
+            self.bg_running(True, 0, None)
+        elif cmd.startswith("meas ac fc"):
+            self.vectors["fc"] = 1 / (2 * math.pi * self.params["R"]
+                                      * self.params["C"])
+        elif cmd == "destroy all":
+            self.vectors.clear()
+        return 0
+
+    def ngGet_Vec_Info(self, name):
+        name = name.decode()
+        if name not in self.vectors:
+            return ctypes.POINTER(shared._VectorInfo)()
+        data = (ctypes.c_double * 1)(self.vectors[name])
+        info = shared._VectorInfo(v_name=name.encode(), v_length=1)
+        info.v_realdata = ctypes.cast(data, ctypes.POINTER(ctypes.c_double))
+        self._keep.append(data)
+        return ctypes.pointer(info)
+
+
+@pytest.fixture
+def fake():
+    lib = _FakeNgspice()
+    with patch.object(shared, "_load", return_value=lib), \
+            patch.dict(shared._sessions, clear=True):
+        yield lib
+
+
+def _fc(R, C):
+    return 1 / (2 * math.pi * R * C)
+
+
+# ---------- Template analysis ----------
+
+def test_param_names_only_where_ngspice_evaluates_expressions():
+    assert shared._param_names(RC_TEMPLATE) == ["R", "C"]
+    assert shared._param_names(
+        "t\n.model Q NPN(BF={BF})\n+ VAF={VAF}\nR1 a b {R}\n") == [
+            "BF", "VAF", "R"]
+    assert shared._param_names("t\n.temp {T}\nR1 a b {R}\n") is None
+    assert shared._param_names(
+        "t\n.control\nac dec {N} 1 1k\n.endc\n") is None
+    assert shared._param_names("t\nR1 a b {R:.3g}\n") is None
+    assert shared._param_names("t\nR1 a b {{R}}\n") is None
+    assert shared._param_names(lambda **v: "") is None
+
+
+def test_split_control_drops_quit():
+    circuit, control = shared._split_control(RC_TEMPLATE)
+    assert control == ["ac dec 200 1 1Meg", "meas ac fc when vdb(out)=-3"]
+    assert ".control" not in circuit and circuit[-1] == ".end"
+
+
+# ---------- Running ----------
+
+def test_loads_circuit_once_and_alters_params(fake):
+    backend = SharedNgspiceBackend(RC_TEMPLATE, ["fc"])
+    for R, C in [(1e3, 1e-9), (2e3, 1e-9), (1e3, 4.7e-9)]:
+        assert backend(R=R, C=C)["fc"] == pytest.approx(_fc(R, C))
+    assert len(fake.circuits) == 1
+    assert fake.circuits[0][:3] == ["* RC LP", ".param R=1000.0",
+                                    ".param C=1e-09"]
+    assert "R1 in out {R}" in fake.circuits[0]
+    assert fake.commands[:6] == [
+        "alterparam R=1000.0", "alterparam C=1e-09", "reset",
+        "bg_ac dec 200 1 1Meg", "meas ac fc when vdb(out)=-3",
+        "destroy all"]
+    assert "quit" not in fake.commands
+
+
+def test_callable_template_reloads_per_sample(fake):
+    backend = SharedNgspiceBackend(
+        lambda **v: RC_TEMPLATE.format(**v), ["fc"])
+    fake.params = {"R": 1e3, "C": 1e-9}
+    backend(R=1e3, C=1e-9)
+    backend(R=2e3, C=1e-9)
+    assert len(fake.circuits) == 2
+    assert "R1 in out 2000.0" in fake.circuits[1]
+    assert fake.commands.count("remcirc") == 1
+    assert not any(c.startswith("alterparam") for c in fake.commands)
+
+
+def test_two_backends_take_turns_with_one_library(fake):
+    a = SharedNgspiceBackend(RC_TEMPLATE, ["fc"])
+    b = SharedNgspiceBackend(RC_TEMPLATE.replace("1Meg", "10Meg"), ["fc"])
+    a(R=1e3, C=1e-9)
+    b(R=1e3, C=1e-9)
+    a(R=1e3, C=1e-9)
+    assert len(fake.circuits) == 3          # each swap reloads
+    a(R=2e3, C=1e-9)
+    assert len(fake.circuits) == 3
+
+
+def test_printed_meas_when_no_vector(fake):
+    template = ("* RC\nR1 in out {R}\nC1 out 0 {C}\n.ac dec 10 1 1Meg\n"
+                ".meas ac fc when vdb(out)=-3\n.end\n")
+    fake.printed = ["fc                  =  1.591550e+05 targ= 1e5"]
+    out = SharedNgspiceBackend(template, ["fc", "peak"])(R=1e3, C=1e-9)
+    assert "bg_run" in fake.commands
+    assert out["fc"] == pytest.approx(1.59155e5)
+    assert math.isnan(out["peak"])
+
+
+# ---------- Failure handling ----------
+
+def test_timeout_halts_and_returns_timed_out(fake):
+    fake.hang = True
+    backend = SharedNgspiceBackend(RC_TEMPLATE, ["fc"], timeout=0.01)
+    out = backend(R=1e3, C=1e-9)
+    assert isinstance(out, TimedOut) and math.isnan(out["fc"])
+    assert "bg_halt" in fake.commands
+    assert backend.with_timeout(5.0).timeout == 5.0
+
+
+def test_load_error_raises(fake):
+    fake.circ_rc = 1
+    with pytest.raises(RuntimeError, match="template error"):
+        SharedNgspiceBackend(RC_TEMPLATE, ["fc"])(R=1e3, C=1e-9)
+
+
+def test_error_output_without_measurements_raises(fake):
+    fake.printed = ["Error: unknown subckt: x1 in out opamp"]
+    with pytest.raises(RuntimeError, match="unknown subckt"):
+        SharedNgspiceBackend("* t\nX1 in out opamp\n.end\n", ["fc"])()
+
+
+def test_missing_library_raises():
+    with pytest.raises(RuntimeError, match="libngspice"):
+        shared._load("/nonexistent/libngspice.so")
+
+
+# ---------- Contract ----------
+
+def test_signature_and_pickle_match_ngspice_backend(fake):
+    from utils.tolerance import NgspiceBackend
+    with patch("utils.tolerance.ngspice.shutil.which", return_value="x"):
+        local = NgspiceBackend(template=RC_TEMPLATE, outputs=["fc"])
+    backend = SharedNgspiceBackend(RC_TEMPLATE, ["fc"], timeout=5.0)
+    backend(R=1e3, C=1e-9)
+    assert backend.signature() == local.signature()
+    assert backend.netlist_key(R=1e3, C=1e-9) == local.netlist_key(
+        R=1e3, C=1e-9)
+    clone = pickle.loads(pickle.dumps(backend))
+    assert (clone.template, clone.outputs, clone.timeout) == (
+        RC_TEMPLATE, ["fc"], 5.0)
+    assert clone(R=1e3, C=1e-9)["fc"] == pytest.approx(_fc(1e3, 1e-9))
@@ -21,10 +21,22 @@ arc of slices this is the first of.
 """
 
 from .analyze import analyze
-from .report import YieldReport, MetricStats
-from .ngspice import NgspiceBackend
+from .report import (YieldReport, MetricStats, ImportanceResult,
+                     ControlVariateResult, ThresholdCurve, YieldSurface)
+from .ngspice import NgspiceBackend, TimedOut
+from .netlist import netlist_digest
 from .remote import RemoteNgspiceBackend
-from .cache import CachedBackend
+from .shared import SharedNgspiceBackend
+from .pool import NgspicePool
+from .workarea import WorkArea
+from .rawfile import RawPlot, read_raw, read_wrdata
+from .cache import (CachedBackend, CacheStats, DiskLimits,
+                    LatencyHistogram, RetryPolicy, iter_entries)
+from .cache_tool import (cache_stats, export_cache, import_cache,
+                         merge_caches, purge_cache, MergeReport)
+from .sequential import EarlyStop
+from .rare_event import ImportanceSampling
+from .control_variate import ControlVariates
 from .samplers import (
     Sampler,
     RelativeGaussian, RelativeUniform, AbsoluteGaussian,
@@ -43,9 +55,17 @@ from .thermal import thermal_dither
 from .tempco import Additive, Exponential
 
 __all__ = [
-    "analyze",
-    "YieldReport", "MetricStats",
-    "NgspiceBackend", "RemoteNgspiceBackend", "CachedBackend",
+    "analyze", "EarlyStop", "ImportanceSampling", "ControlVariates",
+    "YieldReport", "MetricStats", "ImportanceResult", "ControlVariateResult",
+    "ThresholdCurve", "YieldSurface",
+    "NgspiceBackend", "RemoteNgspiceBackend", "SharedNgspiceBackend",
+    "NgspicePool", "WorkArea", "CachedBackend",
+    "RawPlot", "read_raw", "read_wrdata",
+    "netlist_digest",
+    "DiskLimits", "iter_entries",
+    "export_cache", "import_cache", "merge_caches", "MergeReport",
+    "cache_stats", "CacheStats", "LatencyHistogram",
+    "RetryPolicy", "TimedOut", "purge_cache",
     "Sampler", "RelativeGaussian", "RelativeUniform",
     "AbsoluteGaussian", "Uniform", "LogUniform", "Constant",
     "DEVICES", "DEVICE_TEMPCOS",
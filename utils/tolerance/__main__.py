@@ -0,0 +1,109 @@
+"""Command-line tools: ``python -m utils.tolerance cache <command>``.
+
+    cache list CACHE                      signatures and entry counts
+    cache stats CACHE [--signature]       cost, time saved and latency
+    cache purge CACHE [--status ...]      drop failed entries
+    cache export CACHE OUT [--signature]  copy entries to a portable file
+    cache merge SRC... -o OUT             combine files, report conflicts
+    cache import SRC... --into CACHE      add files to a local cache
+
+See ``cache_tool`` for what each does.
+"""
+import argparse
+import math
+import sys
+
+from .cache import _fmt_s
+from .cache import _STATUSES
+from .cache_tool import (_ON_CONFLICT, cache_stats, export_cache,
+                         import_cache, list_signatures, merge_caches,
+                         purge_cache)
+
+
+def _cache_parser(sub):
+    cache = sub.add_parser(
+        "cache", help="inspect, export, merge and import cache files")
+    commands = cache.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("list", help="signatures and entry counts")
+    p.add_argument("cache")
+
+    p = commands.add_parser(
+        "stats", help="simulator time, time saved, size and lookup "
+                      "latency per signature, costliest first")
+    p.add_argument("cache")
+    p.add_argument("--signature", help="only this signature")
+
+    p = commands.add_parser(
+        "purge", help="drop failed entries, keeping the good ones")
+    p.add_argument("cache")
+    p.add_argument("--status", nargs="+", choices=_STATUSES,
+                   default=["nan", "timeout"],
+                   help="entries to drop (default: nan timeout)")
+    p.add_argument("--signature", help="only this signature's entries")
+
+    p = commands.add_parser("export",
+                            help="copy entries to a standalone file")
+    p.add_argument("cache")
+    p.add_argument("out")
+    p.add_argument("--signature", help="only this signature's entries")
+
+    for name, dest_help in (("merge", "standalone output file"),
+                            ("import", "local cache to import into")):
+        p = commands.add_parser(name, help=f"{name} cache / export files")
+        p.add_argument("sources", nargs="+")
+        if name == "merge":
+            p.add_argument("-o", "--out", required=True, help=dest_help)
+        else:
+            p.add_argument("--into", required=True, help=dest_help)
+        p.add_argument("--signature", help="only this signature's entries")
+        p.add_argument("--on-conflict", choices=_ON_CONFLICT,
+                       default="keep")
+        p.add_argument("--max-conflicts", type=int, default=20,
+                       help="conflicts to print in full (default 20)")
+        p.add_argument("--strict", action="store_true",
+                       help="exit with status 1 if any entry conflicts")
+
+
+def _cache_command(args):
+    if args.command == "list":
+        for signature, n in list_signatures(args.cache):
+            print(f"{n:>10}  {signature}")
+        return 0
+    if args.command == "stats":
+        report = cache_stats(args.cache, signature=args.signature)
+        total = sum(st.simulator_seconds for st in report)
+        saved = sum(st.saved_seconds for st in report
+                    if not math.isnan(st.saved_seconds))
+        for st in report:
+            print(st)
+        print(f"{len(report)} signatures, {_fmt_s(total)} simulated, "
+              f"~{_fmt_s(saved)} saved")
+        return 0
+    if args.command == "purge":
+        n = purge_cache(args.cache, args.status, signature=args.signature)
+        print(f"purged {n} entries ({' / '.join(args.status)})")
+        return 0
+    if args.command == "export":
+        n = export_cache(args.cache, args.out, signature=args.signature)
+        print(f"exported {n} entries to {args.out}")
+        return 0
+    fn, dest = ((merge_caches, args.out) if args.command == "merge"
+                else (import_cache, args.into))
+    report = fn(args.sources, dest, signature=args.signature,
+                on_conflict=args.on_conflict,
+                max_conflicts=args.max_conflicts)
+    print(report)
+    return 1 if args.strict and report.conflicts else 0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m utils.tolerance")
+    sub = ap.add_subparsers(dest="tool", required=True)
+    _cache_parser(sub)
+    args = ap.parse_args(argv)
+    return _cache_command(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,18 +6,521 @@ ngspice runs are seconds each; a 1000-sample sweep over 5 candidates
 is hours of compute that mostly repeats across design iterations,
 spec tweaks, or replays.
 """
+import copy
 import hashlib
 import json
+import math
+import multiprocessing
+import multiprocessing.util
+import os
+import random
 import sqlite3
+import struct
 import threading
+import time
+import uuid
+import warnings
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Dict, List, Optional
+
+from .ngspice import TimedOut
+
+
+# Keys per ``IN (...)`` query; stays under SQLite's default
+# 999-variable limit on older builds.
+_SQL_BATCH = 900
+
+# Stored value blobs start with a tag byte: packed float64s against an
+# interned name layout, or JSON for anything else.
+_PACKED, _JSON = b"\x01", b"\x00"
 
 
 def _key(values):
-    """Stable JSON encoding of a values dict — sorted keys + Python's
-    full-precision float repr makes bit-identical inputs produce
-    bit-identical keys, which is what we want for cache lookup."""
-    return json.dumps(sorted(values.items()), separators=(",", ":"))
+    """Fixed-length cache key: a 128-bit BLAKE2b digest of the sorted
+    parameter names and their values packed as float64. Bit-identical
+    inputs give bit-identical keys, and a 30-parameter dict hashes
+    ~10× faster than it JSON-encodes. Non-numeric values fall back to
+    hashing their JSON encoding."""
+    names = sorted(values)
+    try:
+        packed = struct.pack(f"<{len(names)}d", *[values[n] for n in names])
+    except struct.error:
+        packed = json.dumps([values[n] for n in names],
+                            default=repr).encode()
+    return hashlib.blake2b("\0".join(names).encode() + b"\0\0" + packed,
+                           digest_size=16).digest()
+
+
+# Stored size of a row: what ``DiskLimits.max_bytes`` counts.
+_ROW_BYTES = "length(key) + length(value)"
+
+
+@dataclass
+class DiskLimits:
+    """Size / age policy for a persistent ``CachedBackend``'s sqlite
+    file. Every entry carries an access time, refreshed whenever it is
+    read; over a limit, the least recently used entries go first.
+
+    Args:
+        max_rows: Keep at most this many entries.
+        max_bytes: Keep at most this many bytes of stored keys + values
+            (the payload — the file itself runs somewhat larger).
+        max_age: Drop entries not read or written for this many
+            seconds.
+        per_signature: Apply ``max_rows`` / ``max_bytes`` to each
+            signature (circuit) separately, so a big sweep of one
+            circuit can't evict another's results. Default ``True``;
+            ``False`` makes them file-wide.
+        interval: Seconds between enforcement passes, which run on the
+            cache's background thread and return freed pages to the
+            filesystem. Default 60.
+
+    At least one of ``max_rows`` / ``max_bytes`` / ``max_age`` is
+    required.
+    """
+    max_rows: Optional[int] = None
+    max_bytes: Optional[int] = None
+    max_age: Optional[float] = None
+    per_signature: bool = True
+    interval: float = 60.0
+
+    def __post_init__(self):
+        if self.max_rows is None and self.max_bytes is None \
+                and self.max_age is None:
+            raise ValueError(
+                "DiskLimits needs max_rows=, max_bytes= or max_age="
+            )
+        if self.max_rows is not None and self.max_rows < 1:
+            raise ValueError(f"max_rows must be >= 1, got {self.max_rows}")
+        if self.max_bytes is not None and self.max_bytes < 1:
+            raise ValueError(
+                f"max_bytes must be >= 1, got {self.max_bytes}"
+            )
+        if self.max_age is not None and self.max_age <= 0:
+            raise ValueError(f"max_age must be > 0, got {self.max_age}")
+        if self.interval <= 0:
+            raise ValueError(f"interval must be > 0, got {self.interval}")
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """When a persistent ``CachedBackend`` re-runs a sample whose
+    simulation timed out (the backend returned ``TimedOut``) instead
+    of serving the cached NaNs.
+
+    A timed-out entry is served as it stands until ``backoff`` seconds
+    after the timeout, then re-run on the next lookup — with the
+    backend's timeout multiplied by ``timeout_factor`` (if it has
+    ``with_timeout``, as ``NgspiceBackend`` and
+    ``RemoteNgspiceBackend`` do). Each further consecutive timeout
+    multiplies both again. After ``max_attempts`` runs in a row have
+    timed out, the entry is kept like any other failure until purged.
+
+    Frozen: one policy — ``CachedBackend``'s default included — can be
+    shared by any number of backends; ``dataclasses.replace`` makes a
+    variant.
+
+    Args:
+        backoff: Seconds from a first timeout to its retry. Default 0:
+            the next lookup retries.
+        backoff_factor: Growth of the wait per further timeout.
+            Default 2.
+        max_backoff: Cap on the wait. Default 1 h.
+        timeout_factor: Growth of the simulation timeout per timeout.
+            Default 2.
+        max_timeout: Cap on the grown timeout, seconds; ``None``
+            (default) for none.
+        max_attempts: Runs, including the first, before giving up.
+            Default 3.
+    """
+    backoff: float = 0.0
+    backoff_factor: float = 2.0
+    max_backoff: float = 3600.0
+    timeout_factor: float = 2.0
+    max_timeout: Optional[float] = None
+    max_attempts: int = 3
+
+    def __post_init__(self):
+        if self.backoff < 0:
+            raise ValueError(f"backoff must be >= 0, got {self.backoff}")
+        if self.backoff_factor < 1 or self.timeout_factor < 1:
+            raise ValueError(
+                f"backoff_factor and timeout_factor must be >= 1, got "
+                f"{self.backoff_factor}, {self.timeout_factor}"
+            )
+        if self.max_backoff < self.backoff:
+            raise ValueError(
+                f"max_backoff must be >= backoff, got {self.max_backoff}"
+            )
+        if self.max_timeout is not None and self.max_timeout <= 0:
+            raise ValueError(
+                f"max_timeout must be > 0, got {self.max_timeout}"
+            )
+        if self.max_attempts < 1:
+            raise ValueError(
+                f"max_attempts must be >= 1, got {self.max_attempts}"
+            )
+
+    def retry_at(self, attempts, now):
+        """When to re-run after ``attempts`` consecutive timeouts, or
+        ``None`` once they're used up."""
+        if attempts >= self.max_attempts:
+            return None
+        return now + min(self.backoff
+                         * self.backoff_factor ** (attempts - 1),
+                         self.max_backoff)
+
+    def timeout(self, base, attempts):
+        """Timeout for the run after ``attempts`` timeouts at a
+        backend default of ``base`` seconds."""
+        t = base * self.timeout_factor ** attempts
+        return t if self.max_timeout is None else min(t, self.max_timeout)
+
+
+# Entry statuses, as stored in ``entries.status``: a clean result,
+# one with some or all outputs NaN (a failed ``.meas``, a convergence
+# failure — cached like any other), and a timed-out run.
+_STATUSES = ("ok", "nan", "timeout")
+_OK, _NAN, _TIMEOUT = range(3)
+
+
+def _statuses(status):
+    """Status codes for a name or names from ``_STATUSES``."""
+    names = (status,) if isinstance(status, str) else tuple(status)
+    unknown = [n for n in names if n not in _STATUSES]
+    if unknown or not names:
+        raise ValueError(f"status must be among {_STATUSES}, got {status!r}")
+    return tuple(_STATUSES.index(n) for n in names)
+
+
+def _due(value):
+    """Whether a cached output is a timeout due for its retry."""
+    return (type(value) is TimedOut and value.retry_at is not None
+            and value.retry_at <= time.time())
+
+
+def _plain(value):
+    """``value`` (an output or input dict) with NumPy scalars replaced
+    by the Python numbers they hold — a copy, of the same type with
+    the same attributes (a ``TimedOut`` keeps its retry state), if
+    any were; ``value`` itself otherwise."""
+    if not isinstance(value, dict):
+        return value
+    coerced = {k: v.item() for k, v in value.items()
+               if not isinstance(v, float) and type(v).__module__ == "numpy"
+               and hasattr(v, "item")}
+    if not coerced:
+        return value
+    out = copy.copy(value)
+    out.update(coerced)
+    return out
+
+
+def _packable(value):
+    """Whether output dict ``value`` is stored in the packed float64
+    layout rather than as JSON."""
+    return isinstance(value, dict) and bool(value) and all(
+        isinstance(k, str) and isinstance(v, float)
+        for k, v in value.items())
+
+
+def _status_of(value):
+    if isinstance(value, TimedOut):
+        return _TIMEOUT
+    if isinstance(value, dict) and any(
+            isinstance(v, float) and v != v for v in value.values()):
+        return _NAN
+    return _OK
+
+
+# Latency histogram buckets: bucket i counts durations in
+# [2**(i-21), 2**(i-20)) seconds — ~1 µs up to ~17 min, the first and
+# last open-ended.
+_N_BUCKETS = 32
+_BUCKET_OFFSET = 20
+
+# What CachedBackend times, by kind.
+_LATENCY_KINDS = {
+    "memory_hit": "served from the in-memory tier",
+    "disk_hit": "served from the sqlite file",
+    "bulk_hit": "served by lookup_many / analyze's bulk lookup "
+                "(per key, amortised)",
+    "disk_miss": "looked up on disk, not found",
+    "simulate": "wrapped backend call on a miss",
+    "wait": "waited on an identical in-flight call",
+}
+
+
+@dataclass
+class LatencyHistogram:
+    """Durations in power-of-two buckets, plus their exact count and
+    sum. ``counts[i]`` holds durations in ``[2**(i-21), 2**(i-20))``
+    seconds (about 1 µs to 17 min; the end buckets are open-ended),
+    so quantiles are good to a factor of two."""
+    counts: List[int] = field(default_factory=lambda: [0] * _N_BUCKETS)
+    seconds: float = 0.0
+
+    def add(self, seconds, n=1):
+        _, exp = math.frexp(seconds) if seconds > 0 else (0, -_BUCKET_OFFSET)
+        i = min(max(exp + _BUCKET_OFFSET, 0), _N_BUCKETS - 1)
+        self.counts[i] += n
+        self.seconds += seconds * n
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.seconds += other.seconds
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    @property
+    def mean(self):
+        n = self.count
+        return self.seconds / n if n else float("nan")
+
+    def quantile(self, q):
+        """Upper edge of the bucket holding the ``q`` quantile."""
+        n = self.count
+        if not n:
+            return float("nan")
+        target, running = q * n, 0
+        for i, c in enumerate(self.counts):
+            running += c
+            if running >= target and c:
+                return 2.0 ** (i - _BUCKET_OFFSET)
+        return 2.0 ** (_N_BUCKETS - 1 - _BUCKET_OFFSET)
+
+    def _pack(self):
+        return struct.pack(f"<{_N_BUCKETS}Q", *self.counts)
+
+    @classmethod
+    def _unpack(cls, blob, seconds):
+        return cls(list(struct.unpack(f"<{_N_BUCKETS}Q", blob)), seconds)
+
+
+@dataclass
+class CacheStats:
+    """Cost accounting for one signature — a ``CachedBackend``'s own
+    session (``cached.stats``) or everything recorded in a cache file
+    (``cache_stats(path)``).
+
+    Attributes:
+        signature: The namespace these numbers are for.
+        latency: ``{kind: LatencyHistogram}``. Kinds: ``memory_hit``,
+            ``disk_hit``, ``bulk_hit`` (per key, amortised over a
+            ``lookup_many`` batch), ``disk_miss`` (lookup time before
+            a simulation), ``simulate`` (the wrapped call on a miss)
+            and ``wait`` (time a deduplicated call spent waiting).
+        entries: Entries stored under the signature (``None`` for a
+            session).
+        statuses: Of those, how many are ``"ok"`` / ``"nan"`` /
+            ``"timeout"``.
+        bytes: Their stored size — keys, outputs and inputs.
+    """
+    signature: str
+    latency: Dict[str, LatencyHistogram] = field(default_factory=dict)
+    entries: Optional[int] = None
+    statuses: Optional[Dict[str, int]] = None
+    bytes: Optional[int] = None
+
+    def _hist(self, kind):
+        return self.latency.get(kind) or LatencyHistogram()
+
+    @property
+    def hits(self):
+        return sum(self._hist(k).count
+                   for k in ("memory_hit", "disk_hit", "bulk_hit"))
+
+    @property
+    def misses(self):
+        return self._hist("simulate").count
+
+    @property
+    def deduplicated(self):
+        return self._hist("wait").count
+
+    @property
+    def simulator_seconds(self):
+        """Time spent in the wrapped backend."""
+        return self._hist("simulate").seconds
+
+    @property
+    def saved_seconds(self):
+        """Estimated simulator time the cache saved: hits and
+        deduplicated calls times the mean simulation time, less the
+        time spent serving them. NaN before any simulation has been
+        timed."""
+        sim = self._hist("simulate")
+        if not sim.count:
+            return float("nan")
+        served = sum(self._hist(k).seconds for k in
+                     ("memory_hit", "disk_hit", "bulk_hit", "wait"))
+        return (self.hits + self.deduplicated) * sim.mean - served
+
+    def __str__(self):
+        lines = [f"{self.signature}: {self.hits} hits, {self.misses} "
+                 f"misses, {self.deduplicated} deduplicated"]
+        if self.entries is not None:
+            failed = ", ".join(f"{self.statuses[s]} {s}"
+                               for s in _STATUSES[1:]
+                               if self.statuses.get(s))
+            lines.append(f"  {self.entries} entries"
+                         + (f" ({failed})" if failed else "")
+                         + f", {_fmt_bytes(self.bytes)} stored")
+        lines.append(f"  simulator time {_fmt_s(self.simulator_seconds)}, "
+                     f"saved ~{_fmt_s(self.saved_seconds)}")
+        for kind in _LATENCY_KINDS:
+            h = self.latency.get(kind)
+            if h is not None and h.count:
+                lines.append(
+                    f"  {kind:<10} n={h.count:<9} mean {_fmt_s(h.mean)}  "
+                    f"p50 <{_fmt_s(h.quantile(0.5))}  "
+                    f"p99 <{_fmt_s(h.quantile(0.99))}")
+        return "\n".join(lines)
+
+
+def _fmt_s(seconds):
+    if not seconds > 0:                 # 0, negative or NaN
+        return f"{seconds:.3g} s"
+    for unit, scale in (("h", 3600.0), ("s", 1.0), ("ms", 1e-3),
+                        ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds * 1e9:.3g} ns"
+
+
+def _fmt_bytes(n):
+    for unit, scale in (("GB", 1e9), ("MB", 1e6), ("kB", 1e3)):
+        if n >= scale:
+            return f"{n / scale:.3g} {unit}"
+    return f"{n} B"
+
+
+class _StatsBuffer:
+    """A ``CachedBackend``'s latency histograms by kind: what its
+    store hasn't yet added to the file (``pending``), and what it has
+    (``flushed``) — together, the backend's session. Guarded by the
+    backend's lock, so recording a hit costs no extra acquire."""
+
+    def __init__(self, signature, lock):
+        self.signature = signature
+        self.reset(lock)
+
+    def reset(self, lock):
+        """Start afresh with ``lock`` — also after a ``fork``, where
+        the parent's numbers are the parent's to flush."""
+        self.lock = lock
+        self._pending = {}
+        self._flushed = {}
+
+    def add(self, kind, seconds, n=1):
+        """``LatencyHistogram.add``, inlined: this is on every cache
+        hit. Caller holds ``lock``."""
+        i = math.frexp(seconds)[1] + _BUCKET_OFFSET if seconds > 0 else 0
+        if i < 0:
+            i = 0
+        elif i >= _N_BUCKETS:
+            i = _N_BUCKETS - 1
+        hist = self._pending.get(kind)
+        if hist is None:
+            hist = self._pending[kind] = LatencyHistogram()
+        hist.counts[i] += n
+        hist.seconds += seconds * n
+
+    def session(self):
+        out = {}
+        with self.lock:
+            for table in (self._flushed, self._pending):
+                for kind, hist in table.items():
+                    out.setdefault(kind, LatencyHistogram()).merge(hist)
+        return {k: h for k, h in out.items() if h.count}
+
+    def clear_session(self):
+        """Zero the session but not what's still to be flushed: the
+        time was spent either way. Caller holds ``lock``."""
+        self._flushed = {k: LatencyHistogram([-c for c in h.counts],
+                                             -h.seconds)
+                         for k, h in self._pending.items()}
+
+    def drain(self):
+        """Hand the pending histograms to the store, which gives them
+        back with ``done(pending, committed)``."""
+        with self.lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def done(self, pending, committed):
+        with self.lock:
+            table = self._flushed if committed else self._pending
+            for kind, hist in pending.items():
+                table.setdefault(kind, LatencyHistogram()).merge(hist)
+
+
+def _decode(blob, layouts):
+    """Output / input dict from a stored value blob; ``layouts`` maps
+    layout id → names for packed blobs."""
+    if blob[:1] == _PACKED:
+        (layout,) = struct.unpack_from("<I", blob, 1)
+        names = layouts[layout]
+        return dict(zip(names, struct.unpack_from(f"<{len(names)}d",
+                                                  blob, 5)))
+    return json.loads(blob[1:])
+
+
+def iter_entries(path, signature=None):
+    """Stream ``(signature, inputs, outputs)`` for every entry in a
+    cache file — e.g. to scatter-plot metrics against component values
+    after a sweep. Reads rows in batches on its own connection, so
+    it's safe alongside a live ``CachedBackend`` and doesn't load the
+    file into memory.
+
+    Args:
+        path: sqlite cache file.
+        signature: Only this signature's entries; default all.
+    """
+    db = sqlite3.connect(str(path))
+    try:
+        tables = {t for (t,) in db.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'")}
+        if "entries" not in tables:
+            if "cache" not in tables:
+                return
+            # Not opened by a CachedBackend since the binary layout.
+            where, args = (("WHERE signature=?", (signature,))
+                           if signature is not None else ("", ()))
+            cur = db.execute(
+                f"SELECT signature, key, value FROM cache {where}", args)
+            for sig, key, value in cur:
+                yield sig, dict(json.loads(key)), json.loads(value)
+            return
+        layouts = {i: tuple(json.loads(names)) for i, names in
+                   db.execute("SELECT id, names FROM layouts")}
+        signatures = dict(db.execute("SELECT id, signature FROM signatures"))
+        where, args = "", ()
+        if signature is not None:
+            sid = next((i for i, s in signatures.items() if s == signature),
+                       None)
+            if sid is None:
+                return
+            where, args = "WHERE sig=?", (sid,)
+        cur = db.execute(
+            f"SELECT sig, params, value FROM entries {where}", args)
+        while True:
+            rows = cur.fetchmany(5000)
+            if not rows:
+                break
+            for sid, params, value in rows:
+                yield (signatures[sid],
+                       _decode(params, layouts) if params is not None
+                       else None,
+                       _decode(value, layouts))
+    finally:
+        db.close()
 
 
 def _signature_from(wrapped):
@@ -31,6 +534,713 @@ def _signature_from(wrapped):
     return type(wrapped).__qualname__
 
 
+def _has_table(db, name):
+    return db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+        (name,)).fetchone() is not None
+
+
+def _has_column(db, table, column, schema="main"):
+    return any(row[1] == column for row in
+               db.execute(f"PRAGMA {schema}.table_info({table})"))
+
+
+def _add_status_columns(db):
+    """Give an ``entries`` table from before statuses were recorded
+    its ``status`` / ``attempts`` / ``retry_at`` columns, tagging
+    entries with NaN outputs ``nan``. (A timeout then looked the same
+    as any all-NaN result, so none are tagged ``timeout``.)"""
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        if not _has_column(db, "entries", "status"):
+            db.execute("ALTER TABLE entries ADD COLUMN "
+                       "status INTEGER NOT NULL DEFAULT 0")
+            db.execute("ALTER TABLE entries ADD COLUMN "
+                       "attempts INTEGER NOT NULL DEFAULT 0")
+            db.execute("ALTER TABLE entries ADD COLUMN retry_at REAL")
+            layouts = {i: tuple(json.loads(names)) for i, names in
+                       db.execute("SELECT id, names FROM layouts")}
+            cur = db.execute("SELECT rowid, value FROM entries")
+            while True:
+                rows = cur.fetchmany(5000)
+                if not rows:
+                    break
+                db.executemany(
+                    "UPDATE entries SET status=? WHERE rowid=?",
+                    [(_NAN, rowid) for rowid, value in rows
+                     if _status_of(_decode(value, layouts)) == _NAN])
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+
+
+def _create_schema(db, journal_mode="wal"):
+    """Create the cache tables on connection ``db`` if missing. WAL for
+    a live cache; a standalone export file uses the single-file
+    ``"delete"`` journal."""
+    if db.execute("PRAGMA journal_mode").fetchone()[0] == journal_mode \
+            and _has_table(db, "stats") \
+            and _has_column(db, "entries", "status"):
+        return          # set up already: opening takes no write lock
+    # Only takes effect on a new file; lets enforcement hand freed
+    # pages back with ``incremental_vacuum``.
+    db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    db.execute(f"PRAGMA journal_mode={journal_mode}")
+    db.executescript(
+        "CREATE TABLE IF NOT EXISTS signatures "
+        "(id INTEGER PRIMARY KEY, signature TEXT UNIQUE NOT NULL);"
+        "CREATE TABLE IF NOT EXISTS layouts "
+        "(id INTEGER PRIMARY KEY, names TEXT UNIQUE NOT NULL);"
+        "CREATE TABLE IF NOT EXISTS entries "
+        "(sig INTEGER NOT NULL, key BLOB NOT NULL, "
+        "value BLOB NOT NULL, params BLOB, atime REAL, "
+        "status INTEGER NOT NULL DEFAULT 0, "
+        "attempts INTEGER NOT NULL DEFAULT 0, retry_at REAL, "
+        "PRIMARY KEY (sig, key));"
+        "CREATE INDEX IF NOT EXISTS entries_atime "
+        "ON entries (sig, atime);"
+        "CREATE TABLE IF NOT EXISTS stats "
+        "(sig INTEGER NOT NULL, kind TEXT NOT NULL, seconds REAL, "
+        "histogram BLOB, PRIMARY KEY (sig, kind));"
+    )
+    db.commit()
+    if not _has_column(db, "entries", "status"):
+        _add_status_columns(db)
+
+
+def _contended(exc):
+    """Whether an sqlite error means another connection holds the lock
+    (as opposed to a real failure)."""
+    text = str(exc).lower()
+    return "locked" in text or "busy" in text
+
+
+def _retry(fn, timeout):
+    """``fn()``, retried with jittered exponential backoff while the
+    file is locked by another connection, for up to ``timeout``
+    seconds. sqlite's own busy handler already waits on most locks;
+    this also covers those it reports straight away, such as another
+    process running WAL recovery or switching the journal mode as it
+    creates the file."""
+    deadline = time.monotonic() + timeout
+    delay = 0.001
+    while True:
+        try:
+            return fn()
+        except sqlite3.OperationalError as exc:
+            if not _contended(exc) or time.monotonic() >= deadline:
+                raise
+        time.sleep(delay * (0.5 + random.random()))
+        delay = min(delay * 2, 0.25)
+
+
+# Guards reopening a forked store; replaced in each child so a lock
+# held by some other thread at fork time can't deadlock it.
+_reopen_lock = threading.Lock()
+
+
+def _reset_reopen_lock():
+    global _reopen_lock
+    _reopen_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_reopen_lock)
+
+
+def _close_ref(ref):
+    store = ref()
+    if store is not None:
+        store.close()
+
+
+class _Store:
+    """sqlite side of a persistent ``CachedBackend``.
+
+    One writer connection in WAL journal mode plus one read connection
+    per thread, so lookups neither queue behind each other nor behind
+    a commit. New entries go into a write-behind queue that a
+    background thread flushes in a single transaction every
+    ``flush_interval`` seconds, or as soon as ``flush_every`` entries
+    are pending. Queued and in-flight entries stay visible to ``get``
+    until they are committed. Reads are recorded too and written back
+    as access times with the next flush, as are the backend's latency
+    numbers (``stats``) into the ``stats`` table's running totals; with
+    ``limits``, the same thread enforces them every ``limits.interval``
+    seconds.
+
+    Several processes may share the file. Connections belong to the
+    process that opened them: a store used after ``fork`` drops its
+    inherited connections and queue (the parent still owns those) and
+    reopens. Every connection waits up to ``timeout`` seconds on
+    another process's lock, and write transactions take the lock up
+    front (``BEGIN IMMEDIATE``) and are retried whole on contention,
+    so a commit never fails half-way through a batch.
+
+    Layout: ``entries`` rows hold an interned signature id, the 16-byte
+    ``_key`` digest, and the output and input dicts as value blobs —
+    packed float64s behind an interned ``layouts`` id (the names, in
+    order), or tagged JSON when they aren't all floats. The inputs are
+    never needed for a lookup; they're kept so ``iter_entries`` can
+    hand back what was simulated. Files written with the older
+    all-JSON ``cache`` table are converted on open.
+    """
+
+    def __init__(self, path, flush_every, flush_interval, limits=None,
+                 timeout=30.0, stats=None):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.limits = limits
+        self.timeout = timeout
+        # The backend's latency numbers, added to the file's running
+        # totals in ``stats`` with each flush.
+        self.stats = (stats if stats is not None
+                      else _StatsBuffer(None, threading.Lock()))
+        self._open()
+
+    def _open(self):
+        """Connections, queues and flusher thread — everything a
+        process needs its own copy of."""
+        self._pid = os.getpid()
+        self._lock = threading.Lock()        # queues / readers / interning
+        self._flush_lock = threading.Lock()  # one writer at a time
+        self._pending = {}
+        self._flushing = {}
+        self._touched = set()
+        self._sig_ids = {}
+        self._layout_ids = {}
+        self._layout_names = {}
+        self._local = threading.local()
+        self._readers = []
+        self._closed = False
+        self._db = self._connect()
+        _retry(lambda: _create_schema(self._db), self.timeout)
+        if _retry(lambda: _has_table(self._db, "cache"), self.timeout) \
+                and self._write(self._migrate_json_layout):
+            try:
+                self._db.execute("VACUUM")  # reclaim the JSON pages now
+            except sqlite3.OperationalError:
+                pass                        # another connection has it open
+        self._wake = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop,
+                                         name="CachedBackend-flush",
+                                         daemon=True)
+        self._flusher.start()
+        if multiprocessing.parent_process() is not None:
+            # Pool workers leave through os._exit, which skips the
+            # backend's weakref.finalize; multiprocessing's own exit
+            # hooks still run.
+            multiprocessing.util.Finalize(None, _close_ref,
+                                          args=(weakref.ref(self),),
+                                          exitpriority=0)
+
+    def _connect(self):
+        # check_same_thread=False only so close() can close every
+        # thread's reader; each connection is still used by one thread.
+        return sqlite3.connect(str(self.path), timeout=self.timeout,
+                               check_same_thread=False)
+
+    def _reader(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._connect()
+            self._local.db = db
+            with self._lock:
+                self._readers.append(db)
+        return db
+
+    def _check_process(self):
+        """Reopen if this store was inherited across a ``fork``: sqlite
+        connections, locks and the flusher thread don't survive into a
+        child."""
+        if self._pid != os.getpid() and not self._closed:
+            with _reopen_lock:
+                if self._pid != os.getpid():
+                    self._open()
+
+    def _write(self, body):
+        """``body()`` in one ``BEGIN IMMEDIATE`` transaction on the
+        writer connection, committed — the whole transaction retried
+        while another process holds the write lock. Caller holds
+        ``_flush_lock`` (or is still in ``_open``)."""
+        def attempt():
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                result = body()
+                db.commit()
+            except BaseException:
+                db.rollback()
+                # Ids interned inside the rolled-back transaction may
+                # not exist, or may be handed to another process's
+                # rows.
+                with self._lock:
+                    self._sig_ids.clear()
+                    self._layout_ids.clear()
+                    self._layout_names.clear()
+                raise
+            return result
+        return _retry(attempt, self.timeout)
+
+    def _migrate_json_layout(self):
+        """Convert a legacy ``cache (signature, key, value[, atime])``
+        table of JSON text into ``entries``, then drop it. Returns
+        whether there still was one under the lock."""
+        db = self._db
+        if not _has_table(db, "cache"):
+            return False
+        columns = {row[1] for row in db.execute("PRAGMA table_info(cache)")}
+        atime = "atime" if "atime" in columns else "NULL"
+        now = time.time()
+        cur = db.execute(f"SELECT signature, key, value, {atime} FROM cache")
+        while True:
+            rows = cur.fetchmany(5000)
+            if not rows:
+                break
+            # INSERT OR IGNORE: an entry already in the new layout is
+            # at least as fresh as its legacy copy.
+            db.executemany(
+                "INSERT OR IGNORE INTO entries "
+                "(sig, key, value, params, atime, status) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(self._intern_signature(sig), _key(params),
+                  self._encode(value), self._encode(params),
+                  t if t is not None else now, _status_of(value))
+                 for sig, params, value, t in
+                 ((sig, dict(json.loads(key)), json.loads(value), t)
+                  for sig, key, value, t in rows)],
+            )
+        db.execute("DROP TABLE cache")
+        return True
+
+    def _intern_signature(self, signature):
+        """Signature id, created if new. Inside ``_write`` only."""
+        sid = self._sig_ids.get(signature)
+        if sid is None:
+            self._db.execute("INSERT OR IGNORE INTO signatures (signature) "
+                             "VALUES (?)", (signature,))
+            sid = self._db.execute("SELECT id FROM signatures "
+                                   "WHERE signature=?",
+                                   (signature,)).fetchone()[0]
+            with self._lock:
+                self._sig_ids[signature] = sid
+        return sid
+
+    def _signature_id(self, signature, db):
+        """Signature id, or ``None`` if nothing was ever stored under
+        it."""
+        with self._lock:
+            sid = self._sig_ids.get(signature)
+        if sid is None:
+            row = _retry(lambda: db.execute(
+                "SELECT id FROM signatures WHERE signature=?",
+                (signature,)).fetchone(), self.timeout)
+            if row is not None:
+                sid = row[0]
+                with self._lock:
+                    self._sig_ids[signature] = sid
+        return sid
+
+    def _encode(self, value):
+        """Value blob for an output dict. Inside ``_write`` only."""
+        if _packable(value):
+            names = tuple(value)
+            layout = self._layout_ids.get(names)
+            if layout is None:
+                text = json.dumps(names)
+                self._db.execute("INSERT OR IGNORE INTO layouts (names) "
+                                 "VALUES (?)", (text,))
+                layout = self._db.execute("SELECT id FROM layouts "
+                                          "WHERE names=?",
+                                          (text,)).fetchone()[0]
+                with self._lock:
+                    self._layout_ids[names] = layout
+                    self._layout_names[layout] = names
+            return (_PACKED + struct.pack("<I", layout)
+                    + struct.pack(f"<{len(names)}d", *value.values()))
+        return _JSON + json.dumps(value).encode()
+
+    def _decode(self, blob, db):
+        if blob[:1] == _PACKED:
+            (layout,) = struct.unpack_from("<I", blob, 1)
+            with self._lock:
+                names = self._layout_names.get(layout)
+            if names is None:
+                names = tuple(json.loads(db.execute(
+                    "SELECT names FROM layouts WHERE id=?",
+                    (layout,)).fetchone()[0]))
+                with self._lock:
+                    self._layout_names[layout] = names
+            return _decode(blob, {layout: names})
+        return _decode(blob, None)
+
+    def _value(self, row, db):
+        """Output dict for a ``(value, status, attempts, retry_at)``
+        row — a ``TimedOut`` carrying its retry state for a
+        timeout."""
+        value = self._decode(row[0], db)
+        if row[1] == _TIMEOUT:
+            value = TimedOut(value)
+            value.attempts, value.retry_at = row[2], row[3]
+        return value
+
+    def _queued(self, signature, key):
+        """Output dict waiting in the write-behind queue, or ``None``.
+        Caller holds ``_lock``."""
+        entry = self._pending.get((signature, key))
+        if entry is None:
+            entry = self._flushing.get((signature, key))
+        return None if entry is None else entry[1]
+
+    def _check_open(self):
+        if self._closed:
+            raise sqlite3.ProgrammingError(
+                "Cannot operate on a closed cache.")
+
+    def get(self, signature, key):
+        """Stored output dict for ``(signature, key)``, or ``None``."""
+        self._check_process()
+        with self._lock:
+            self._check_open()
+            value = self._queued(signature, key)
+        if value is not None:
+            return value
+        db = self._reader()
+        sid = self._signature_id(signature, db)
+        if sid is None:
+            return None
+        row = _retry(lambda: db.execute(
+            "SELECT value, status, attempts, retry_at FROM entries "
+            "WHERE sig=? AND key=?", (sid, key)).fetchone(), self.timeout)
+        if row is None:
+            return None
+        self.touch(signature, (key,))
+        return self._value(row, db)
+
+    def get_many(self, signature, keys):
+        """``{key: output dict}`` for the stored subset of ``keys``, in
+        a few set-based queries."""
+        self._check_process()
+        found = {}
+        with self._lock:
+            self._check_open()
+            for key in keys:
+                value = self._queued(signature, key)
+                if value is not None:
+                    found[key] = value
+        rest = [k for k in keys if k not in found]
+        db = self._reader()
+        sid = self._signature_id(signature, db) if rest else None
+        if sid is None:
+            return found
+        stored = {}
+        for a in range(0, len(rest), _SQL_BATCH):
+            part = rest[a:a + _SQL_BATCH]
+            stored.update((row[0], row[1:]) for row in _retry(
+                lambda: db.execute(
+                    "SELECT key, value, status, attempts, retry_at "
+                    "FROM entries WHERE sig=? AND key IN "
+                    f"({','.join('?' * len(part))})",
+                    (sid, *part),
+                ).fetchall(), self.timeout))
+        self.touch(signature, stored)
+        for key, row in stored.items():
+            found[key] = self._value(row, db)
+        return found
+
+    def touch(self, signature, keys):
+        """Record reads of ``keys``; their access times are written
+        with the next flush."""
+        self._check_process()
+        with self._lock:
+            self._touched.update((signature, k) for k in keys)
+
+    def put(self, signature, key, value, params):
+        """Queue output dict ``value`` of inputs ``params`` for the
+        next flush. NumPy scalars are stored as Python numbers; a value
+        that still can't be encoded raises ``TypeError`` here, on the
+        caller's thread, rather than in the flusher. Returns ``value``
+        as it will be stored."""
+        self._check_process()
+        value, params = _plain(value), _plain(params)
+        for item in (value, params):
+            if not _packable(item):
+                try:
+                    json.dumps(item)
+                except (TypeError, ValueError) as exc:
+                    raise TypeError(
+                        f"can't cache {item!r}: values must be floats "
+                        f"or JSON-encodable ({exc})") from None
+        with self._lock:
+            self._check_open()
+            self._pending[(signature, key)] = (params, value)
+            full = len(self._pending) >= self.flush_every
+        if full:
+            self._wake.set()
+        return value
+
+    def flush(self):
+        """Commit every queued entry, and the access times of entries
+        read since the last flush, plus the latency statistics
+        recorded since, in one transaction."""
+        self._check_process()
+        stats = self.stats.drain()
+        try:
+            self._flush(stats)
+        except BaseException:
+            self.stats.done(stats, committed=False)
+            raise
+        self.stats.done(stats, committed=True)
+
+    def _flush(self, stats):
+        # Outside the backend's lock, which ``clear()`` holds while
+        # waiting on ``_flush_lock``.
+        with self._flush_lock:
+            with self._lock:
+                if self._db is None or not (self._pending or self._touched
+                                            or stats):
+                    return
+                self._flushing, self._pending = self._pending, {}
+                touched, self._touched = self._touched, set()
+
+            def write():
+                now = time.time()
+                rows = []
+                for (sig, key), (params, value) in self._flushing.items():
+                    try:
+                        rows.append((
+                            self._intern_signature(sig), key,
+                            self._encode(value), self._encode(params), now,
+                            _status_of(value), getattr(value, "attempts", 0),
+                            getattr(value, "retry_at", None)))
+                    except (TypeError, ValueError, OverflowError,
+                            struct.error) as exc:
+                        # ``put`` checks values, so only one changed
+                        # since can get here; dropping it beats
+                        # blocking the rest of the queue behind it.
+                        warnings.warn(f"cache entry not written: {exc}",
+                                      RuntimeWarning)
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO entries "
+                    "(sig, key, value, params, atime, status, attempts, "
+                    "retry_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                self._db.executemany(
+                    "UPDATE entries SET atime=? WHERE sig=? AND key=?",
+                    [(now, self._intern_signature(sig), key)
+                     for sig, key in touched],
+                )
+                self._add_stats(stats)
+
+            try:
+                self._write(write)
+            except BaseException:
+                # Back onto the queue for the next flush; entries put
+                # since take precedence.
+                with self._lock:
+                    self._pending = {**self._flushing, **self._pending}
+                    self._flushing = {}
+                    self._touched |= touched
+                raise
+            with self._lock:
+                self._flushing = {}
+
+    def _add_stats(self, stats):
+        """Add ``{kind: LatencyHistogram}`` to the file's running
+        totals for the backend's signature. Inside ``_write`` only."""
+        if stats:
+            sid = self._intern_signature(self.stats.signature)
+        for kind, hist in stats.items():
+            row = self._db.execute(
+                "SELECT seconds, histogram FROM stats "
+                "WHERE sig=? AND kind=?", (sid, kind)).fetchone()
+            total = LatencyHistogram(list(hist.counts), hist.seconds)
+            if row is not None:
+                total.merge(LatencyHistogram._unpack(row[1], row[0]))
+            self._db.execute(
+                "INSERT OR REPLACE INTO stats "
+                "(sig, kind, seconds, histogram) VALUES (?, ?, ?, ?)",
+                (sid, kind, total.seconds, total._pack()))
+
+    def _flush_loop(self):
+        next_check = time.monotonic()
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._closed:
+                break
+            try:
+                self.flush()
+                if self.limits is not None \
+                        and time.monotonic() >= next_check:
+                    self.enforce_limits()
+                    next_check = time.monotonic() + self.limits.interval
+            except sqlite3.OperationalError as exc:
+                if not _contended(exc):
+                    warnings.warn(f"cache flush failed: {exc}",
+                                  RuntimeWarning)
+                # Locked for longer than ``timeout`` (or failed): the
+                # batch is back on the queue for the next tick, and a
+                # persistent error surfaces from ``close()``.
+            except Exception as exc:        # keep the flusher alive
+                warnings.warn(f"cache flush failed: {exc!r}",
+                              RuntimeWarning)
+
+    def enforce_limits(self):
+        """Evict entries beyond ``limits``, least recently used first;
+        returns how many were evicted."""
+        limits = self.limits
+        if limits is None:
+            return 0
+        self.flush()
+        with self._flush_lock:
+            db = self._db
+            if db is None:
+                return 0
+
+            def evict():
+                evicted = 0
+                if limits.max_age is not None:
+                    evicted += db.execute(
+                        "DELETE FROM entries WHERE atime < ?",
+                        (time.time() - limits.max_age,),
+                    ).rowcount
+                if limits.max_rows is not None \
+                        or limits.max_bytes is not None:
+                    scopes = ([sid for (sid,) in db.execute(
+                                  "SELECT DISTINCT sig FROM entries")]
+                              if limits.per_signature else [None])
+                    for sid in scopes:
+                        evicted += self._trim(db, sid, limits)
+                return evicted
+
+            evicted = self._write(evict)
+            if evicted:
+                _retry(lambda: db.execute("PRAGMA incremental_vacuum")
+                       .fetchall(), self.timeout)
+        return evicted
+
+    @staticmethod
+    def _trim(db, sid, limits):
+        """Delete the least recently used rows of signature id ``sid``
+        (the whole file if ``None``) until it is within ``max_rows`` /
+        ``max_bytes``."""
+        where, args = (("WHERE sig=?", (sid,)) if sid is not None
+                       else ("", ()))
+        n, size = db.execute(
+            f"SELECT COUNT(*), COALESCE(SUM({_ROW_BYTES}), 0) "
+            f"FROM entries {where}", args,
+        ).fetchone()
+        excess_rows = (max(0, n - limits.max_rows)
+                       if limits.max_rows is not None else 0)
+        excess_bytes = (max(0, size - limits.max_bytes)
+                        if limits.max_bytes is not None else 0)
+        if not (excess_rows or excess_bytes):
+            return 0
+        victims, freed = [], 0
+        cur = db.execute(
+            f"SELECT rowid, {_ROW_BYTES} FROM entries {where} "
+            "ORDER BY atime", args,
+        )
+        for rowid, nbytes in cur:
+            if len(victims) >= excess_rows and freed >= excess_bytes:
+                break
+            victims.append(rowid)
+            freed += nbytes
+        cur.close()
+        for a in range(0, len(victims), _SQL_BATCH):
+            part = victims[a:a + _SQL_BATCH]
+            db.execute(f"DELETE FROM entries WHERE rowid IN "
+                       f"({','.join('?' * len(part))})", part)
+        return len(victims)
+
+    def delete_signature(self, signature):
+        self._check_process()
+        with self._flush_lock:
+            with self._lock:
+                self._pending = {k: v for k, v in self._pending.items()
+                                 if k[0] != signature}
+                self._touched = {k for k in self._touched
+                                 if k[0] != signature}
+            sid = self._signature_id(signature, self._db)
+            if sid is not None:
+                self._write(lambda: self._db.execute(
+                    "DELETE FROM entries WHERE sig=?", (sid,)))
+
+    def purge(self, signature, statuses):
+        """Delete ``signature``'s entries with a status in
+        ``statuses`` (``_OK`` / ``_NAN`` / ``_TIMEOUT``), queued ones
+        included; returns how many were on disk."""
+        self._check_process()
+        with self._flush_lock:
+            with self._lock:
+                self._pending = {
+                    k: v for k, v in self._pending.items()
+                    if k[0] != signature or _status_of(v[1]) not in statuses}
+            sid = self._signature_id(signature, self._db)
+            if sid is None:
+                return 0
+            return self._write(lambda: self._db.execute(
+                f"DELETE FROM entries WHERE sig=? AND status IN "
+                f"({','.join('?' * len(statuses))})",
+                (sid, *statuses)).rowcount)
+
+    def close(self):
+        """Stop the flusher, commit what's queued and close every
+        connection. Idempotent."""
+        if self._pid != os.getpid():
+            # Inherited across fork and never used here: the
+            # connections and queue are the parent's to close.
+            self._closed = True
+            return
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wake.set()
+        if self._flusher is not threading.current_thread():
+            self._flusher.join()
+        self.flush()
+        with self._flush_lock:
+            self._db.close()
+            self._db = None
+        with self._lock:
+            readers, self._readers = self._readers, []
+        for db in readers:
+            db.close()
+
+
+# Backends unpickled in this process, by ``(pid, token)``: a pool
+# worker that receives the same backend with every task rebuilds it
+# once, so it keeps one store, one flusher and one memory tier.
+_restored = {}
+_restored_lock = threading.Lock()
+
+
+def _reset_restored_lock():
+    global _restored_lock
+    _restored_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_restored_lock)
+
+
+def _restore(token, config):
+    """This process's copy of the pickled backend ``token`` — rebuilt
+    from ``config`` the first time, or if that copy was closed."""
+    key = (os.getpid(), token)
+    with _restored_lock:
+        backend = _restored.get(key)
+        if backend is None or (backend._store is not None
+                               and backend._store._closed):
+            backend = CachedBackend(**config)
+            backend._token = token
+            _restored[key] = backend
+    return backend
+
+
 class CachedBackend:
     """Memoizing wrapper around any metrics callable.
 
@@ -41,7 +1251,7 @@ class CachedBackend:
             path="cache.sqlite",
         )
         report = analyze(metrics=cached, ..., workers=14)
-        print(cached.hits, cached.misses)
+        print(cached.hits, cached.misses, cached.deduplicated)
 
     Args:
         wrapped: The metrics callable being memoized — typically
@@ -53,105 +1263,535 @@ class CachedBackend:
             spec on the same MC samples is then near-instant.
         signature: String namespace within the cache file.
             Auto-derived from ``wrapped.signature()`` if available, else
-            the wrapped class name. Override only if you need explicit
+            the wrapped class name (``"netlist"`` with
+            ``key="netlist"``). Override only if you need explicit
             isolation.
+        key: What identifies a call. ``"values"`` (default): the
+            input values, within ``signature``'s namespace.
+            ``"netlist"``: a content hash of the netlist the wrapped
+            backend renders for them (``wrapped.netlist_key(**values)``
+            — ``NgspiceBackend`` and ``RemoteNgspiceBackend`` have it)
+            — normalised, with ``.include``d model files hashed by
+            content. Identical simulations then hit whichever template
+            or process produced them, and editing a callable template
+            or a model file misses as it should. Costs a render and a
+            hash per lookup, ~0.1 ms.
+        flush_every: Persistent caches write behind: new entries are
+            queued and committed in one transaction once this many are
+            pending. Default 256.
+        flush_interval: ...or after this many seconds, whichever comes
+            first. Default 1.0.
+        memory_entries: Capacity of the in-memory tier, least recently
+            used evicted first. Default 100 000 entries; ``None`` is
+            unbounded. Entries evicted from a persistent cache are
+            still on disk.
+        disk_limits: ``DiskLimits`` for the sqlite file — row, byte and
+            age limits, per signature by default. ``None`` (default)
+            keeps every entry.
+        timeout: Seconds to keep retrying while another process holds
+            the sqlite file's lock before raising
+            ``sqlite3.OperationalError``. Default 30.
+        retry: ``RetryPolicy`` for simulations that timed out. Default
+            ``RetryPolicy()``: re-run on the next lookup with twice
+            the timeout, up to three runs. ``None`` keeps a timeout
+            like any other failure.
+
+    Threading: safe to share across threads. The sqlite file is opened
+    in WAL mode; each thread reads through its own connection and a
+    background thread commits queued writes in batches, so neither a
+    lookup nor a miss waits on another thread's fsync. Queued entries
+    are served from the queue until committed. ``close()`` — or
+    garbage collection, or interpreter exit — flushes the queue; only
+    a hard kill loses the last ``flush_interval`` of entries, which
+    are then simply recomputed.
+
+    Processes: safe to share one file between processes — parallel
+    ``overnight_battery.py`` runs from ``battery_driver.sh``, cluster
+    jobs on a shared disk, or ``analyze(executor="process")``. Each
+    process opens its own connections (a backend inherited across
+    ``fork`` reopens on first use), writers queue on sqlite's lock for
+    up to ``timeout`` rather than failing, and a batch that can't get
+    the lock stays queued and is retried whole. A ``CachedBackend``
+    pickles as its configuration, so a process-pool worker gets its
+    own connections and an empty memory tier — built once per worker
+    however many tasks carry the backend; hit and miss counts then
+    stay in the workers. ``analyze`` still resolves cached
+    samples in the parent and only ships the misses. NFS and other
+    network filesystems don't implement the locks WAL relies on — put
+    a shared cache on a local disk.
+
+    Concurrent calls with the same key are single-flighted: the first
+    computes, the others wait for its result (or its exception) rather
+    than running the simulator again — ``parametric_dither``'s base
+    point racing a plain ``analyze`` at the same seed, or a nominal
+    that several ``Linearized`` candidates share. Those waits are
+    counted in ``deduplicated``, separately from ``hits`` and
+    ``misses``. Dedup is per instance: share one ``CachedBackend``
+    between threads rather than one per thread.
 
-    Threading: safe to share across threads. The sqlite connection is
-    created with ``check_same_thread=False`` and writes are serialized
-    by a single Lock. There is **no in-flight deduplication** — two
-    concurrent calls with the same key both compute (the second write
-    wins). For our MC use that's harmless and avoids the complexity
-    of a per-key lock; samples in one MC run are nearly all distinct.
+    Instrumentation: every call is timed — memory and disk hit
+    latency, the lookup before a miss, the wrapped backend's run time
+    and time spent waiting on a deduplicated call — into per-kind
+    histograms. ``stats`` has this instance's; a persistent cache also
+    adds them to running totals per signature in the file with each
+    flush, which ``cache_stats(path)`` and ``python -m utils.tolerance
+    cache stats`` report alongside entry counts, bytes stored and the
+    simulator time saved. Timing adds about a microsecond to a hit.
+    ``clear()`` resets ``stats`` but keeps the file's totals — the
+    simulator time was still spent.
 
     Caveats:
 
-    - Cache entries never expire. ``clear()`` is the only way to evict.
-    - Failed simulations (NaN outputs) are cached too. If you suspect
-      transient ngspice flakiness, ``clear()`` and re-run.
+    - Without ``disk_limits``, entries on disk never expire;
+      ``clear()`` is then the only way to evict.
+    - Failed simulations are cached too, tagged by status: ``"nan"``
+      for NaN outputs (a real convergence failure fails the same way
+      next time) and ``"timeout"`` for a run killed at its timeout
+      (``TimedOut``), which ``retry`` re-runs rather than trusting.
+      ``purge()`` drops failed entries and keeps the rest.
     - Float keys are matched bit-exactly. Two ``analyze`` calls with
       the same seed produce the same samples, so this is fine in
       practice; manually-constructed values that differ in the last bit
       will miss the cache.
     """
 
-    def __init__(self, wrapped, *, path=None, signature=None):
+    def __init__(self, wrapped, *, path=None, signature=None,
+                 flush_every=256, flush_interval=1.0,
+                 memory_entries=100_000, disk_limits=None, timeout=30.0,
+                 key="values", retry=RetryPolicy()):
+        if key not in ("values", "netlist"):
+            raise ValueError(
+                f"key must be 'values' or 'netlist', got {key!r}"
+            )
+        if key == "netlist" and not callable(getattr(wrapped, "netlist_key",
+                                                     None)):
+            raise TypeError(
+                f"key='netlist' needs a wrapped backend with "
+                f"netlist_key(**values) (NgspiceBackend, "
+                f"RemoteNgspiceBackend); {type(wrapped).__name__} has none"
+            )
+        if memory_entries is not None and memory_entries < 1:
+            raise ValueError(
+                f"memory_entries must be >= 1 or None, got {memory_entries}"
+            )
+        if disk_limits is not None and not isinstance(disk_limits,
+                                                      DiskLimits):
+            raise TypeError(
+                f"disk_limits must be a DiskLimits, "
+                f"got {type(disk_limits).__name__}"
+            )
+        if flush_every < 1:
+            raise ValueError(f"flush_every must be >= 1, got {flush_every}")
+        if flush_interval <= 0:
+            raise ValueError(
+                f"flush_interval must be > 0, got {flush_interval}"
+            )
+        if timeout < 0:
+            raise ValueError(f"timeout must be >= 0, got {timeout}")
+        if retry is not None and not isinstance(retry, RetryPolicy):
+            raise TypeError(
+                f"retry must be a RetryPolicy or None, "
+                f"got {type(retry).__name__}"
+            )
+        # What a process-pool worker needs to rebuild this backend.
+        self._config = dict(
+            wrapped=wrapped, path=path, signature=signature,
+            flush_every=flush_every, flush_interval=flush_interval,
+            memory_entries=memory_entries, disk_limits=disk_limits,
+            timeout=timeout, key=key, retry=retry,
+        )
         self.wrapped = wrapped
+        self.retry = retry
         self.path = Path(path) if path is not None else None
-        self.signature = signature if signature is not None \
-                         else _signature_from(wrapped)
-        self._mem = {}
+        self.key = key
+        if signature is None:
+            signature = ("netlist" if key == "netlist"
+                         else _signature_from(wrapped))
+        self.signature = signature
+        self.memory_entries = memory_entries
+        self._mem = OrderedDict()
+        self._inflight = {}
         self._lock = threading.Lock()
+        self._pid = os.getpid()
         self.hits = 0
         self.misses = 0
+        self.deduplicated = 0
+        self._stats = _StatsBuffer(signature, self._lock)
         if self.path is not None:
             self.path.parent.mkdir(parents=True, exist_ok=True)
-            self._db = sqlite3.connect(
-                str(self.path), check_same_thread=False
-            )
-            self._db.execute(
-                "CREATE TABLE IF NOT EXISTS cache "
-                "(signature TEXT, key TEXT, value TEXT, "
-                "PRIMARY KEY (signature, key))"
-            )
-            self._db.commit()
+            self._store = _Store(self.path, flush_every, flush_interval,
+                                 disk_limits, timeout, self._stats)
+            # Flushes the queue when the backend is closed, garbage-
+            # collected, or still open at interpreter exit.
+            self._finalizer = weakref.finalize(self, self._store.close)
         else:
-            self._db = None
+            self._store = None
+        # Names this backend's copies in other processes.
+        self._token = uuid.uuid4().hex
+
+    def __reduce__(self):
+        return _restore, (self._token, self._config)
+
+    def _check_process(self):
+        """After a ``fork``, drop the parent's in-flight claims (their
+        leaders don't exist here) and its possibly-held lock."""
+        if self._pid != os.getpid():
+            with _reopen_lock:
+                if self._pid != os.getpid():
+                    self._lock = threading.Lock()
+                    self._inflight = {}
+                    self._stats.reset(self._lock)
+                    self._pid = os.getpid()
+
+    @property
+    def stats(self):
+        """``CacheStats`` for this instance's calls since it was
+        created (or last ``clear()``ed): latency histograms by kind,
+        simulator time spent and an estimate of the time saved. For
+        totals across every run that used the file, see
+        ``cache_stats(path)``."""
+        return CacheStats(self.signature, self._stats.session())
+
+    def _key(self, values):
+        if self.key == "netlist":
+            return hashlib.blake2b(
+                self.wrapped.netlist_key(**values).encode(),
+                digest_size=16).digest()
+        return _key(values)
 
     def __call__(self, **values):
-        key = _key(values)
+        t0 = time.perf_counter()
+        key = self._key(values)
 
+        self._check_process()
         with self._lock:
-            if key in self._mem:
+            value = self._mem.get(key)
+            if type(value) is TimedOut and _due(value):
+                value = None
+            if value is not None:
+                self._mem.move_to_end(key)
                 self.hits += 1
-                return self._mem[key]
+                self._stats.add("memory_hit", time.perf_counter() - t0)
+            else:
+                future = self._inflight.get(key)
+                leader = future is None
+                if leader:
+                    # Claimed before the disk lookup, so a concurrent
+                    # caller can never slip between lookup and compute.
+                    future = self._inflight[key] = Future()
+                else:
+                    self.deduplicated += 1
+        if value is not None:
+            if self._store is not None:
+                self._store.touch(self.signature, (key,))
+            return value
+        if not leader:
+            value = future.result()
+            with self._lock:
+                self._stats.add("wait", time.perf_counter() - t0)
+            return value
 
-        if self._db is not None:
+        try:
+            value = self._compute(key, values, t0)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
             with self._lock:
-                row = self._db.execute(
-                    "SELECT value FROM cache WHERE signature=? AND key=?",
-                    (self.signature, key),
-                ).fetchone()
-            if row is not None:
-                value = json.loads(row[0])
+                del self._inflight[key]
+
+    def _compute(self, key, values, t0):
+        """Disk lookup, else the wrapped call — for the one caller
+        that holds ``key``'s in-flight claim. A timeout due for retry
+        counts as a miss, and is re-run with the timeout grown per
+        ``retry``."""
+        if self._store is not None:
+            prior = self._store.get(self.signature, key)
+            if prior is not None and not _due(prior):
                 with self._lock:
-                    self._mem[key] = value
+                    self._remember(key, prior)
                     self.hits += 1
-                return value
+                    self._stats.add("disk_hit", time.perf_counter() - t0)
+                return prior
+        else:
+            with self._lock:
+                prior = self._mem.get(key)
+        lookup = time.perf_counter() - t0
+        attempts = prior.attempts if isinstance(prior, TimedOut) else 0
+        backend = self.wrapped
+        if attempts and self.retry is not None and hasattr(
+                backend, "with_timeout") and getattr(
+                backend, "timeout", None) is not None:
+            backend = backend.with_timeout(
+                self.retry.timeout(backend.timeout, attempts))
 
         # Miss — compute outside the lock so concurrent misses on
         # different keys don't serialize on the simulator wait.
         with self._lock:
             self.misses += 1
-        result = self.wrapped(**values)
+            if self._store is not None:
+                self._stats.add("disk_miss", lookup)
+        t_sim = time.perf_counter()
+        try:
+            result = backend(**values)
+        finally:
+            elapsed = time.perf_counter() - t_sim
+            with self._lock:
+                self._stats.add("simulate", elapsed)
+        return self._finish(key, values, result, attempts)
+
+    def _finish(self, key, values, result, attempts=0):
+        """Store a fresh result; a ``TimedOut`` is tagged with its run
+        count and, per ``retry``, when to re-run it."""
+        if isinstance(result, TimedOut):
+            result = TimedOut(result)
+            result.attempts = attempts + 1
+            result.retry_at = (None if self.retry is None else
+                               self.retry.retry_at(attempts + 1,
+                                                   time.time()))
+        if self._store is not None:
+            # Raises here for a value that can't be stored.
+            result = self._store.put(self.signature, key, result, values)
         with self._lock:
-            self._mem[key] = result
-            if self._db is not None:
-                self._db.execute(
-                    "INSERT OR REPLACE INTO cache "
-                    "(signature, key, value) VALUES (?, ?, ?)",
-                    (self.signature, key, json.dumps(result)),
-                )
-                self._db.commit()
+            self._remember(key, result)
         return result
 
+    @property
+    def batch_size(self):
+        """The wrapped backend's ``batch_size`` (1 if it has none), so
+        ``analyze`` batches through ``run_many`` as it would
+        unwrapped."""
+        if not callable(getattr(self.wrapped, "run_many", None)):
+            return 1
+        return getattr(self.wrapped, "batch_size", 1)
+
+    def run_many(self, values_list):
+        """As calling once per entry of ``values_list``, but the
+        misses go to the wrapped backend's ``run_many`` together — one
+        simulator run per ``batch_size`` of them for a batching
+        ngspice backend. Single-flighted per key like ``__call__``;
+        timeouts due for a retry are re-run one at a time, with the
+        longer timeout ``retry`` gives them."""
+        run_many = getattr(self.wrapped, "run_many", None)
+        if not callable(run_many):
+            return [self(**values) for values in values_list]
+        t0 = time.perf_counter()
+        keys = [self._key(v) for v in values_list]
+        out = [None] * len(keys)
+        claimed = {}        # key -> (future, indices into values_list)
+        waiting = []
+        hit_keys = []
+
+        self._check_process()
+        with self._lock:
+            for i, key in enumerate(keys):
+                value = self._mem.get(key)
+                if type(value) is TimedOut and _due(value):
+                    value = None
+                if value is not None:
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    self._stats.add("memory_hit", time.perf_counter() - t0)
+                    hit_keys.append(key)
+                    out[i] = value
+                elif key in claimed:
+                    claimed[key][1].append(i)
+                elif key in self._inflight:
+                    self.deduplicated += 1
+                    waiting.append((i, self._inflight[key]))
+                else:
+                    claimed[key] = (Future(), [i])
+                    self._inflight[key] = claimed[key][0]
+        if self._store is not None and hit_keys:
+            self._store.touch(self.signature, hit_keys)
+
+        def settle(key, value):
+            future, indices = claimed[key]
+            for i in indices:
+                out[i] = value
+            future.set_result(value)
+
+        try:
+            stored = {}
+            if self._store is not None and claimed:
+                stored = self._store.get_many(self.signature, list(claimed))
+            batch, retries = [], []
+            lookup = (time.perf_counter() - t0) / max(len(claimed), 1)
+            with self._lock:
+                for key in claimed:
+                    prior = stored.get(key, self._mem.get(key))
+                    if prior is not None and not _due(prior):
+                        self._remember(key, prior)
+                        self.hits += 1
+                        self._stats.add("disk_hit", lookup)
+                        settle(key, prior)
+                    elif isinstance(prior, TimedOut):
+                        retries.append(key)
+                    else:
+                        batch.append(key)
+                self.misses += len(batch)
+                if self._store is not None and batch:
+                    self._stats.add("disk_miss", lookup, len(batch))
+            if batch:
+                t_sim = time.perf_counter()
+                try:
+                    results = run_many([values_list[claimed[key][1][0]]
+                                        for key in batch])
+                finally:
+                    elapsed = time.perf_counter() - t_sim
+                    with self._lock:
+                        self._stats.add("simulate", elapsed / len(batch),
+                                        len(batch))
+                for key, result in zip(batch, results):
+                    settle(key, self._finish(
+                        key, values_list[claimed[key][1][0]], result))
+            for key in retries:
+                settle(key, self._compute(
+                    key, values_list[claimed[key][1][0]], t0))
+        except BaseException as exc:
+            for future, _ in claimed.values():
+                if not future.done():
+                    future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                for key in claimed:
+                    del self._inflight[key]
+
+        for i, future in waiting:
+            out[i] = future.result()
+            with self._lock:
+                self._stats.add("wait", time.perf_counter() - t0)
+        return out
+
+    def lookup_many(self, values_list):
+        """Cached results for a batch of calls at once.
+
+        Resolves every key against memory, then the sqlite file in a
+        few ``IN (...)`` queries rather than one round-trip per call.
+        ``analyze`` calls this automatically on a metrics object that
+        has it and only dispatches the misses.
+
+        Args:
+            values_list: Sequence of ``{name: value}`` dicts, as would
+                be passed to ``__call__`` as keyword arguments.
+
+        Returns:
+            List aligned with ``values_list``: the cached output dict,
+            or ``None`` for a miss. Hits are counted; misses are
+            counted when they are computed.
+        """
+        t0 = time.perf_counter()
+        out = self._resolve(values_list)
+        hits = sum(r is not None for r in out)
+        with self._lock:
+            self.hits += hits
+            if hits:
+                self._stats.add("bulk_hit",
+                                (time.perf_counter() - t0) / len(out), hits)
+        return out
+
+    def prefetch(self, values_list):
+        """Warm the in-memory tier with every stored entry among
+        ``values_list`` so the calls that follow don't touch sqlite.
+        Returns how many of them are cached. Doesn't count hits — the
+        calls that use them will."""
+        return sum(r is not None for r in self._resolve(values_list))
+
+    def _resolve(self, values_list):
+        self._check_process()
+        keys = [self._key(v) for v in values_list]
+        out = [None] * len(keys)
+        missing = {}
+        found = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                value = self._mem.get(key)
+                if value is None or (type(value) is TimedOut
+                                     and _due(value)):
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self._mem.move_to_end(key)
+                    found.append(key)
+                    out[i] = value
+        if self._store is not None:
+            self._store.touch(self.signature, found)
+            if missing:
+                stored = self._store.get_many(self.signature, list(missing))
+                with self._lock:
+                    for key, value in stored.items():
+                        if _due(value):
+                            continue        # the call will retry it
+                        self._remember(key, value)
+                        for i in missing[key]:
+                            out[i] = value
+        return out
+
+    def _remember(self, key, value):
+        """Add to the memory tier, evicting least recently used entries
+        past ``memory_entries``. Caller holds ``_lock``."""
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        if self.memory_entries is not None:
+            while len(self._mem) > self.memory_entries:
+                self._mem.popitem(last=False)
+
+    def enforce_limits(self):
+        """Apply ``disk_limits`` now rather than on the next background
+        pass; returns the number of entries evicted."""
+        if self._store is None:
+            return 0
+        return self._store.enforce_limits()
+
+    def flush(self):
+        """Commit queued writes now rather than at the next
+        ``flush_interval`` tick. No-op for an in-memory cache."""
+        if self._store is not None:
+            self._store.flush()
+
     def clear(self):
         """Drop every cached entry for this signature (in-memory and
         on-disk if persistent). Other signatures in the same cache
         file are untouched."""
         with self._lock:
             self._mem.clear()
-            if self._db is not None:
-                self._db.execute(
-                    "DELETE FROM cache WHERE signature=?",
-                    (self.signature,),
-                )
-                self._db.commit()
+            if self._store is not None:
+                self._store.delete_signature(self.signature)
             self.hits = 0
             self.misses = 0
+            self.deduplicated = 0
+            self._stats.clear_session()
+
+    def purge(self, status=("nan", "timeout")):
+        """Drop this signature's failed entries — in memory and on
+        disk — so the next lookup re-runs them, keeping the good ones.
+
+        Args:
+            status: Which entries go, by status: ``"timeout"`` (runs
+                that hit their timeout), ``"nan"`` (some or all
+                outputs NaN — failed ``.meas``, convergence trouble),
+                ``"ok"``, or a list of them. Default both failures.
+
+        Returns:
+            How many entries were dropped (on disk, for a persistent
+            cache).
+        """
+        codes = _statuses(status)
+        with self._lock:
+            drop = [k for k, v in self._mem.items()
+                    if _status_of(v) in codes]
+            for key in drop:
+                del self._mem[key]
+        if self._store is None:
+            return len(drop)
+        return self._store.purge(self.signature, codes)
 
     def close(self):
-        """Close the sqlite connection. Idempotent. After close, calls
-        to this backend will fail; create a new instance to resume."""
-        if self._db is not None:
-            self._db.close()
-            self._db = None
+        """Flush queued writes and close the sqlite connections.
+        Idempotent. After close, calls to this backend will fail;
+        create a new instance to resume."""
+        if self._store is not None:
+            self._finalizer()
@@ -0,0 +1,514 @@
+"""Move ``CachedBackend`` entries between cache files and hosts.
+
+``NgspiceBackend.signature()`` deliberately ignores the host, so a
+sweep split across HV2, HV3 and a local box produces three cache files
+whose entries are interchangeable. This module moves them around:
+
+- ``export_cache(cache, out, signature=...)`` — copy one signature's
+  (or every) entry into a standalone file for ``scp``;
+- ``merge_caches([a, b, c], out)`` — combine several files into one,
+  reporting entries the hosts disagree on;
+- ``import_cache([a, b], cache)`` — the same into a local, possibly
+  live, cache; other processes keep using it meanwhile.
+
+An export file *is* a cache file — same tables, single-file rollback
+journal instead of WAL — so ``CachedBackend(path=export)`` and
+``iter_entries(export)`` read it directly. Copies run inside sqlite
+(``ATTACH`` plus ``INSERT … SELECT`` over rowid ranges, remapping the
+interned signature and layout ids in SQL), so nothing is loaded into
+Python memory however big the files are, and an import commits in
+batches rather than holding a live cache's write lock throughout.
+
+Entries are keyed by a hash of their inputs, so two files share an
+entry exactly when they simulated the same sample. If their outputs
+differ (a different ngspice build, a flaky run) that's a conflict:
+counted, the first few reported with inputs and both outputs, and
+resolved by ``on_conflict`` — ``"keep"`` the destination's value
+(default), ``"replace"`` it with the incoming one, or keep the
+``"newest"`` by access time. A run that timed out on one host isn't a
+disagreement: any real result replaces it, whatever ``on_conflict``.
+``purge_cache`` drops failed entries from a file.
+
+Each file also keeps running latency statistics per signature (see
+``CachedBackend``); exports carry them and merges and imports add
+them up, so ``cache_stats(merged)`` accounts for every host's runs.
+Importing the same file twice counts its statistics twice — the
+entries themselves are deduplicated, timings can't be.
+
+The same operations from the shell::
+
+    python -m utils.tolerance cache list cache.sqlite
+    python -m utils.tolerance cache stats cache.sqlite
+    python -m utils.tolerance cache purge cache.sqlite --status timeout
+    python -m utils.tolerance cache export cache.sqlite hv2.cache \\
+        --signature 'ngspice:…'
+    python -m utils.tolerance cache merge hv2.cache hv3.cache \\
+        -o sweep.cache
+    python -m utils.tolerance cache import sweep.cache \\
+        --into /tmp/temp_wien.sqlite
+"""
+import json
+import math
+import sqlite3
+import struct
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List
+from urllib.parse import quote
+
+from .cache import (_PACKED, _STATUSES, _TIMEOUT, CacheStats,
+                    LatencyHistogram, _add_status_columns, _Store,
+                    _create_schema, _decode, _has_column, _has_table,
+                    _retry, _statuses)
+
+_ON_CONFLICT = ("keep", "replace", "newest")
+
+# Source rowids per transaction.
+_ROWID_BATCH = 50_000
+
+
+@dataclass
+class CacheConflict:
+    """One entry two cache files disagree on."""
+    signature: str
+    inputs: dict
+    ours: dict
+    theirs: dict
+    source: str
+
+
+@dataclass
+class MergeReport:
+    """What an ``import_cache`` / ``merge_caches`` did.
+
+    Attributes:
+        entries: Entries read from the sources.
+        added: Entries the destination didn't have.
+        identical: Entries it already had with the same outputs.
+        conflicts: Entries it had with different outputs; resolved by
+            ``on_conflict``.
+        examples: The first ``max_conflicts`` of those, with inputs
+            and both outputs.
+        on_conflict: The policy applied.
+    """
+    entries: int = 0
+    added: int = 0
+    identical: int = 0
+    conflicts: int = 0
+    examples: List[CacheConflict] = field(default_factory=list)
+    on_conflict: str = "keep"
+
+    def __str__(self):
+        lines = [f"{self.entries} entries read: {self.added} added, "
+                 f"{self.identical} already present, "
+                 f"{self.conflicts} conflicting "
+                 f"(on_conflict={self.on_conflict!r})"]
+        for c in self.examples:
+            lines.append(f"  {c.source}: {c.signature} {c.inputs}")
+            lines.append(f"    ours   {c.ours}")
+            lines.append(f"    theirs {c.theirs}")
+        if self.conflicts > len(self.examples):
+            lines.append(f"  ... {self.conflicts - len(self.examples)} "
+                         f"more")
+        return "\n".join(lines)
+
+
+def _same(a, b):
+    """Output dicts equal, NaN matching NaN."""
+    if a.keys() != b.keys():
+        return False
+    for k, x in a.items():
+        y = b[k]
+        if x != y and not (isinstance(x, float) and isinstance(y, float)
+                           and math.isnan(x) and math.isnan(y)):
+            return False
+    return True
+
+
+def _connect(path, timeout):
+    return sqlite3.connect(str(path), timeout=timeout, uri=True)
+
+
+def _intern(db, table, column, text):
+    db.execute(f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)",
+               (text,))
+    return db.execute(f"SELECT id FROM {table} WHERE {column}=?",
+                      (text,)).fetchone()[0]
+
+
+def _layouts(db):
+    return {i: tuple(json.loads(names)) for i, names in
+            db.execute("SELECT id, names FROM main.layouts")}
+
+
+def _attach(db, source):
+    """Attach cache file ``source`` read-only as schema ``src``.
+
+    A legacy JSON-layout file, or one from before entry statuses, is
+    converted in a temporary copy, which is attached instead: the
+    source itself is never written. Returns that copy's
+    ``TemporaryDirectory`` for the caller to clean up after detaching,
+    or ``None``."""
+    source = Path(source)
+    if not source.exists():
+        raise FileNotFoundError(f"no cache file at {source}")
+    check = sqlite3.connect(f"file:{quote(str(source.resolve()))}?mode=ro",
+                            uri=True)
+    scratch = None
+    try:
+        legacy = _has_table(check, "cache")
+        if legacy or (_has_table(check, "entries") and not
+                      _has_column(check, "entries", "status")):
+            scratch = tempfile.TemporaryDirectory(prefix="cache_tool-")
+            source = Path(scratch.name) / source.name
+            copy = sqlite3.connect(str(source))
+            try:
+                check.backup(copy)
+                if not legacy:
+                    _add_status_columns(copy)
+            finally:
+                copy.close()
+    finally:
+        check.close()
+    if legacy:
+        _Store(source, 1, 1.0).close()
+    db.execute("ATTACH DATABASE ? AS src",
+               (f"file:{quote(str(source.resolve()))}?mode=ro",))
+    return scratch
+
+
+def _transfer(db, source, signature, on_conflict, report, max_conflicts,
+              timeout):
+    """Copy ``source``'s entries (one signature's, if given) into the
+    cache on ``db``, updating ``report``."""
+    scratch = _attach(db, source)
+    try:
+        if not _has_table_in(db, "src", "entries"):
+            return
+        db.execute("CREATE TEMP TABLE sig_map "
+                   "(src INTEGER PRIMARY KEY, dst INTEGER, signature TEXT)")
+        db.execute("CREATE TEMP TABLE layout_map "
+                   "(src BLOB PRIMARY KEY, dst BLOB)")
+
+        def intern_ids():
+            where, args = (("WHERE signature=?", (signature,))
+                           if signature is not None else ("", ()))
+            for sid, text in db.execute(
+                    f"SELECT id, signature FROM src.signatures {where}",
+                    args).fetchall():
+                db.execute("INSERT INTO temp.sig_map VALUES (?, ?, ?)",
+                           (sid, _intern(db, "signatures", "signature",
+                                         text), text))
+            for lid, names in db.execute(
+                    "SELECT id, names FROM src.layouts").fetchall():
+                db.execute("INSERT INTO temp.layout_map VALUES (?, ?)",
+                           (struct.pack("<I", lid),
+                            struct.pack("<I", _intern(db, "layouts",
+                                                      "names", names))))
+
+        _retry(lambda: _immediate(db, intern_ids), timeout)
+        signatures = dict(db.execute("SELECT dst, signature "
+                                     "FROM temp.sig_map"))
+        layouts = _layouts(db)
+        lo, hi = db.execute("SELECT MIN(rowid), MAX(rowid) "
+                            "FROM src.entries").fetchone()
+        if lo is None:
+            return
+        for start in range(lo, hi + 1, _ROWID_BATCH):
+            n, overlap, conflicts = _retry(lambda: _immediate(
+                db, lambda: _copy_batch(
+                    db, start, start + _ROWID_BATCH, on_conflict,
+                    signatures, layouts, str(source))), timeout)
+            report.entries += n
+            report.added += n - overlap
+            report.identical += overlap - len(conflicts)
+            report.conflicts += len(conflicts)
+            report.examples.extend(
+                conflicts[:max_conflicts - len(report.examples)])
+        if _has_table_in(db, "src", "stats"):
+            _retry(lambda: _immediate(db, lambda: _add_stats(db)), timeout)
+    finally:
+        if db.in_transaction:
+            db.rollback()
+        db.execute("DROP TABLE IF EXISTS temp.sig_map")
+        db.execute("DROP TABLE IF EXISTS temp.layout_map")
+        db.execute("DETACH DATABASE src")
+        if scratch is not None:
+            scratch.cleanup()
+
+
+def _has_table_in(db, schema, name):
+    return db.execute(
+        f"SELECT 1 FROM {schema}.sqlite_master WHERE type='table' "
+        "AND name=?", (name,)).fetchone() is not None
+
+
+def _add_stats(db):
+    """Add the attached source's latency statistics, for the mapped
+    signatures, to the destination's."""
+    rows = db.execute(
+        "SELECT m.dst, s.kind, s.seconds, s.histogram, d.seconds, "
+        "d.histogram FROM src.stats s JOIN temp.sig_map m ON s.sig = m.src "
+        "LEFT JOIN main.stats d ON d.sig = m.dst AND d.kind = s.kind"
+    ).fetchall()
+    for sid, kind, seconds, blob, d_seconds, d_blob in rows:
+        total = LatencyHistogram._unpack(blob, seconds)
+        if d_blob is not None:
+            total.merge(LatencyHistogram._unpack(d_blob, d_seconds))
+        db.execute("INSERT OR REPLACE INTO main.stats "
+                   "(sig, kind, seconds, histogram) VALUES (?, ?, ?, ?)",
+                   (sid, kind, total.seconds, total._pack()))
+
+
+def _immediate(db, body):
+    """``body()`` in a committed ``BEGIN IMMEDIATE`` transaction."""
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        result = body()
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    return result
+
+
+def _remap(column):
+    """SQL rewriting a value blob's layout id from the source file's to
+    the destination's."""
+    return (f"CASE WHEN substr({column}, 1, 1) = x'{_PACKED.hex()}' "
+            f"THEN CAST(x'{_PACKED.hex()}' || (SELECT dst FROM "
+            f"temp.layout_map WHERE src = substr({column}, 2, 4)) || "
+            f"substr({column}, 6) AS BLOB) ELSE {column} END")
+
+
+def _copy_batch(db, start, stop, on_conflict, signatures, layouts, source):
+    """Copy source rowids ``[start, stop)``; returns ``(entries read,
+    entries already present, [CacheConflict])``. Conflicts are kept
+    in full — at most one batch's worth."""
+    incoming = (
+        f"SELECT m.dst AS sig, e.key AS key, {_remap('e.value')} AS value, "
+        f"{_remap('e.params')} AS params, e.atime AS atime, "
+        "e.status AS status, e.attempts AS attempts, "
+        "e.retry_at AS retry_at "
+        "FROM src.entries e JOIN temp.sig_map m ON e.sig = m.src "
+        "WHERE e.rowid >= ? AND e.rowid < ?"
+    )
+    args = (start, stop)
+    n, overlap = db.execute(
+        f"SELECT COUNT(*), COUNT(d.key) FROM ({incoming}) i "
+        "LEFT JOIN main.entries d ON d.sig = i.sig AND d.key = i.key",
+        args).fetchone()
+    conflicts = []
+    cur = db.execute(
+        f"SELECT i.sig, i.params, d.value, i.value FROM ({incoming}) i "
+        "JOIN main.entries d ON d.sig = i.sig AND d.key = i.key "
+        f"WHERE d.value != i.value AND d.status != {_TIMEOUT} "
+        f"AND i.status != {_TIMEOUT}", args)
+    try:
+        for sid, params, ours, theirs in cur:
+            ours, theirs = _decode(ours, layouts), _decode(theirs, layouts)
+            if _same(ours, theirs):
+                continue        # same outputs, different encoding
+            conflicts.append(CacheConflict(
+                signature=signatures[sid],
+                inputs=(_decode(params, layouts) if params is not None
+                        else None),
+                ours=ours, theirs=theirs, source=source,
+            ))
+    finally:
+        cur.close()
+    # A result always replaces a timeout, and a timeout never replaces
+    # a result; otherwise ``on_conflict`` decides.
+    result_over_timeout = (f"(entries.status = {_TIMEOUT} "
+                           f"AND excluded.status != {_TIMEOUT})")
+    not_a_timeout_over_result = (f"(excluded.status != {_TIMEOUT} "
+                                 f"OR entries.status = {_TIMEOUT})")
+    when = {
+        "keep": result_over_timeout,
+        "replace": not_a_timeout_over_result,
+        "newest": (f"{result_over_timeout} OR "
+                   f"({not_a_timeout_over_result} AND excluded.atime > "
+                   "COALESCE(entries.atime, -1e308))"),
+    }[on_conflict]
+    db.execute(
+        "INSERT INTO main.entries (sig, key, value, params, atime, status, "
+        f"attempts, retry_at) {incoming} "
+        "ON CONFLICT (sig, key) DO UPDATE SET value = excluded.value, "
+        "params = excluded.params, atime = excluded.atime, "
+        "status = excluded.status, attempts = excluded.attempts, "
+        f"retry_at = excluded.retry_at WHERE {when}", args)
+    return n, overlap, conflicts
+
+
+def _check_on_conflict(on_conflict):
+    if on_conflict not in _ON_CONFLICT:
+        raise ValueError(f"on_conflict must be one of {_ON_CONFLICT}, "
+                         f"got {on_conflict!r}")
+
+
+def _into(sources, path, journal_mode, signature, on_conflict,
+          max_conflicts, timeout):
+    _check_on_conflict(on_conflict)
+    if isinstance(sources, (str, Path)):
+        sources = [sources]
+    report = MergeReport(on_conflict=on_conflict)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    exists = Path(path).exists()
+    db = _connect(path, timeout)
+    try:
+        if exists and journal_mode == "delete":
+            # Adding to an existing file: leave its journal alone.
+            journal_mode = db.execute("PRAGMA journal_mode").fetchone()[0]
+        _retry(lambda: _create_schema(db, journal_mode), timeout)
+        for source in sources:
+            if Path(source).resolve() == Path(path).resolve():
+                raise ValueError(f"{source} is the destination itself")
+            _transfer(db, source, signature, on_conflict, report,
+                      max_conflicts, timeout)
+    finally:
+        db.close()
+    return report
+
+
+def import_cache(sources, path, *, signature=None, on_conflict="keep",
+                 max_conflicts=20, timeout=30.0):
+    """Copy the entries of one or more cache / export files into the
+    cache at ``path`` (created if missing).
+
+    Safe against a live cache: ``CachedBackend`` instances in other
+    processes keep reading and writing while the import commits in
+    batches. A running backend's memory tier won't see the new
+    entries, but its disk lookups will.
+
+    Args:
+        sources: Cache or export file, or a list of them.
+        path: Destination cache file.
+        signature: Import only this signature's entries.
+        on_conflict: ``"keep"`` (default), ``"replace"`` or
+            ``"newest"`` — see the module docstring.
+        max_conflicts: Conflicts to report in full.
+        timeout: Seconds to wait on another process's lock.
+
+    Returns:
+        ``MergeReport``.
+    """
+    return _into(sources, path, "wal", signature, on_conflict,
+                 max_conflicts, timeout)
+
+
+def merge_caches(sources, out, *, signature=None, on_conflict="keep",
+                 max_conflicts=20, timeout=30.0):
+    """Combine cache / export files into the standalone file ``out``
+    (added to if it exists). Sources are applied in order, so with
+    ``on_conflict="keep"`` the first one to hold an entry wins.
+    Arguments and return as ``import_cache``."""
+    return _into(sources, out, "delete", signature, on_conflict,
+                 max_conflicts, timeout)
+
+
+def export_cache(path, out, *, signature=None, timeout=30.0):
+    """Copy the entries of cache ``path`` — only ``signature``'s, if
+    given — into a new standalone file ``out``; returns how many.
+    Raises ``FileExistsError`` rather than adding to an existing
+    ``out`` (use ``merge_caches`` for that)."""
+    if Path(out).exists():
+        raise FileExistsError(f"{out} exists; merge_caches() adds to an "
+                              f"existing file")
+    if signature is not None and signature not in dict(
+            list_signatures(path)):
+        raise KeyError(f"no entries under signature {signature!r} "
+                       f"in {path}")
+    return _into([path], out, "delete", signature, "keep", 0,
+                 timeout).entries
+
+
+def list_signatures(path):
+    """``[(signature, entries)]`` for a cache file, largest first."""
+    db = sqlite3.connect(str(path))
+    try:
+        if not _has_table(db, "entries"):
+            if _has_table(db, "cache"):
+                return db.execute(
+                    "SELECT signature, COUNT(*) FROM cache "
+                    "GROUP BY signature ORDER BY 2 DESC").fetchall()
+            return []
+        return db.execute(
+            "SELECT s.signature, COUNT(e.key) FROM signatures s "
+            "LEFT JOIN entries e ON e.sig = s.id GROUP BY s.id "
+            "ORDER BY 2 DESC").fetchall()
+    finally:
+        db.close()
+
+
+def cache_stats(path, signature=None):
+    """Recorded cost of every signature in a cache file — or just
+    ``signature``'s — costliest (most simulator time) first.
+
+    Returns:
+        List of ``CacheStats``, with ``entries``, ``statuses`` and
+        ``bytes`` (keys, outputs and inputs as stored) filled in. Signatures from
+        before statistics were recorded have entries but empty
+        ``latency``.
+    """
+    db = sqlite3.connect(f"file:{quote(str(Path(path).resolve()))}?mode=ro",
+                         uri=True)
+    try:
+        if not _has_column(db, "entries", "status"):
+            raise ValueError(f"{path} is not a current cache file; open "
+                             f"it with CachedBackend first to convert it")
+        where, args = (("WHERE s.signature=?", (signature,))
+                       if signature is not None else ("", ()))
+        statuses = {}
+        for sid, status, n in db.execute(
+                "SELECT sig, status, COUNT(*) FROM entries "
+                "GROUP BY sig, status"):
+            statuses.setdefault(sid, {})[_STATUSES[status]] = n
+        out = {}
+        for sid, text, n, size in db.execute(
+                "SELECT s.id, s.signature, COUNT(e.key), "
+                "COALESCE(SUM(LENGTH(e.key) + LENGTH(e.value) "
+                "+ COALESCE(LENGTH(e.params), 0)), 0) "
+                f"FROM signatures s LEFT JOIN entries e ON e.sig = s.id "
+                f"{where} GROUP BY s.id", args):
+            out[sid] = CacheStats(text, entries=n, bytes=size,
+                                  statuses=statuses.get(sid, {}))
+        if _has_table(db, "stats"):
+            for sid, kind, seconds, blob in db.execute(
+                    "SELECT sig, kind, seconds, histogram FROM stats"):
+                if sid in out:
+                    out[sid].latency[kind] = LatencyHistogram._unpack(
+                        blob, seconds)
+    finally:
+        db.close()
+    if signature is not None and not out:
+        raise KeyError(f"no signature {signature!r} in {path}")
+    return sorted(out.values(),
+                  key=lambda st: (-st.simulator_seconds, -st.bytes))
+
+
+def purge_cache(path, status=("nan", "timeout"), *, signature=None,
+                timeout=30.0):
+    """Delete failed entries from cache file ``path`` — every
+    signature's, or only ``signature``'s — keeping the good ones;
+    returns how many. ``status`` is as ``CachedBackend.purge``: by
+    default ``"timeout"`` and ``"nan"`` entries. Safe against a live
+    cache, though a running backend's memory tier keeps what it
+    already read."""
+    codes = _statuses(status)
+    if not Path(path).exists():
+        raise FileNotFoundError(f"no cache file at {path}")
+    db = _connect(path, timeout)
+    try:
+        _retry(lambda: _create_schema(db, db.execute(
+            "PRAGMA journal_mode").fetchone()[0]), timeout)
+        where = f"status IN ({','.join('?' * len(codes))})"
+        args = codes
+        if signature is not None:
+            where += (" AND sig = (SELECT id FROM signatures "
+                      "WHERE signature=?)")
+            args += (signature,)
+        return _retry(lambda: _immediate(db, lambda: db.execute(
+            f"DELETE FROM entries WHERE {where}", args).rowcount), timeout)
+    finally:
+        db.close()
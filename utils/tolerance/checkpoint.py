@@ -0,0 +1,166 @@
+"""Checkpoint / resume for long ``analyze`` runs.
+
+An overnight ngspice MC that dies at sample 80 000 of 100 000 should
+restart at 80 001, not at 1. ``analyze(checkpoint="run.ckpt")`` keeps
+an sqlite file with, per run:
+
+- a ``runs`` row: the fingerprint (sha256 over the seed, ``n_mc``, the
+  sampler / correlation / temperature / tempco config, the sampling
+  mode and the metrics' identity), plus the seed and that config in
+  readable form;
+- ``rows``: one packed float64 metric row per completed sample index,
+  committed every ``chunk_size`` samples;
+- ``state`` (streaming / early-stop runs): the pickled accumulators
+  and RNG state at the last completed chunk boundary.
+
+Rerunning the same call redraws the (deterministic) sample matrix,
+loads the stored rows and evaluates only the missing indices, so the
+final ``YieldReport`` is identical to an uninterrupted run. Full-draw
+runs don't fingerprint the spec: re-running a finished run with a
+tweaked spec costs no simulations.
+
+The metrics' identity is ``metrics.signature()`` when the backend has
+one (``NgspiceBackend`` hashes its template), else the callable's
+qualified name — so an edited function body is *not* detected. Delete
+the checkpoint file after changing a metrics function in place. The
+``state`` blob is a pickle: only resume from checkpoint files you
+wrote yourself.
+"""
+import hashlib
+import json
+import pickle
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+
+
+def _metrics_identity(metrics):
+    """Best available stable name for a metrics callable."""
+    sig = getattr(metrics, "signature", None)
+    if callable(sig):
+        return str(sig())
+    if isinstance(sig, str):
+        return sig
+    name = (getattr(metrics, "__qualname__", None)
+            or type(metrics).__qualname__)
+    ident = f"{getattr(metrics, '__module__', '')}.{name}"
+    # Wrappers (CachedBackend, parametric_dither's pairing) are only
+    # as distinct as what they wrap.
+    inner = getattr(metrics, "wrapped", None) or getattr(metrics,
+                                                         "metrics", None)
+    if callable(inner) and inner is not metrics:
+        ident += f"({_metrics_identity(inner)})"
+    return ident
+
+
+def _fingerprint(config):
+    """sha256 hex digest of a JSON-able config dict (non-JSON values
+    go through ``repr``, which is exact for floats and for the
+    dataclass samplers / tempcos)."""
+    blob = json.dumps(config, sort_keys=True, default=repr)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+class Checkpoint:
+    """One run's slice of a checkpoint file.
+
+    Args:
+        path: sqlite file; created (with parent directories) if
+            missing. Several runs — e.g. the values of a
+            ``parametric_sweep`` — share one file under different
+            fingerprints.
+        config: dict describing everything that determines the
+            per-sample metric rows; hashed into the run's fingerprint.
+        metric_keys: metric names, fixing the column order of stored
+            rows.
+    """
+
+    def __init__(self, path, config, metric_keys):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.metric_keys = list(metric_keys)
+        self.run = _fingerprint(dict(config, metric_keys=self.metric_keys))
+        self._db = sqlite3.connect(str(self.path))
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS runs "
+            "(fingerprint TEXT PRIMARY KEY, seed TEXT, config TEXT);"
+            "CREATE TABLE IF NOT EXISTS rows "
+            "(fingerprint TEXT, idx INTEGER, row BLOB, "
+            "PRIMARY KEY (fingerprint, idx));"
+            "CREATE TABLE IF NOT EXISTS state "
+            "(fingerprint TEXT PRIMARY KEY, n_done INTEGER, blob BLOB);"
+        )
+        self._db.execute(
+            "INSERT OR IGNORE INTO runs (fingerprint, seed, config) "
+            "VALUES (?, ?, ?)",
+            (self.run, repr(config.get("seed")),
+             json.dumps(config, sort_keys=True, default=repr)),
+        )
+        self._db.commit()
+
+    def load_rows(self, n):
+        """``(done, rows)``: a ``(n,)`` bool mask of stored indices and
+        an ``(n, n_metrics)`` array holding them (NaN elsewhere)."""
+        rows = np.full((n, len(self.metric_keys)), np.nan)
+        done = np.zeros(n, dtype=bool)
+        cur = self._db.execute(
+            "SELECT idx, row FROM rows WHERE fingerprint=? AND idx<?",
+            (self.run, n),
+        )
+        for idx, blob in cur:
+            rows[idx] = np.frombuffer(blob, dtype=np.float64)
+            done[idx] = True
+        return done, rows
+
+    def save_rows(self, indices, arrays):
+        """Store ``{metric: (m,) array}`` results for sample
+        ``indices`` and commit."""
+        self._insert_rows(indices, arrays)
+        self._db.commit()
+
+    def _insert_rows(self, indices, arrays):
+        block = np.column_stack([np.asarray(arrays[k], dtype=np.float64)
+                                 for k in self.metric_keys])
+        self._db.executemany(
+            "INSERT OR REPLACE INTO rows (fingerprint, idx, row) "
+            "VALUES (?, ?, ?)",
+            ((self.run, int(i), block[r].tobytes())
+             for r, i in enumerate(indices)),
+        )
+
+    def load_state(self):
+        """``(n_done, state)`` from the last ``save_state``, or
+        ``(0, None)`` for a fresh run."""
+        row = self._db.execute(
+            "SELECT n_done, blob FROM state WHERE fingerprint=?",
+            (self.run,),
+        ).fetchone()
+        if row is None:
+            return 0, None
+        return int(row[0]), pickle.loads(row[1])
+
+    def save_state(self, n_done, state, indices=None, arrays=None):
+        """Record a chunk boundary — optionally with that chunk's rows
+        — in one transaction, so a crash leaves either the old or the
+        new boundary, never half of one."""
+        if indices is not None:
+            self._insert_rows(indices, arrays)
+        self._db.execute(
+            "INSERT OR REPLACE INTO state (fingerprint, n_done, blob) "
+            "VALUES (?, ?, ?)",
+            (self.run, int(n_done),
+             pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)),
+        )
+        self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
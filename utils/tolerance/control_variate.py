@@ -0,0 +1,181 @@
+"""Control-variate variance reduction with the ``Linearized`` surrogate.
+
+``Linearized`` replaces the metrics with their first-order expansion
+``L(x) = g(x₀) + J·(x - x₀)`` about the nominal. That surrogate is
+wrong in the tails but strongly correlated with the real metric on
+every MC sample — and, unlike the real metric, it costs nothing to
+evaluate. ``analyze(control_variate=ControlVariates())`` uses it as a
+control variate:
+
+    Ŷ = mean(Y) - β · (mean(C) - E[C])
+
+for each quantity ``Y`` the report estimates, with ``C`` the same
+quantity computed on the surrogate:
+
+- joint and per-spec **yield** — ``Y`` is the pass indicator of the
+  real metrics, ``C`` the pass indicator of ``L`` against the same
+  spec;
+- **metric means** — ``Y = g_k(x)``, ``C = L_k(x)``.
+
+``β = cov(Y, C) / var(C)`` is fitted on the MC samples. ``E[C]`` comes
+from a large surrogate-only MC (``n_surrogate`` input draws, no metric
+calls), which also handles correlations, tempcos and any sampler
+shape. The residual variance is ``var(Y)·(1 - ρ²)``: a metric that is
+close to linear over its spread (ρ ≈ 0.95–0.99) needs 10–50× fewer
+samples for the same interval width. The Jacobian costs ``2·d``
+metric calls.
+
+The estimator is unbiased up to an ``O(1/n)`` term from fitting β;
+a badly non-linear metric just gets ``β ≈ 0`` and the plain MC
+answer back.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.stats import norm
+
+from .analyze import _as_metric_arrays, _pass_matrix
+from .linearized_ranker import _central_difference_jacobian
+from .report import ControlVariateResult
+
+
+@dataclass
+class ControlVariates:
+    """Linear-surrogate control variates for ``analyze(control_variate=...)``.
+
+    Args:
+        eps_frac: Central-difference step as a fraction of each
+            input's σ, as in ``Linearized``. Default 0.1.
+        n_surrogate: Input draws for the surrogate's exact-in-the-limit
+            means. Costs no metric calls; default 200 000 puts their
+            error far below the MC noise being removed.
+        confidence: Level of the report's ``yield_interval``. Default
+            0.95.
+    """
+    eps_frac: float = 0.1
+    n_surrogate: int = 200_000
+    confidence: float = 0.95
+
+    def __post_init__(self):
+        if self.eps_frac <= 0:
+            raise ValueError(f"eps_frac must be > 0, got {self.eps_frac}")
+        if self.n_surrogate < 1000:
+            raise ValueError(
+                f"n_surrogate must be >= 1000, got {self.n_surrogate}"
+            )
+        if not (0 < self.confidence < 1):
+            raise ValueError(
+                f"confidence must be in (0, 1), got {self.confidence}"
+            )
+
+
+def _controlled(y, c, c_mean):
+    """``(estimate, residual_variance, raw_variance)`` for the mean of
+    ``y`` with control ``c`` of known mean ``c_mean``."""
+    var_c = float(np.var(c))
+    beta = float(np.cov(y, c, bias=True)[0, 1] / var_c) if var_c > 0 else 0.0
+    resid = y - beta * c
+    return (float(y.mean() - beta * (c.mean() - c_mean)),
+            float(np.var(resid, ddof=1)), float(np.var(y, ddof=1)))
+
+
+def _score_interval(p, resid, n, confidence):
+    """Wilson-style score interval for a yield estimate ``p`` whose
+    per-sample variance is ``resid`` (the control-variate residual)
+    rather than the binomial ``p(1-p)``. With ``resid = p(1-p)`` it is
+    the Wilson interval; as ``resid`` → 0 — a design passing every
+    sample, or a surrogate that predicts every pass/fail exactly — it
+    keeps the score term's ``z²/n`` width instead of collapsing to a
+    point, and at ``p = 1`` it is Wilson's ``[n/(n+z²), 1]``."""
+    z = float(norm.ppf(0.5 + confidence / 2.0))
+    if not np.isfinite(resid):          # n == 1: no variance estimate
+        resid = 0.0
+    z2n = z * z / n
+    denom = 1.0 + z2n
+    centre = (p + z2n / 2) / denom
+    half = z * np.sqrt(resid / n + z2n / (4 * n)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def _reduction(raw, resid):
+    if resid > 0:
+        return raw / resid
+    return float("inf") if raw > 0 else 1.0
+
+
+def _apply_control_variates(cfg, report, evaluator, *, samples, T_samples,
+                            x0, draw_surrogate, spec, metric_keys,
+                            vectorized):
+    """Control-variate estimates for a full-draw ``YieldReport``;
+    returns the report with ``control_variate``, ``yield_interval`` and
+    ``interval_confidence`` filled in."""
+    has_T = T_samples is not None
+    X = np.column_stack([samples, T_samples]) if has_T else samples
+    d_comp = samples.shape[1]
+
+    surrogate_samples, surrogate_T = draw_surrogate(cfg.n_surrogate)
+    X_sur = (np.column_stack([surrogate_samples, surrogate_T]) if has_T
+             else surrogate_samples)
+
+    def evaluate(points):
+        with evaluator:
+            results = evaluator(points[:, :d_comp],
+                                points[:, d_comp] if has_T else None)
+            return _as_metric_arrays(results, metric_keys, points.shape[0],
+                                     vectorized)
+
+    steps = cfg.eps_frac * X_sur.std(axis=0)
+    J = _central_difference_jacobian(evaluate, x0, steps, metric_keys)
+    g0 = np.array([report.nominal_metrics[k] for k in metric_keys])
+
+    def surrogate(points):
+        L = g0 + (points - x0) @ J.T
+        return {k: L[:, j] for j, k in enumerate(metric_keys)}
+
+    L_mc = surrogate(X)
+    L_sur = surrogate(X_sur)
+    nominal = report.nominal_metrics
+    passed = _pass_matrix(report.metric_samples, spec, nominal)
+    c_passed = _pass_matrix(L_mc, spec, nominal)
+    c_passed_sur = _pass_matrix(L_sur, spec, nominal)
+
+    n = samples.shape[0]
+    yield_est, resid, raw = _controlled(
+        passed.all(axis=1).astype(float),
+        c_passed.all(axis=1).astype(float),
+        float(c_passed_sur.all(axis=1).mean()),
+    )
+    yield_est = min(max(yield_est, 0.0), 1.0)
+    per_spec = {}
+    for j, name in enumerate(spec):
+        est, _, _ = _controlled(passed[:, j].astype(float),
+                                c_passed[:, j].astype(float),
+                                float(c_passed_sur[:, j].mean()))
+        per_spec[name] = 100.0 * min(max(est, 0.0), 1.0)
+
+    metric_means, metric_reduction = {}, {}
+    for k in metric_keys:
+        g = report.metric_samples[k]
+        ok = np.isfinite(g)
+        if not ok.any():
+            metric_means[k] = float("nan")
+            metric_reduction[k] = 1.0
+            continue
+        est, m_resid, m_raw = _controlled(g[ok], L_mc[k][ok],
+                                          float(L_sur[k].mean()))
+        metric_means[k] = est
+        metric_reduction[k] = _reduction(m_raw, m_resid)
+
+    lo, hi = _score_interval(yield_est, resid, n, cfg.confidence)
+    report.control_variate = ControlVariateResult(
+        yield_pct=100.0 * yield_est,
+        per_spec_pct=per_spec,
+        metric_means=metric_means,
+        yield_variance_reduction=_reduction(raw, resid),
+        metric_variance_reduction=metric_reduction,
+        surrogate_yield_pct=100.0 * float(c_passed_sur.all(axis=1).mean()),
+        jacobian_evaluations=2 * int(np.count_nonzero(steps > 0)),
+    )
+    report.yield_interval = (100.0 * lo, 100.0 * hi)
+    report.interval_confidence = cfg.confidence
+    return report
@@ -0,0 +1,142 @@
+"""Content hashes of rendered SPICE netlists.
+
+``CachedBackend(key="netlist")`` keys each entry on what ngspice will
+actually simulate rather than on the Python values that produced it,
+so two templates that render the same circuit share results, an edit
+to a callable template's body misses as it should, and the key is the
+same in every process (unlike ``repr`` of a function).
+
+Normalisation drops what ngspice ignores — the title line, ``*``
+comment lines, end-of-line ``;`` / `` $ `` / ``//`` comments outside
+``.control`` blocks, blank lines, runs of whitespace and anything
+after ``.end`` — and joins ``+`` continuation lines. Case is kept:
+file names and ``.control`` strings are case-sensitive.
+
+``.include`` / ``.inc`` / ``.lib`` lines are replaced by a hash of the
+file's own normalised contents (recursively, so nested includes
+count), so editing ``uopamp.lib`` invalidates every entry that used it
+while moving it to another directory doesn't. Relative paths resolve
+against ``base_dir`` (default: the working directory, which is where
+ngspice looks for a netlist written to a temp file). A file that
+can't be read — e.g. a path that only exists on a remote host — is
+hashed by its path. File hashes are memoised on (mtime, size), so a
+sweep pays one ``stat`` per include per sample.
+"""
+import hashlib
+import os
+import re
+import threading
+from pathlib import Path
+
+_INCLUDE_RE = re.compile(r"^\.(include|inc|lib)\s+(\"[^\"]*\"|'[^']*'|\S+)"
+                         r"(?:\s+(\S+))?", re.IGNORECASE)
+_EOL_COMMENT_RE = re.compile(r"(;|\s\$\s|\s\$$|\s//).*$")
+
+_file_hashes = {}
+_file_lock = threading.Lock()
+
+
+def normalize_netlist(text):
+    """The netlist lines ngspice acts on, normalised; see the module
+    docstring."""
+    lines = []
+    in_control = False
+    for raw in text.splitlines()[1:]:       # line 1 is the title
+        stripped = raw.strip()
+        if not stripped or stripped[0] == "*":
+            continue
+        lowered = stripped.lower()
+        if lowered.startswith(".control"):
+            in_control = True
+        elif lowered.startswith(".endc"):
+            in_control = False
+        elif not in_control:
+            stripped = _EOL_COMMENT_RE.sub("", stripped).strip()
+            if not stripped:
+                continue
+            if stripped[0] == "+" and lines:
+                lines[-1] += " " + " ".join(stripped[1:].split())
+                continue
+        line = " ".join(stripped.split())
+        lines.append(line)
+        if line.lower() == ".end" and not in_control:
+            break
+    return lines
+
+
+def _resolve(path, base_dir):
+    path = Path(os.path.expanduser(path.strip("\"'")))
+    return path if path.is_absolute() else Path(base_dir) / path
+
+
+def _stamp(real):
+    try:
+        st = real.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _file_hash(path, seen):
+    """``(hash, deps)`` for an included file: the hash of its
+    normalised contents with its own includes resolved against its
+    directory, and the ``(path, stamp)`` of it and everything it
+    includes — the memo is only valid while all of those are
+    unchanged."""
+    real = path.resolve()
+    with _file_lock:
+        cached = _file_hashes.get(real)
+    if cached is not None and all(_stamp(p) == stamp
+                                  for p, stamp in cached[1]):
+        return cached
+    stamp = _stamp(real)
+    if stamp is None or real in seen:   # unreadable, or an include cycle
+        return "path:" + str(real), ()
+    try:
+        text = real.read_text(errors="replace")
+    except OSError:
+        return "path:" + str(real), ()
+    # An included file has no title line.
+    digest, deps = _digest_lines(normalize_netlist("\n" + text),
+                                 real.parent, seen | {real})
+    entry = (digest, ((real, stamp),) + deps)
+    with _file_lock:
+        _file_hashes[real] = entry
+    return entry
+
+
+def _digest_lines(lines, base_dir, seen=frozenset()):
+    h = hashlib.sha256()
+    deps = ()
+    for line in lines:
+        m = _INCLUDE_RE.match(line)
+        if m:
+            kind, path, section = m.groups()
+            digest, more = _file_hash(_resolve(path, base_dir), seen)
+            deps += more
+            kind = "lib" if kind.lower() == "lib" else "include"
+            line = (f".{kind} {digest}"
+                    + (f" {section}" if section else ""))
+        h.update(line.encode())
+        h.update(b"\n")
+    return h.hexdigest(), deps
+
+
+def netlist_digest(text, outputs=(), base_dir=None):
+    """Hex sha256 of netlist ``text`` after normalisation, with
+    included files replaced by hashes of their contents, plus the
+    ``outputs`` being measured.
+
+    Args:
+        text: Rendered netlist, title line first.
+        outputs: ``.meas`` names read back — part of the key, since
+            the same circuit asked for different outputs caches a
+            different dict.
+        base_dir: Directory relative includes resolve against.
+            Default: the working directory.
+    """
+    lines = normalize_netlist(text)
+    body, _ = _digest_lines(lines, base_dir if base_dir is not None
+                            else os.getcwd())
+    return hashlib.sha256(
+        (body + "\0" + ",".join(outputs)).encode()).hexdigest()
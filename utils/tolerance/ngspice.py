@@ -5,13 +5,17 @@ values, runs ``ngspice -b``, parses the ``.meas`` output. Drop-in for
 the ``metrics=`` argument of ``analyze`` — the rest of the library is
 unchanged.
 """
+import copy
 import hashlib
 import math
 import re
 import shutil
+import string
 import subprocess
-import tempfile
-from pathlib import Path
+
+from .netlist import netlist_digest
+from .rawfile import read_raw
+from .workarea import WorkArea
 
 
 # Matches lines of the form "name = number" or "name = failed" at the
@@ -43,6 +47,164 @@ def _parse_meas_output(stdout):
     return parsed
 
 
+# ``.control`` commands dropped when a template's block is replayed
+# command by command: they'd end the session (or the batch) early.
+_SKIPPED = {"quit", "exit"}
+
+# Lines on which ngspice evaluates ``{expr}`` itself: element lines,
+# their ``+`` continuations, ``.param`` and ``.model``.
+_EXPR_LINE_RE = re.compile(r"^\s*([a-zA-Z+]|\.param\b|\.model\b)",
+                           re.IGNORECASE)
+
+
+def _split_control(netlist):
+    """``(circuit lines, control commands)``: the netlist with its
+    ``.control`` … ``.endc`` blocks removed, and their commands."""
+    circuit, control = [], []
+    in_control = False
+    for line in netlist.splitlines():
+        lowered = line.strip().lower()
+        if lowered.startswith(".control"):
+            in_control = True
+        elif lowered.startswith(".endc"):
+            in_control = False
+        elif in_control:
+            if lowered and lowered[0] != "*" \
+                    and lowered.split()[0] not in _SKIPPED:
+                control.append(line.strip())
+        else:
+            circuit.append(line)
+    return circuit, control
+
+
+def _param_names(template):
+    """Placeholder names of a format-string template that can become
+    ngspice parameters, or ``None`` if it has to be rendered."""
+    if not isinstance(template, str) or "{{" in template \
+            or "}}" in template:
+        return None
+    names = []
+    in_control = False
+    for line in template.splitlines()[1:]:      # line 1 is the title
+        lowered = line.strip().lower()
+        if lowered.startswith(".control"):
+            in_control = True
+        elif lowered.startswith(".endc"):
+            in_control = False
+        try:
+            fields = [f for f in string.Formatter().parse(line)
+                      if f[1] is not None]
+        except ValueError:
+            return None
+        for _, name, spec, conversion in fields:
+            if in_control or not _EXPR_LINE_RE.match(line) or spec \
+                    or conversion or not name.isidentifier():
+                return None
+            if name not in names:
+                names.append(name)
+    return names
+
+
+# Echoed after each sample of a batch run.
+_DONE_RE = re.compile(r"^@@done (\d+)@@\s*$", re.MULTILINE)
+
+
+def _check_batch_size(batch_size, names):
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+    if batch_size > 1 and names is None:
+        raise ValueError(
+            "batch_size > 1 needs a format-string template whose "
+            "placeholders are only on element, .param and .model lines "
+            "(they become .param values); callables, format specs and "
+            "placeholders in .control or .temp lines run one sample at "
+            "a time"
+        )
+
+
+def _split_end(lines):
+    """``(lines before the final .end, the rest)`` — ``.end`` added if
+    the netlist has none."""
+    ends = [i for i, line in enumerate(lines)
+            if line.strip().lower() == ".end"]
+    if not ends:
+        return lines, [".end"]
+    return lines[:ends[-1]], lines[ends[-1]:]
+
+
+def _write_commands(path):
+    """``.control`` commands that write the current plot to ``path`` as
+    a binary rawfile, whatever ``filetype`` a ``.spiceinit`` set."""
+    return ["set filetype=binary", f"write {path}"]
+
+
+def _raw_netlist(netlist, raw_path):
+    """``netlist`` with a binary ``write`` of the last analysis's plot
+    to ``raw_path`` after its ``.control`` commands (or a ``run``)."""
+    lines, control = _split_control(netlist)
+    body, tail = _split_end(lines)
+    out = body + [".control", *(control or ["run"]),
+                  *_write_commands(raw_path), "quit", ".endc", *tail]
+    return "\n".join(out) + "\n"
+
+
+def _batch_netlist(template, names, values_list, raw_paths=None):
+    """One netlist that runs every sample of ``values_list`` in turn:
+    the template with a ``.param`` per placeholder, and a ``.control``
+    block that for each sample sets them (``alterparam`` + ``reset``),
+    runs the template's own ``.control`` commands (or ``run``),
+    ``write``s ``raw_paths[i]`` if given, and echoes an end marker."""
+    lines, control = _split_control(template)
+    body, tail = _split_end(lines)
+    out = body[:1] + [f".param {name}={float(values_list[0][name])!r}"
+                      for name in names] + body[1:] + [".control"]
+    for i, values in enumerate(values_list):
+        out += [f"alterparam {name}={float(values[name])!r}"
+                for name in names]
+        out += ["reset", *(control or ["run"])]
+        if raw_paths is not None:
+            out += _write_commands(raw_paths[i])
+        out += [f"echo @@done {i}@@", "destroy all"]
+    out += ["quit", ".endc", *tail]
+    return "\n".join(out) + "\n"
+
+
+def _batch_results(backend, values_list, returncode, stdout, extras=None):
+    """Per-sample result dicts from a batch run's output: the ``.meas``
+    lines before each sample's end marker, plus ``extras[i]`` (values
+    computed from its waveforms) if given. Samples whose marker never
+    came — ngspice crashed or timed out part-way — are re-run one at a
+    time through ``backend``, which isolates the culprit with the
+    usual single-sample failure handling; so is the whole batch when
+    ngspice failed without measuring anything."""
+    parts = [None] * len(values_list)
+    start = 0
+    for m in _DONE_RE.finditer(stdout):
+        i = int(m.group(1))
+        if i < len(parts):
+            parts[i] = _parse_meas_output(stdout[start:m.start()])
+        start = m.end()
+    if returncode != 0 and not any(parts):
+        parts = [None] * len(values_list)
+    for parsed, extra in zip(parts, extras or ()):
+        if parsed is not None:
+            parsed.update(extra)
+    return [backend(**values) if parsed is None else
+            {name: parsed.get(name, float("nan"))
+             for name in backend.outputs}
+            for parsed, values in zip(parts, values_list)]
+
+
+def _text(output):
+    """Captured output as ``str`` — a ``TimeoutExpired`` carries what
+    was read before the kill as bytes, or ``None``."""
+    if output is None:
+        return ""
+    if isinstance(output, bytes):
+        return output.decode(errors="replace")
+    return output
+
+
 def _signature(template, outputs):
     """Hash of (template + outputs) — short stable identifier shared by
     local and remote backends so they index the same cache namespace
@@ -56,6 +218,27 @@ def _signature(template, outputs):
     return hashlib.sha256(digest_input).hexdigest()[:16]
 
 
+class TimedOut(dict):
+    """Result of a run killed at its timeout: every output NaN, so it
+    reads like any failed run, but marked as possibly transient — an
+    overloaded host rather than a circuit that won't converge.
+    ``CachedBackend`` retries these per its ``RetryPolicy`` instead of
+    caching them for good.
+
+    Attributes:
+        attempts: Consecutive runs of this sample that timed out, as
+            counted by the cache (0 straight from a backend).
+        retry_at: Epoch seconds from which the cache re-runs it;
+            ``None`` when it won't.
+    """
+    attempts = 0
+    retry_at = None
+
+    @classmethod
+    def of(cls, outputs):
+        return cls((name, float("nan")) for name in outputs)
+
+
 class NgspiceBackend:
     """Callable that runs ngspice on a parameterised netlist and returns
     the ``.meas`` results as a dict.
@@ -102,12 +285,42 @@ class NgspiceBackend:
         timeout: Per-run wall-clock timeout in seconds. ngspice can
             spin on pathological convergence problems; the timeout
             means a stuck sample doesn't stall the whole sweep.
+            ``with_timeout`` gives a copy with another.
+        batch_size: Samples per ngspice run. Default 1. With K > 1,
+            ``run_many`` — which ``analyze`` calls with chunks of K
+            samples — runs a chunk as one netlist: the template's
+            placeholders become ``.param`` values and a ``.control``
+            block loops over the samples (``alterparam`` + ``reset`` +
+            the template's analyses and ``meas`` per sample), cutting
+            process launches by K×. Needs a format-string template
+            whose placeholders are only on element, ``.param`` and
+            ``.model`` lines. A chunk gets ``timeout`` per sample.
+        work_area: ``WorkArea`` for the netlist file — each run gets
+            its own scratch directory, removed afterwards. Default
+            ``WorkArea()``: the system temp dir. ``WorkArea.tmpfs()``
+            keeps it in RAM; ``stdin=True`` / ``"auto"`` pipes the
+            netlist instead of writing it. ngspice runs in the current
+            working directory either way, so relative ``.include``
+            paths resolve as before.
+        waveforms: Optional callable ``(RawPlot) -> {name: value}``
+            for measurements ``.meas`` can't make. ngspice then also
+            ``write``s the last analysis's plot as a binary rawfile
+            (into a scratch directory of ``work_area``), which is
+            memory-mapped with ``rawfile.read_raw`` and passed in; the
+            values it returns join the ``.meas`` results, so list
+            their names in ``outputs`` too. Like a callable template,
+            the function isn't part of ``signature()``, and it must
+            pickle for ``analyze(executor="process")``.
 
     Failure handling:
 
     - Missing ``.meas`` name in the parsed output, or ``= failed`` in
       the ngspice text → that output's value is ``float("nan")``.
-    - Subprocess timeout → all outputs ``nan``.
+    - Subprocess timeout → all outputs ``nan``, as a ``TimedOut`` so
+      ``CachedBackend`` knows to retry it.
+    - A batch run that dies or times out part-way keeps the samples it
+      finished and re-runs the rest one at a time, so only the
+      culprit fails.
     - Subprocess returncode nonzero **with at least one parsed
       measurement** → return what we have (samples in a sweep can
       individually fail without aborting the whole MC run).
@@ -123,18 +336,31 @@ class NgspiceBackend:
     """
 
     def __init__(self, template, outputs, *,
-                 ngspice="ngspice", timeout=60.0):
+                 ngspice="ngspice", timeout=60.0, batch_size=1,
+                 work_area=None, waveforms=None):
         if not (callable(template) or isinstance(template, str)):
             raise TypeError(
                 "template must be a callable (**values) -> str or a "
                 "format string"
             )
+        self._params = _param_names(template)
+        _check_batch_size(batch_size, self._params)
+        if work_area is not None and not isinstance(work_area, WorkArea):
+            raise TypeError(
+                f"work_area must be a WorkArea, "
+                f"got {type(work_area).__name__}"
+            )
+        if waveforms is not None and not callable(waveforms):
+            raise TypeError("waveforms must be a callable (RawPlot) -> dict")
         if shutil.which(ngspice) is None:
             raise RuntimeError(f"ngspice binary not found: {ngspice!r}")
         self.template = template
         self.outputs = list(outputs)
         self.ngspice = ngspice
         self.timeout = timeout
+        self.batch_size = batch_size
+        self.work_area = work_area if work_area is not None else WorkArea()
+        self.waveforms = waveforms
 
     def signature(self):
         """Stable identifier for this backend's template + outputs.
@@ -147,9 +373,24 @@ class NgspiceBackend:
         but won't catch in-place edits to a function's body. The
         signature deliberately ignores host (local vs remote) — running
         the same netlist on a different machine should hit the same
-        cached values."""
+        cached values. ``CachedBackend(key="netlist")`` avoids the
+        ``repr`` problem altogether by keying on ``netlist_key``."""
         return _signature(self.template, self.outputs)
 
+    def with_timeout(self, timeout):
+        """This backend with a different ``timeout`` — same signature,
+        so a retry with more time lands in the same cache entry."""
+        other = copy.copy(self)
+        other.timeout = timeout
+        return other
+
+    def netlist_key(self, **values):
+        """Content hash of the netlist rendered for ``values`` plus
+        ``outputs`` — see ``netlist.netlist_digest``. Relative
+        ``.include`` paths resolve against the working directory, as
+        they do for ngspice here."""
+        return netlist_digest(self._render(values), self.outputs)
+
     def _render(self, values):
         if callable(self.template):
             return self.template(**values)
@@ -157,40 +398,94 @@ class NgspiceBackend:
 
     def __call__(self, **values):
         netlist = self._render(values)
+        if self.waveforms is None:
+            returncode, stdout, stderr = self._exec(netlist, self.timeout)
+            extra = {}
+        else:
+            with self.work_area.scratch("ngspice-raw-") as scratch:
+                raw_path = scratch / "run.raw"
+                returncode, stdout, stderr = self._exec(
+                    _raw_netlist(netlist, raw_path), self.timeout)
+                extra = ({} if returncode is None
+                         else self._waveform_values(raw_path))
+        if returncode is None:
+            return TimedOut.of(self.outputs)
 
-        # Tempfile per call so concurrent invocations don't race on
-        # filename. Cost is one mkstemp + unlink per ngspice run, which
-        # is dwarfed by ngspice's own startup time.
-        with tempfile.NamedTemporaryFile(
-            suffix=".cir", mode="w", delete=False
-        ) as f:
-            f.write(netlist)
-            cir_path = Path(f.name)
+        parsed = _parse_meas_output(stdout)
+        parsed.update(extra)
 
-        try:
-            try:
-                result = subprocess.run(
-                    [self.ngspice, "-b", str(cir_path)],
-                    capture_output=True, text=True,
-                    timeout=self.timeout,
-                )
-            except subprocess.TimeoutExpired:
-                return {name: float("nan") for name in self.outputs}
+        if returncode != 0 and not parsed:
+            raise RuntimeError(
+                f"ngspice failed (returncode {returncode}) "
+                f"and produced no .meas output — likely a template "
+                f"error.\nstderr (last 2k):\n"
+                f"{stderr[-2000:]}"
+            )
 
-            parsed = _parse_meas_output(result.stdout)
+        return {name: parsed.get(name, float("nan"))
+                for name in self.outputs}
 
-            if result.returncode != 0 and not parsed:
-                raise RuntimeError(
-                    f"ngspice failed (returncode {result.returncode}) "
-                    f"and produced no .meas output — likely a template "
-                    f"error.\nstderr (last 2k):\n"
-                    f"{result.stderr[-2000:]}"
-                )
+    def run_many(self, values_list):
+        """Results for a sequence of samples, ``batch_size`` per
+        ngspice run — the same dicts as calling once per sample.
+        ``analyze`` uses this on a metrics object with ``batch_size``
+        above 1."""
+        results = []
+        for a in range(0, len(values_list), self.batch_size):
+            chunk = values_list[a:a + self.batch_size]
+            if len(chunk) == 1:
+                results.append(self(**chunk[0]))
+                continue
+            if self.waveforms is None:
+                returncode, stdout, _ = self._exec(
+                    _batch_netlist(self.template, self._params, chunk),
+                    self.timeout * len(chunk))
+                results += _batch_results(self, chunk, returncode, stdout)
+                continue
+            with self.work_area.scratch("ngspice-raw-") as scratch:
+                raw_paths = [scratch / f"run{i}.raw"
+                             for i in range(len(chunk))]
+                returncode, stdout, _ = self._exec(
+                    _batch_netlist(self.template, self._params, chunk,
+                                   raw_paths),
+                    self.timeout * len(chunk))
+                extras = [self._waveform_values(path) for path in raw_paths]
+            results += _batch_results(self, chunk, returncode, stdout,
+                                      extras)
+        return results
 
-            return {name: parsed.get(name, float("nan"))
-                    for name in self.outputs}
-        finally:
-            try:
-                cir_path.unlink()
-            except OSError:
-                pass
+    def _waveform_values(self, raw_path):
+        """``waveforms`` applied to the last plot in ``raw_path``; ``{}``
+        if ngspice didn't get as far as writing it."""
+        try:
+            plots = read_raw(raw_path)
+        except (OSError, ValueError):
+            return {}
+        if not plots:
+            return {}
+        return {name: float(value)
+                for name, value in self.waveforms(plots[-1]).items()}
+
+    def _exec(self, netlist, timeout):
+        """Run ``ngspice -b`` on ``netlist``: ``(returncode, stdout,
+        stderr)``, with returncode ``None`` if it was killed at
+        ``timeout`` (stdout is then what it printed first)."""
+        try:
+            if self.work_area.use_stdin(self.ngspice):
+                result = subprocess.run(
+                    [self.ngspice, "-b"], input=netlist,
+                    capture_output=True, text=True, timeout=timeout,
+                )
+            else:
+                # A scratch directory per call so concurrent invocations
+                # don't race on file names.
+                with self.work_area.scratch() as scratch:
+                    cir_path = scratch / "run.cir"
+                    cir_path.write_text(netlist)
+                    result = subprocess.run(
+                        [self.ngspice, "-b", str(cir_path)],
+                        capture_output=True, text=True, timeout=timeout,
+                    )
+        except subprocess.TimeoutExpired as exc:
+            return None, _text(exc.stdout), _text(exc.stderr)
+        return result.returncode, result.stdout, result.stderr
@@ -114,6 +114,42 @@ def _inject_parameter(parameter, value, nominal_values, distribution,
     return (aug_nominal, aug_dist, extras)
 
 
+class _PairedMetrics:
+    """The ``parametric_dither`` metrics wrapper: evaluates at ``v`` and
+    ``v + dither`` and appends ``{m}_d{parameter}`` slopes. A class
+    rather than a closure so it pickles for ``executor="process"``.
+    Works unchanged on the ``vectorized=True`` batch protocol — ``v``
+    is then an array and the slopes are elementwise."""
+
+    def __init__(self, metrics, parameter, dither, base):
+        self.metrics = metrics
+        self.parameter = parameter
+        self.dither = dither
+        self.base = base
+        # Forward signature() only if the underlying callable has one
+        # (cache key) — CachedBackend falls back to the type name
+        # otherwise.
+        if hasattr(metrics, "signature"):
+            self.signature = self._signature
+
+    def _signature(self):
+        return (f"dither_{self.parameter}_{self.dither}_"
+                + str(self.metrics.signature()))
+
+    def __call__(self, **values):
+        parameter, dither = self.parameter, self.dither
+        v = values.pop(parameter, self.base)
+        m_a = self.metrics(**{parameter: v, **values})
+        m_b = self.metrics(**{parameter: v + dither, **values})
+        out = dict(m_a)
+        for k, val in m_a.items():
+            try:
+                out[f"{k}_d{parameter}"] = (m_b[k] - val) / dither
+            except (TypeError, KeyError, ZeroDivisionError):
+                out[f"{k}_d{parameter}"] = float("nan")
+        return out
+
+
 def parametric_sweep(*, parameter: str, values: Iterable[float],
                       nominal_values, passive_tolerances, metrics, spec,
                       n_mc=1000, seed=None,
@@ -123,7 +159,10 @@ def parametric_sweep(*, parameter: str, values: Iterable[float],
                       temperature_coefficients=None,
                       temperature_nominal=25.0,
                       unit: str = "",
-                      workers=1) -> SweepReport:
+                      workers=1, vectorized=False,
+                      executor="thread", chunk_size=None,
+                      early_stop=None, sampling="random",
+                      checkpoint=None) -> SweepReport:
     """Run an MC at each value of the swept parameter.
 
     Args:
@@ -142,6 +181,9 @@ def parametric_sweep(*, parameter: str, values: Iterable[float],
         ``temperature_coefficients``, and ``temperature_nominal``
         are forwarded to ``analyze`` only when the swept parameter
         is ``'T'``; for other parameters they're inert.
+        ``checkpoint`` holds every value's run in the one file, so an
+        interrupted sweep skips the values already finished and
+        resumes the one in progress.
 
     Returns:
         ``SweepReport`` with one ``YieldReport`` per value, plus
@@ -175,6 +217,10 @@ def parametric_sweep(*, parameter: str, values: Iterable[float],
             temperature_coefficients=temperature_coefficients,
             temperature_nominal=temperature_nominal,
             workers=workers,
+            vectorized=vectorized,
+            executor=executor, chunk_size=chunk_size,
+            early_stop=early_stop, sampling=sampling,
+            checkpoint=checkpoint,
             **extras,
         )
         results.append((float(v), report))
@@ -189,7 +235,10 @@ def parametric_dither(*, parameter: str, base: float, dither: float,
                        temperature=None,
                        temperature_coefficients=None,
                        temperature_nominal=25.0,
-                       workers=1):
+                       workers=1, vectorized=False,
+                       executor="thread", chunk_size=None,
+                       early_stop=None, sampling="random",
+                       checkpoint=None):
     """Per-sample paired evaluation at ``base`` and ``base + dither``.
 
     For each MC sample the metric is evaluated at two values of the
@@ -227,24 +276,7 @@ def parametric_dither(*, parameter: str, base: float, dither: float,
     if dither == 0:
         raise ValueError(f"dither must be non-zero, got {dither}")
 
-    def metrics_paired(**values):
-        v = values.pop(parameter, base)
-        m_a = metrics(**{parameter: v, **values})
-        m_b = metrics(**{parameter: v + dither, **values})
-        out = dict(m_a)
-        for k, val in m_a.items():
-            try:
-                out[f"{k}_d{parameter}"] = (m_b[k] - val) / dither
-            except (TypeError, KeyError, ZeroDivisionError):
-                out[f"{k}_d{parameter}"] = float("nan")
-        return out
-
-    # Forward signature() if the underlying callable has one (cache key)
-    if hasattr(metrics, "signature"):
-        sig = metrics.signature
-        metrics_paired.signature = (
-            lambda: f"dither_{parameter}_{dither}_" + str(sig())
-        )
+    metrics_paired = _PairedMetrics(metrics, parameter, dither, base)
 
     nominal, dist, extras = _inject_parameter(
         parameter, base, nominal_values, distribution, passive_tolerances,
@@ -263,5 +295,9 @@ def parametric_dither(*, parameter: str, base: float, dither: float,
         temperature_coefficients=temperature_coefficients,
         temperature_nominal=temperature_nominal,
         workers=workers,
+        vectorized=vectorized,
+        executor=executor, chunk_size=chunk_size,
+        early_stop=early_stop, sampling=sampling,
+        checkpoint=checkpoint,
         **extras,
     )
@@ -0,0 +1,373 @@
+"""Pool of long-lived interactive ngspice processes.
+
+``NgspiceBackend`` pays for a fork / exec, ngspice's start-up and a
+parse of the netlist and its model libraries on every sample.
+``NgspicePool`` keeps ``size`` ngspice processes running in pipe mode
+(``ngspice -p``) and drives them over stdin instead: a worker loads
+the circuit once, and each sample is ``alterparam`` + ``reset`` + the
+analyses, with the ``.meas`` results read back from its stdout up to
+an ``echo``-ed end marker. Unlike ``SharedNgspiceBackend`` it needs
+only the ``ngspice`` binary, and its workers run in parallel under
+``analyze``'s default thread pool.
+
+Templates are split as for ``SharedNgspiceBackend``: a format string
+whose placeholders are only on element, ``.param`` and ``.model``
+lines is loaded once per worker with a ``.param`` per placeholder;
+anything else is rendered per sample and ``source``-d into the
+worker, which re-parses the netlist but still saves the process.
+
+A worker is recycled — killed and replaced by a fresh one — when it
+exits, when a sample runs past ``timeout``, after ``max_runs``
+samples and when its resident memory passes ``max_rss``.
+"""
+import copy
+import os
+import queue
+import re
+import shutil
+import subprocess
+import threading
+import time
+
+from .netlist import netlist_digest
+from .ngspice import (TimedOut, _param_names, _parse_meas_output,
+                      _signature, _split_control)
+from .workarea import WorkArea
+
+# Interactive prompt, in case a build prints one in pipe mode.
+_PROMPT_RE = re.compile(r"^ngspice \d+ -> ")
+
+
+def _rss(pid):
+    """Resident set size of process ``pid`` in bytes, or ``None``
+    where ``/proc`` isn't available."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Worker:
+    """One ``ngspice -p`` process, its scratch directory and a thread
+    moving its stdout lines onto a queue (so reads can time out)."""
+
+    def __init__(self, ngspice, cwd, work_area):
+        self.work_area = work_area
+        self.dir = work_area.make("ngspice-pool-")
+        self.proc = subprocess.Popen(
+            [ngspice, "-p"], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, text=True, bufsize=1, cwd=cwd)
+        self.lines = queue.Queue()
+        self.loaded = False
+        self.runs = 0
+        self._marker = 0
+        threading.Thread(target=self._pump, daemon=True).start()
+        self.send(["set nomoremode"])
+
+    def _pump(self):
+        for line in self.proc.stdout:
+            self.lines.put(_PROMPT_RE.sub("", line.rstrip("\n")))
+        self.lines.put(None)
+
+    def send(self, commands):
+        self.proc.stdin.write("".join(cmd + "\n" for cmd in commands))
+        self.proc.stdin.flush()
+
+    def exchange(self, commands, timeout):
+        """Send ``commands`` and collect the output they produce:
+        ``(lines, status)`` with status ``"ok"``, ``"timeout"`` or
+        ``"exited"``."""
+        self._marker += 1
+        marker = f"@@pool-{self._marker}@@"
+        deadline = time.monotonic() + timeout
+        try:
+            self.send(list(commands) + [f"echo {marker}"])
+        except (BrokenPipeError, OSError):
+            return [], "exited"
+        lines = []
+        while True:
+            try:
+                line = self.lines.get(
+                    timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                return lines, "timeout"
+            if line is None:
+                return lines, "exited"
+            if line.strip() == marker:
+                return lines, "ok"
+            lines.append(line)
+
+    def close(self):
+        try:
+            self.proc.kill()
+            self.proc.wait(5.0)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        for stream in (self.proc.stdin, self.proc.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        self.work_area.remove(self.dir)
+
+
+class NgspicePool:
+    """``NgspiceBackend`` without the process per sample: ``size``
+    interactive ngspice processes, each running samples one after
+    another.
+
+    Use exactly as ``NgspiceBackend``::
+
+        with NgspicePool(template=RC_TEMPLATE, outputs=["fc"],
+                         size=8) as backend:
+            report = analyze(metrics=backend, ..., workers=8)
+
+    Same ``template`` / ``outputs`` semantics, same ``signature()``
+    (so it shares cache entries with the other ngspice backends), same
+    failure handling — NaN for a missing or failed measurement,
+    ``TimedOut`` past ``timeout``, ``RuntimeError`` when ngspice errors
+    without measuring anything. ``.control`` blocks are run as
+    interactive commands, without their ``quit``.
+
+    Args:
+        template: Callable or ``str.format`` template, as for
+            ``NgspiceBackend``; see the module docstring for which are
+            loaded once per worker.
+        outputs: ``.meas`` names to return.
+        size: Number of ngspice processes. Calls beyond that many at
+            once wait for a free worker, so match ``analyze``'s
+            ``workers``. Default: the number of CPUs.
+        ngspice: Path to the ngspice binary.
+        timeout: Seconds per sample; a worker that takes longer is
+            killed and replaced.
+        max_runs: Replace a worker after this many samples, bounding
+            whatever state ngspice accumulates. ``None``: never.
+        max_rss: Replace a worker whose resident memory exceeds this
+            many bytes (checked after each sample, Linux only).
+            ``None``: never.
+        cwd: Working directory of the workers — where relative
+            ``.include`` paths resolve. Default: the working directory
+            at construction.
+        work_area: ``WorkArea`` for each worker's scratch directory
+            (where its netlist is written), kept for the worker's
+            lifetime. Default ``WorkArea()``: the system temp dir.
+
+    Workers start on first use and run until ``close()`` (or the end
+    of a ``with`` block, or interpreter exit). ``with_timeout`` copies
+    share the pool. Pickled, the pool is just its settings: each
+    process of ``analyze(executor="process")`` starts its own workers.
+    """
+
+    def __init__(self, template, outputs, *, size=None,
+                 ngspice="ngspice", timeout=60.0, max_runs=1000,
+                 max_rss=512 * 2**20, cwd=None, work_area=None):
+        if not (callable(template) or isinstance(template, str)):
+            raise TypeError(
+                "template must be a callable (**values) -> str or a "
+                "format string"
+            )
+        if size is None:
+            size = os.cpu_count() or 1
+        if size < 1:
+            raise ValueError(f"size must be >= 1, got {size}")
+        if max_runs is not None and max_runs < 1:
+            raise ValueError(f"max_runs must be >= 1, got {max_runs}")
+        if work_area is not None and not isinstance(work_area, WorkArea):
+            raise TypeError(
+                f"work_area must be a WorkArea, "
+                f"got {type(work_area).__name__}"
+            )
+        if shutil.which(ngspice) is None:
+            raise RuntimeError(f"ngspice binary not found: {ngspice!r}")
+        self.template = template
+        self.outputs = list(outputs)
+        self.size = size
+        self.ngspice = ngspice
+        self.timeout = timeout
+        self.max_runs = max_runs
+        self.max_rss = max_rss
+        self.cwd = cwd if cwd is not None else os.getcwd()
+        self.work_area = work_area if work_area is not None else WorkArea()
+        self._params = _param_names(template)
+        self._circuit = self._control = None
+        # Shared with ``with_timeout`` copies.
+        self._workers = _Workers(size)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_workers"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._workers = _Workers(self.size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Stop every worker. The pool stays usable: the next call
+        starts fresh ones."""
+        self._workers.close()
+
+    def signature(self):
+        """As ``NgspiceBackend.signature()``."""
+        return _signature(self.template, self.outputs)
+
+    def with_timeout(self, timeout):
+        """This backend with a different ``timeout``, on the same
+        workers."""
+        other = copy.copy(self)         # ``__setstate__`` gave it new ones
+        other._workers = self._workers
+        other.timeout = timeout
+        return other
+
+    def netlist_key(self, **values):
+        """As ``NgspiceBackend.netlist_key``, with relative includes
+        resolved against ``cwd``, as the workers resolve them."""
+        return netlist_digest(self._render(values), self.outputs,
+                              base_dir=self.cwd)
+
+    def _render(self, values):
+        if callable(self.template):
+            return self.template(**values)
+        return self.template.format(**values)
+
+    def _commands(self, worker, values):
+        """Commands that run one sample on ``worker``."""
+        if self._params is not None:
+            commands = []
+            if not worker.loaded:
+                if self._circuit is None:
+                    lines, self._control = _split_control(self.template)
+                    self._circuit = [lines[0]] + [
+                        f".param {name}={float(values[name])!r}"
+                        for name in self._params] + lines[1:]
+                path = worker.dir / "circuit.cir"
+                path.write_text("\n".join(self._circuit) + "\n")
+                commands.append(f"source {path}")
+                worker.loaded = True
+            commands += [f"alterparam {name}={float(values[name])!r}"
+                         for name in self._params]
+            commands.append("reset")
+            control = self._control
+        else:
+            lines, control = _split_control(self._render(values))
+            path = worker.dir / "circuit.cir"
+            path.write_text("\n".join(lines) + "\n")
+            commands = ["remcirc"] if worker.loaded else []
+            commands.append(f"source {path}")
+            worker.loaded = True
+        return commands + (control or ["run"]) + ["destroy all"]
+
+    def __call__(self, **values):
+        for attempt in range(2):
+            worker = self._workers.take(self.ngspice, self.cwd,
+                                        self.work_area)
+            lines, status, failed = [], "exited", False
+            try:
+                lines, status = worker.exchange(
+                    self._commands(worker, values), self.timeout)
+                worker.runs += 1
+                parsed = _parse_meas_output("\n".join(lines))
+                failed = not parsed and (status == "exited" or any(
+                    line.lower().startswith("error") for line in lines))
+            finally:
+                # A worker that failed goes too: whatever it half-loaded
+                # mustn't leak into later samples.
+                self._workers.give(worker, status == "ok" and not failed
+                                   and not self._worn(worker))
+            # A crash is retried once on a fresh worker: it may be down
+            # to the old process rather than to this sample.
+            if status != "exited":
+                break
+
+        if status == "timeout":
+            return TimedOut.of(self.outputs)
+        if failed:
+            raise RuntimeError(
+                f"ngspice {'exited' if status == 'exited' else 'failed'} "
+                f"and produced no .meas output — likely a template "
+                f"error.\noutput (last 2k):\n"
+                f"{chr(10).join(lines)[-2000:]}"
+            )
+        return {name: parsed.get(name, float("nan"))
+                for name in self.outputs}
+
+    def _worn(self, worker):
+        if self.max_runs is not None and worker.runs >= self.max_runs:
+            return True
+        if self.max_rss is not None:
+            rss = _rss(worker.proc.pid)
+            return rss is not None and rss > self.max_rss
+        return False
+
+
+class _Workers:
+    """Idle workers of one pool, started on demand up to ``size``."""
+
+    def __init__(self, size):
+        self.size = size
+        self.idle = queue.LifoQueue()
+        self.started = 0
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.all = set()
+
+    def take(self, ngspice, cwd, work_area):
+        if self.pid != os.getpid():     # forked: the workers aren't ours
+            self.__init__(self.size)
+        while True:
+            with self.lock:
+                start = self.idle.empty() and self.started < self.size
+                if start:
+                    self.started += 1
+            if start:
+                break
+            worker = self.idle.get()
+            if worker is not None:
+                return worker
+            # ``None``: a worker was retired, freeing a slot.
+        try:
+            worker = _Worker(ngspice, cwd, work_area)
+        except BaseException:
+            with self.lock:
+                self.started -= 1
+            raise
+        with self.lock:
+            self.all.add(worker)
+        return worker
+
+    def give(self, worker, keep):
+        """Return ``worker`` to the pool, or retire it. A worker taken
+        before ``close()`` is retired either way."""
+        with self.lock:
+            if keep and worker in self.all:
+                self.idle.put(worker)
+                return
+        worker.close()
+        with self.lock:
+            if worker not in self.all:
+                return
+            self.all.discard(worker)
+            self.started -= 1
+        self.idle.put(None)
+
+    def close(self):
+        with self.lock:
+            workers, self.all = self.all, set()
+            self.started = 0
+            while True:
+                try:
+                    self.idle.get_nowait()
+                except queue.Empty:
+                    break
+            # Wake takers blocked on the queue: every slot is free.
+            for _ in range(self.size):
+                self.idle.put(None)
+        for worker in workers:
+            worker.close()
@@ -0,0 +1,382 @@
+"""Importance sampling for ppm-level failure rates.
+
+Plain MC needs ~10/p samples to see ten failures at rate ``p``: ten
+million ngspice runs for a 1 ppm spec. ``analyze(importance=...)``
+instead draws from a *shifted* distribution that puts a good fraction
+of its samples near the failure boundary, and weights each sample by
+the likelihood ratio ``w = p(z) / q(z)`` so the failure-rate estimate
+stays unbiased for the real tolerance distribution.
+
+Everything happens in standard-normal space: each component (and
+``T``) is one coordinate ``z_i``, mapped to a value through its
+sampler exactly as ``sampling="sobol"`` does through ``Sampler.ppf``.
+The shift is a mean shift to the most probable failure point
+("design point") of each binding spec edge, found by either
+
+- ``shift="linearized"`` — central differences at the nominal
+  (``1 + 2·d`` metric calls, the ``Linearized`` ranker's recipe, but
+  in z-space), then the closest point on each linearised spec edge;
+  or
+- ``shift="pilot"`` — a short MC with inflated spread
+  (``pilot_scale``·σ) and the lowest-‖z‖ failing sample per spec
+  edge. Slower, but doesn't assume the metric is linear.
+
+Several spec edges give a mixture of shifts, weighted by their
+linearised failure probability ``Φ(-β)``, plus a small defensive
+unshifted component that bounds every weight at ``1 / defensive``.
+
+The estimate is unbiased whatever the shift; a poor shift only costs
+variance, which shows up as a wide interval and a low effective
+sample size. ``Additive`` tempco drift coefficients are drawn from
+their normal distribution and don't enter the weights.
+"""
+from dataclasses import dataclass
+from typing import Union
+
+import numpy as np
+from scipy.special import logsumexp
+from scipy.stats import norm
+
+from .analyze import (_as_metric_arrays, _apply_tempcos,
+                      _count_failure_modes, _map_gaussian_space,
+                      _pass_matrix)
+from .report import ImportanceResult, MetricStats, YieldReport
+from .sequential import wilson_interval
+from .tempco import Additive
+
+
+_VALID_SHIFTS = {"linearized", "pilot"}
+# Mixture components carrying less than this fraction of the total
+# linearised failure probability are dropped — they'd take samples
+# from the edges that actually bind.
+_MIN_COMPONENT_SHARE = 1e-3
+
+
+@dataclass
+class ImportanceSampling:
+    """Rare-event mode for ``analyze(importance=...)``.
+
+    Args:
+        shift: ``"linearized"`` (default), ``"pilot"``, or an explicit
+            ``{name: shift_in_σ}`` dict (or a list of them for a
+            mixture) in standard-normal units — ``{"R1": -4.5}`` moves
+            R1's sampling mean 4.5σ low. Use ``"T"`` for temperature.
+        n_pilot: Pilot MC size for ``shift="pilot"``. Default 2000.
+        pilot_scale: σ multiplier for the pilot draw, so it reaches
+            the tails. Default 2.5.
+        eps: Central-difference step in σ units for
+            ``shift="linearized"``. Default 0.1.
+        defensive: Fraction of samples drawn unshifted. Caps each
+            likelihood ratio at ``1 / defensive`` so one unlucky sample
+            can't dominate. Default 0.1.
+        confidence: Level of the report's ``yield_interval``. Default
+            0.95.
+    """
+    shift: Union[str, dict, list] = "linearized"
+    n_pilot: int = 2000
+    pilot_scale: float = 2.5
+    eps: float = 0.1
+    defensive: float = 0.1
+    confidence: float = 0.95
+
+    def __post_init__(self):
+        if isinstance(self.shift, str) and self.shift not in _VALID_SHIFTS:
+            raise ValueError(
+                f"Unknown shift: {self.shift!r}. Valid: "
+                f"{sorted(_VALID_SHIFTS)}, or a {{name: shift}} dict"
+            )
+        if self.n_pilot < 1:
+            raise ValueError(f"n_pilot must be >= 1, got {self.n_pilot}")
+        if self.pilot_scale <= 0:
+            raise ValueError(
+                f"pilot_scale must be positive, got {self.pilot_scale}"
+            )
+        if self.eps <= 0:
+            raise ValueError(f"eps must be positive, got {self.eps}")
+        if not (0 <= self.defensive < 1):
+            raise ValueError(
+                f"defensive must be in [0, 1), got {self.defensive}"
+            )
+        if not (0 < self.confidence < 1):
+            raise ValueError(
+                f"confidence must be in (0, 1), got {self.confidence}"
+            )
+
+
+def _fail_edges(op, threshold, nominal):
+    """``[(bound, side), ...]`` — the metric fails beyond ``bound`` in
+    direction ``side`` (+1 above, -1 below)."""
+    if op in ("<", "<="):
+        return [(threshold, 1)]
+    if op in (">", ">="):
+        return [(threshold, -1)]
+    if op == "within":
+        margin = abs(nominal) * threshold
+        return [(nominal + margin, 1), (nominal - margin, -1)]
+    if op == "within_db":
+        if nominal is None or nominal <= 0:
+            return []
+        ratio = 10.0 ** (threshold / 20.0)
+        return [(nominal * ratio, 1), (nominal / ratio, -1)]
+    return []
+
+
+def _gradient_shifts(cfg, evaluate, d, spec, nominal_metrics):
+    """Design points of the linearised spec edges: ``[(β, μ), ...]``."""
+    Z = np.zeros((1 + 2 * d, d))
+    Z[1:1 + d] = cfg.eps * np.eye(d)
+    Z[1 + d:] = -cfg.eps * np.eye(d)
+    arrays = evaluate(Z)
+    found = []
+    for spec_name, (op, thr) in spec.items():
+        g = arrays[spec_name]
+        g0 = g[0]
+        grad = (g[1:1 + d] - g[1 + d:]) / (2.0 * cfg.eps)
+        norm_a = float(np.linalg.norm(grad))
+        if not (np.isfinite(g0) and np.isfinite(norm_a)) or norm_a == 0:
+            continue
+        for bound, side in _fail_edges(op, thr,
+                                       nominal_metrics.get(spec_name)):
+            # Distance (in σ) from z=0 to the plane g0 + a·z = bound,
+            # moving the way that fails. β ≤ 0: the nominal already
+            # fails this edge, so it's not rare — no shift needed.
+            beta = max(side * (bound - g0) / norm_a, 0.0)
+            found.append((beta, side * beta * grad / norm_a))
+    return found, Z.shape[0]
+
+
+def _pilot_shifts(cfg, evaluate, d, spec, nominal_metrics, rng):
+    """Lowest-‖z‖ failing pilot sample per spec edge: ``[(β, μ), ...]``."""
+    Z = cfg.pilot_scale * rng.standard_normal((cfg.n_pilot, d))
+    arrays = evaluate(Z)
+    passed = _pass_matrix(arrays, spec, nominal_metrics)
+    radius = np.linalg.norm(Z, axis=1)
+    found = []
+    for j, (spec_name, (op, thr)) in enumerate(spec.items()):
+        g = arrays[spec_name]
+        ref = nominal_metrics.get(spec_name)
+        if op in ("<", "<="):
+            side = np.ones(len(g))
+        elif op in (">", ">="):
+            side = -np.ones(len(g))
+        else:
+            side = np.sign(g - ref)
+        failing = ~passed[:, j]
+        # NaN metrics fail on their own: their own "edge".
+        for edge in (1.0, -1.0, np.nan):
+            rows = np.flatnonzero(
+                failing & (np.isnan(side) if np.isnan(edge)
+                           else side == edge)
+            )
+            if rows.size:
+                best = rows[np.argmin(radius[rows])]
+                found.append((float(radius[best]), Z[best].copy()))
+    if not found:
+        raise RuntimeError(
+            f"importance pilot saw no failures in {cfg.n_pilot} samples "
+            f"at {cfg.pilot_scale}σ spread; raise n_pilot or "
+            f"pilot_scale, or use shift='linearized'"
+        )
+    return found, Z.shape[0]
+
+
+def _explicit_shifts(shift, dims):
+    unknown = sorted({k for s in shift for k in s} - set(dims))
+    if unknown:
+        raise ValueError(
+            f"importance shift names unknown dimension(s) {unknown}; "
+            f"known: {dims}"
+        )
+    found = []
+    for s in shift:
+        mu = np.array([float(s.get(nm, 0.0)) for nm in dims])
+        found.append((float(np.linalg.norm(mu)), mu))
+    return found
+
+
+def _mixture(found, d, defensive):
+    """``(alphas, mus)`` for the sampling mixture: one component per
+    design point, weighted by its linearised failure probability
+    ``Φ(-β)``, plus the unshifted defensive component."""
+    betas = np.array([b for b, _ in found])
+    mus = np.array([m for _, m in found]).reshape(len(found), d)
+    share = norm.sf(betas)
+    if share.sum() > 0:
+        share = share / share.sum()
+    else:
+        share = np.full(len(found), 1.0 / len(found))
+    keep = share >= _MIN_COMPONENT_SHARE
+    alphas = (1.0 - defensive) * share[keep] / share[keep].sum()
+    mus = mus[keep]
+    if defensive > 0:
+        alphas = np.append(alphas, defensive)
+        mus = np.vstack([mus, np.zeros(d)])
+    return alphas, mus
+
+
+def _log_weights(Z, alphas, mus):
+    """``log p(z)/q(z)`` for standard-normal ``p`` and the Gaussian
+    mixture ``q = Σ α_k N(μ_k, I)``. The ‖z‖² terms cancel, leaving
+    ``-log Σ α_k exp(μ_k·z - ‖μ_k‖²/2)``."""
+    exponents = Z @ mus.T - 0.5 * np.sum(mus * mus, axis=1)
+    return -logsumexp(exponents, axis=1, b=alphas)
+
+
+def _weighted_metric_stats(arr, w):
+    """Self-normalised, likelihood-ratio-weighted ``MetricStats`` —
+    the real-distribution statistics from a shifted draw."""
+    mask = np.isfinite(arr)
+    x, w = arr[mask], w[mask]
+    if x.size == 0 or w.sum() <= 0:
+        nan = float("nan")
+        return MetricStats(min=nan, max=nan, mean=nan, std=nan,
+                           p1=nan, p5=nan, p50=nan, p95=nan, p99=nan,
+                           skew=nan, excess_kurtosis=nan)
+    order = np.argsort(x, kind="stable")
+    x, w = x[order], w[order] / w.sum()
+    centres = np.cumsum(w) - 0.5 * w
+    p1, p5, p50, p95, p99 = np.interp([0.01, 0.05, 0.50, 0.95, 0.99],
+                                      centres, x)
+    mean = float(np.sum(w * x))
+    d = x - mean
+    std = float(np.sqrt(np.sum(w * d * d)))
+    if std > 0:
+        skew = float(np.sum(w * d ** 3) / std ** 3)
+        excess_kurt = float(np.sum(w * d ** 4) / std ** 4 - 3.0)
+    else:
+        skew = 0.0
+        excess_kurt = 0.0
+    return MetricStats(
+        min=float(x[0]), max=float(x[-1]), mean=mean, std=std,
+        p1=float(p1), p5=float(p5), p50=float(p50),
+        p95=float(p95), p99=float(p99),
+        skew=skew, excess_kurtosis=excess_kurt,
+    )
+
+
+def _weighted_failure_modes(fail, w, spec_names):
+    """``{frozenset(failing_specs): ppm}`` from a boolean fail matrix
+    and per-sample weights."""
+    rows = fail.any(axis=1)
+    if not rows.any():
+        return {}
+    patterns, inverse = np.unique(fail[rows], axis=0, return_inverse=True)
+    mass = np.bincount(inverse.reshape(-1), weights=w[rows])
+    return {
+        frozenset(spec_names[j] for j in np.flatnonzero(row)):
+            1e6 * float(m) / fail.shape[0]
+        for row, m in zip(patterns, mass)
+    }
+
+
+def _weighted_estimates(passed, w, spec_names, confidence):
+    """Weighted yield / per-spec / failure-mode estimates (the
+    spec-dependent ``ImportanceResult`` fields, as a dict) and the
+    ``yield_interval`` for a pass matrix.
+
+    The interval is Wilson's at the sample size whose binomial variance
+    matches the weighted estimate's, ``p(1-p) / se²`` — the normal
+    interval, made asymmetric near 100 %. With no weighted failures
+    there is no ``se`` to match, and it falls back to the weights'
+    effective sample size: an open interval below 100 %, not a point."""
+    n = passed.shape[0]
+    wf = w * ~passed.all(axis=1)
+    p_fail = float(wf.mean())
+    p = min(max(1.0 - p_fail, 0.0), 1.0)
+    se2 = float(wf.var(ddof=1)) / n if n > 1 else 0.0
+    if p * (1.0 - p) > 0 and se2 > 0:
+        n_wilson = p * (1.0 - p) / se2
+    else:
+        n_wilson = float(w.sum() ** 2 / np.sum(w * w))
+    lo, hi = wilson_interval(p * n_wilson, n_wilson, confidence)
+    interval = (100.0 * lo, 100.0 * hi)
+    estimates = dict(
+        yield_pct=100.0 * (1.0 - p_fail),
+        per_spec_pct={
+            k: 100.0 * (1.0 - float(np.mean(w * ~passed[:, j])))
+            for j, k in enumerate(spec_names)
+        },
+        failure_modes_ppm=_weighted_failure_modes(~passed, w, spec_names),
+    )
+    return estimates, interval
+
+
+def _analyze_importance(cfg, evaluator, *, rng, samplers, names,
+                        correlations, temperature, tempcos,
+                        temperature_nominal, n_mc, spec, nominal_metrics,
+                        metric_keys, vectorized):
+    """Importance-sampling tail of ``analyze``."""
+    dims = names + (["T"] if temperature is not None else [])
+    d = len(dims)
+    # The shift search differentiates the metrics, so per-part drift
+    # coefficients are pinned at their means there; random draws would
+    # turn the central differences into noise.
+    search_tempcos = {
+        k: (Additive(sigma=0.0, mean=tc.mean) if isinstance(tc, Additive)
+            else tc)
+        for k, tc in tempcos.items()
+    }
+
+    def evaluate(Z, tcs=tempcos):
+        samples, T_samples = _map_gaussian_space(Z, samplers, names,
+                                                 correlations, temperature)
+        samples, T_samples = _apply_tempcos(rng, samples, T_samples, names,
+                                            tcs, temperature_nominal)
+        return _as_metric_arrays(evaluator(samples, T_samples),
+                                 metric_keys, Z.shape[0], vectorized)
+
+    def search_evaluate(Z):
+        return evaluate(Z, search_tempcos)
+
+    with evaluator:
+        if cfg.shift == "linearized":
+            found, search_n = _gradient_shifts(cfg, search_evaluate, d,
+                                               spec, nominal_metrics)
+            if not found:
+                raise RuntimeError(
+                    "importance shift='linearized' found no spec metric "
+                    "that responds to the components at the nominal; "
+                    "use shift='pilot' or an explicit shift"
+                )
+        elif cfg.shift == "pilot":
+            found, search_n = _pilot_shifts(cfg, search_evaluate, d, spec,
+                                            nominal_metrics, rng)
+        else:
+            shifts = cfg.shift if isinstance(cfg.shift, list) \
+                else [cfg.shift]
+            found, search_n = _explicit_shifts(shifts, dims), 0
+        alphas, mus = _mixture(found, d, cfg.defensive)
+
+        component = rng.choice(len(alphas), size=n_mc, p=alphas)
+        Z = rng.standard_normal((n_mc, d)) + mus[component]
+        w = np.exp(_log_weights(Z, alphas, mus))
+        arrays = evaluate(Z)
+
+    spec_names = list(spec)
+    passed = _pass_matrix(arrays, spec, nominal_metrics)
+    fail = ~passed.all(axis=1)
+    estimates, interval = _weighted_estimates(passed, w, spec_names,
+                                              cfg.confidence)
+    importance = ImportanceResult(
+        **estimates,
+        effective_sample_size=float(w.sum() ** 2 / np.sum(w * w)),
+        weights=w,
+        shifts=[(float(a), dict(zip(dims, map(float, mu))))
+                for a, mu in zip(alphas, mus)],
+        search_evaluations=search_n,
+    )
+    return YieldReport(
+        samples_total=n_mc,
+        samples_pass=int(n_mc - fail.sum()),
+        per_spec_pass={k: int(passed[:, j].sum())
+                       for j, k in enumerate(spec_names)},
+        nominal_metrics=nominal_metrics,
+        metric_stats={k: _weighted_metric_stats(arr, w)
+                      for k, arr in arrays.items()},
+        failure_modes=_count_failure_modes(~passed, spec_names),
+        metric_samples=arrays,
+        spec=dict(spec),
+        yield_interval=interval,
+        interval_confidence=cfg.confidence,
+        importance=importance,
+    )
@@ -0,0 +1,224 @@
+"""Fast readers for ngspice waveform output.
+
+``np.loadtxt`` goes through a ``wrdata`` table line by line in Python,
+and for a long transient with a dozen vectors that can take longer
+than the simulation did. Two faster paths:
+
+- ``read_raw(path)``: a rawfile written by ``write``. Binary data —
+  ngspice's default ``filetype``, or ``set filetype=binary`` — is
+  memory-mapped, not read: each plot's ``data`` is a structured array
+  over the file, one field per vector, and ``plot["v(out)"]`` is a
+  view of that column. Only the pages a vector touches are ever
+  loaded. ASCII rawfiles are parsed into the same structure.
+- ``read_wrdata(path)``: a ``wrdata`` table as the 2-D array
+  ``np.loadtxt`` would give, parsed in C by ``np.fromfile``.
+
+``NgspiceBackend(waveforms=...)`` has ngspice ``write`` a binary
+rawfile per sample and computes measurements from it with
+``read_raw``.
+"""
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+import numpy as np
+
+
+@dataclass
+class RawPlot:
+    """One plot (analysis) of a rawfile.
+
+    Attributes:
+        title: The circuit title.
+        plotname: ngspice's name for the analysis, e.g.
+            ``"Transient Analysis"``.
+        flags: ``"real"`` or ``"complex"`` (plus ``"padded"`` etc. as
+            written).
+        variables: ``(name, type)`` of each vector, in file order; the
+            first is the scale (``time``, ``frequency``, ...).
+        data: Structured array, one record per point and one field per
+            vector — ``float64``, or ``complex128`` for a complex plot
+            (its scale too). A ``np.memmap`` for binary rawfiles.
+        date: The ``Date:`` line, if any.
+    """
+    title: str
+    plotname: str
+    flags: str
+    variables: List[Tuple[str, str]]
+    data: np.ndarray
+    date: str = ""
+    _fields: dict = field(default=None, init=False, repr=False,
+                          compare=False)
+
+    @property
+    def names(self):
+        """Vector names, in file order."""
+        return [name for name, _ in self.variables]
+
+    @property
+    def is_complex(self):
+        return "complex" in self.flags.lower().split()
+
+    @property
+    def scale(self):
+        """The first vector — ``time`` for a transient."""
+        return self.data[self.variables[0][0]]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __contains__(self, name):
+        return self._field(name) is not None
+
+    def __getitem__(self, name):
+        """Vector ``name`` as a view of ``data`` — no copy. Matched
+        exactly, then case-insensitively, then with or without
+        ``v(...)``: ``"out"`` finds ``v(out)`` and vice versa."""
+        key = self._field(name)
+        if key is None:
+            raise KeyError(f"no vector {name!r} in plot "
+                           f"{self.plotname!r}; have {self.names}")
+        return self.data[key]
+
+    def _field(self, name):
+        if self._fields is None:
+            self._fields = {}
+            for key in self.names:
+                lowered = key.lower()
+                self._fields.setdefault(lowered, key)
+                if lowered.startswith("v(") and lowered.endswith(")"):
+                    self._fields.setdefault(lowered[2:-1], key)
+                else:
+                    self._fields.setdefault(f"v({lowered})", key)
+        if name in self.data.dtype.names:
+            return name
+        return self._fields.get(name.lower())
+
+
+def read_raw(path):
+    """Every plot in ngspice rawfile ``path``, as ``RawPlot`` s in file
+    order — ``read_raw(path)[-1]`` is the last analysis written.
+
+    A binary plot whose data stops short of its ``No. Points`` (the
+    run was killed mid-write) is read up to its last whole point.
+    """
+    plots = []
+    with open(path, "rb") as f:
+        while True:
+            header = _read_header(f)
+            if header is None:
+                return plots
+            fmt, meta, variables, n_points = header
+            complex_ = "complex" in meta.get("flags", "").lower().split()
+            dtype = np.dtype([(name, "<c16" if complex_ else "<f8")
+                              for name, _ in variables])
+            if fmt == "binary":
+                data, end = _map_binary(f, path, dtype, n_points)
+                f.seek(end)
+            else:
+                data = _read_values(f, dtype, n_points, complex_)
+            plots.append(RawPlot(
+                title=meta.get("title", ""),
+                plotname=meta.get("plotname", ""),
+                flags=meta.get("flags", "real"),
+                variables=variables, data=data,
+                date=meta.get("date", "")))
+
+
+def _read_header(f):
+    """``(format, {key: value}, variables, n_points)`` for the next
+    plot, leaving ``f`` at the start of its data; ``None`` at the end
+    of the file."""
+    meta = {}
+    variables = []
+    n_vars = None
+    while True:
+        line = f.readline()
+        if not line:
+            if meta:
+                raise ValueError(f"rawfile header without data: {meta}")
+            return None
+        text = line.decode("latin-1").rstrip("\r\n")
+        if not text.strip() and not meta:
+            continue
+        key, _, value = text.partition(":")
+        key = key.strip().lower()
+        if key in ("binary", "values"):
+            if n_vars is None or len(variables) != n_vars:
+                raise ValueError(
+                    f"rawfile header lists {len(variables)} variables, "
+                    f"expected {n_vars}")
+            return key, meta, variables, int(meta["no. points"])
+        if key == "variables":
+            n_vars = int(meta["no. variables"])
+            for _ in range(n_vars):
+                fields = f.readline().decode("latin-1").split()
+                if len(fields) < 3:
+                    raise ValueError(
+                        f"bad rawfile variable line: {' '.join(fields)!r}")
+                variables.append((fields[1], fields[2]))
+        else:
+            meta[key] = value.strip()
+
+
+def _map_binary(f, path, dtype, n_points):
+    """The plot's records as a read-only ``np.memmap`` at ``f``'s
+    position, and the offset where they end — past the end of the
+    file if it was cut short."""
+    offset = f.tell()
+    end = offset + n_points * dtype.itemsize
+    f.seek(0, 2)
+    n_points = min(n_points, (f.tell() - offset) // dtype.itemsize)
+    if n_points == 0:
+        return np.zeros(0, dtype), end
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset,
+                     shape=(n_points,)), end
+
+
+def _read_values(f, dtype, n_points, complex_):
+    """An ASCII ``Values:`` section: per point its index, then one
+    value per line (``re,im`` if complex)."""
+    n_vars = len(dtype.names)
+    width = n_vars * (2 if complex_ else 1) + 1
+    tokens = []
+    needed = n_points * width
+    while len(tokens) < needed:
+        position = f.tell()
+        line = f.readline()
+        if not line:
+            break
+        if line[:1].isalpha():          # next plot's header: truncated
+            f.seek(position)
+            break
+        tokens += line.replace(b",", b" ").split()
+    values = np.array(tokens[:len(tokens) // width * width],
+                      dtype=float).reshape(-1, width)[:, 1:]
+    if complex_:
+        values = values[:, 0::2] + 1j * values[:, 1::2]
+    data = np.empty(len(values), dtype)
+    for i, name in enumerate(dtype.names):
+        data[name] = values[:, i]
+    return data
+
+
+def read_wrdata(path):
+    """A ``wrdata`` file as a 2-D float array, one row per point and
+    one column per field — what ``np.loadtxt(path)`` returns, several
+    times faster. A header line (``set wr_vecnames``) is skipped, and a
+    last row cut short by a killed run is dropped."""
+    with open(path, "rb") as f:
+        first = f.readline()
+        fields = first.split()
+        if not fields:
+            return np.empty((0, 0))
+        try:
+            [float(x) for x in fields]
+        except ValueError:
+            pass                        # header line: data starts after it
+        else:
+            f.seek(0)
+        values = np.fromfile(f, sep=" ")
+    n_cols = len(fields)
+    return values[:len(values) // n_cols * n_cols].reshape(-1, n_cols)
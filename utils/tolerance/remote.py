@@ -11,12 +11,16 @@ to hours of compute. The user's HV2/HV3 cluster has 96–128 cores; a
 remote-dispatched sweep that saturates them runs ~50× faster than the
 14-core local box.
 """
+import copy
 import itertools
 import shutil
 import subprocess
 import threading
 
-from .ngspice import _parse_meas_output, _signature
+from .netlist import netlist_digest
+from .ngspice import (TimedOut, _batch_netlist, _batch_results,
+                      _check_batch_size, _param_names,
+                      _parse_meas_output, _signature, _text)
 
 
 _DEFAULT_CONTROL_PATH = "/tmp/tolerance-cm-%C"
@@ -71,7 +75,8 @@ class RemoteNgspiceBackend:
             if it lives at a non-PATH location on the remote.
         timeout: Per-call wall-clock timeout including ssh overhead.
             Default 120 s (more generous than local default since the
-            first call also pays ControlMaster setup).
+            first call also pays ControlMaster setup). ``with_timeout``
+            gives a copy with another.
         control_path: ssh ControlPath template. Default
             ``/tmp/tolerance-cm-%C`` (per-host hash). Set to ``None``
             to disable connection multiplexing entirely (~10x slower
@@ -88,11 +93,15 @@ class RemoteNgspiceBackend:
             is fine for serial / lightly-parallel use. When > 1, a
             ``-{slot}`` suffix is appended to ``control_path`` if it
             doesn't already contain ``{slot}``.
+        batch_size: Samples per ngspice run, as for
+            ``NgspiceBackend`` — and so per ssh round-trip. Default 1.
 
     Failure handling matches the local backend:
 
     - ``.meas`` missing or ``= failed`` → that output is NaN.
-    - ssh / subprocess timeout → all outputs NaN.
+    - ssh / subprocess timeout → all outputs NaN, as a ``TimedOut``
+      (an overloaded host is the usual cause; ``CachedBackend``
+      retries these).
     - Remote ngspice exits non-zero with no parseable measurements →
       raise ``RuntimeError``. This catches template errors, missing
       remote dependencies, etc. — failing loudly is better than
@@ -106,12 +115,14 @@ class RemoteNgspiceBackend:
                  ssh="ssh", ngspice="ngspice", timeout=120.0,
                  control_path=_DEFAULT_CONTROL_PATH,
                  control_persist="600",
-                 n_control_connections=1):
+                 n_control_connections=1, batch_size=1):
         if not (callable(template) or isinstance(template, str)):
             raise TypeError(
                 "template must be a callable (**values) -> str or a "
                 "format string"
             )
+        self._params = _param_names(template)
+        _check_batch_size(batch_size, self._params)
         if shutil.which(ssh) is None:
             raise RuntimeError(f"ssh binary not found: {ssh!r}")
         if n_control_connections < 1:
@@ -128,6 +139,7 @@ class RemoteNgspiceBackend:
         self.control_persist = str(control_persist) if control_persist \
                                is not None else None
         self.n_control_connections = n_control_connections
+        self.batch_size = batch_size
         if (control_path is not None and n_control_connections > 1
                 and "{slot}" not in control_path):
             control_path = control_path + "-{slot}"
@@ -162,38 +174,76 @@ class RemoteNgspiceBackend:
                 args += ["-o", f"ControlPersist={self.control_persist}"]
         return args
 
+    def with_timeout(self, timeout):
+        """This backend with a different ``timeout``, sharing its ssh
+        connections — as ``NgspiceBackend.with_timeout``."""
+        other = copy.copy(self)
+        other.timeout = timeout
+        return other
+
+    def netlist_key(self, **values):
+        """Content hash of the netlist rendered for ``values`` plus
+        ``outputs``, as ``NgspiceBackend.netlist_key`` — so local and
+        remote runs of one circuit share entries. ``.include`` files
+        are hashed from the local copy at the same path; one that
+        exists only on the remote host is hashed by its path."""
+        return netlist_digest(self._render(values), self.outputs)
+
     def _render(self, values):
         if callable(self.template):
             return self.template(**values)
         return self.template.format(**values)
 
     def __call__(self, **values):
-        netlist = self._render(values)
-        remote_cmd = _REMOTE_CMD.format(ngspice=self.ngspice)
-        try:
-            result = subprocess.run(
-                [*self._ssh_args(), self.host, remote_cmd],
-                input=netlist, capture_output=True, text=True,
-                timeout=self.timeout,
-            )
-        except subprocess.TimeoutExpired:
-            return {name: float("nan") for name in self.outputs}
+        returncode, stdout, stderr = self._exec(self._render(values),
+                                                self.timeout)
+        if returncode is None:
+            return TimedOut.of(self.outputs)
 
-        parsed = _parse_meas_output(result.stdout)
+        parsed = _parse_meas_output(stdout)
 
-        if result.returncode != 0 and not parsed:
+        if returncode != 0 and not parsed:
             raise RuntimeError(
                 f"remote ngspice on {self.host!r} failed "
-                f"(returncode {result.returncode}) and produced no "
+                f"(returncode {returncode}) and produced no "
                 f".meas output — likely a template error, missing "
                 f"remote dependency, or ssh failure.\n"
-                f"stdout (last 2k):\n{result.stdout[-2000:]}\n"
-                f"stderr (last 2k):\n{result.stderr[-2000:]}"
+                f"stdout (last 2k):\n{stdout[-2000:]}\n"
+                f"stderr (last 2k):\n{stderr[-2000:]}"
             )
 
         return {name: parsed.get(name, float("nan"))
                 for name in self.outputs}
 
+    def run_many(self, values_list):
+        """As ``NgspiceBackend.run_many``: ``batch_size`` samples per
+        ngspice run, so one ssh round-trip per chunk."""
+        results = []
+        for a in range(0, len(values_list), self.batch_size):
+            chunk = values_list[a:a + self.batch_size]
+            if len(chunk) == 1:
+                results.append(self(**chunk[0]))
+                continue
+            returncode, stdout, _ = self._exec(
+                _batch_netlist(self.template, self._params, chunk),
+                self.timeout * len(chunk))
+            results += _batch_results(self, chunk, returncode, stdout)
+        return results
+
+    def _exec(self, netlist, timeout):
+        """Run ngspice on ``netlist`` over ssh: ``(returncode, stdout,
+        stderr)``, returncode ``None`` on timeout."""
+        remote_cmd = _REMOTE_CMD.format(ngspice=self.ngspice)
+        try:
+            result = subprocess.run(
+                [*self._ssh_args(), self.host, remote_cmd],
+                input=netlist, capture_output=True, text=True,
+                timeout=timeout,
+            )
+        except subprocess.TimeoutExpired as exc:
+            return None, _text(exc.stdout), _text(exc.stderr)
+        return result.returncode, result.stdout, result.stderr
+
     def close_connection(self):
         """Tear down every shared ssh ControlMaster socket for this
         host (one per slot when ``n_control_connections > 1``). Safe
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Any, Optional, Tuple
 
 
 def _pass_region(op, threshold, nominal):
@@ -54,6 +55,97 @@ class MetricStats:
     excess_kurtosis: float
 
 
+@dataclass
+class ImportanceResult:
+    """Likelihood-ratio-weighted estimates from
+    ``analyze(importance=...)``. The enclosing report's raw counts
+    (``samples_pass``, ``per_spec_pass``, ``failure_modes``) describe
+    the *shifted* draw the simulator actually saw; the numbers here
+    are the unbiased estimates for the real tolerance distribution."""
+    yield_pct: float
+    per_spec_pct: dict
+    """``{spec_name: weighted yield %}``."""
+    failure_modes_ppm: dict
+    """``{frozenset(failing_specs): weighted rate in ppm}``."""
+    effective_sample_size: float
+    """Kish ESS ``(Σw)² / Σw²`` of the likelihood-ratio weights. Well
+    below ~10 % of ``samples_total`` means a few heavy samples carry
+    the estimate and the shift is a poor fit — trust the interval
+    less, or re-run with ``shift="pilot"``."""
+    weights: Any
+    """``(samples_total,)`` likelihood ratios ``p(z)/q(z)``, row-aligned
+    with ``metric_samples``."""
+    shifts: list
+    """``[(mixture_weight, {name: shift_in_σ}), ...]`` — the sampling
+    density actually used. The zero shift is the defensive
+    component."""
+    search_evaluations: int = 0
+    """Metric evaluations spent finding the shift (gradient points or
+    pilot samples); not counted in ``samples_total``."""
+
+    @property
+    def failure_ppm(self):
+        return 1e4 * (100.0 - self.yield_pct)
+
+
+@dataclass
+class ControlVariateResult:
+    """Control-variate estimates from ``analyze(control_variate=...)``,
+    using the linearised metrics as controls. Same quantities as the
+    plain counts in the enclosing report, with the noise the linear
+    surrogate explains subtracted out."""
+    yield_pct: float
+    per_spec_pct: dict
+    """``{spec_name: yield %}``."""
+    metric_means: dict
+    """``{metric_name: mean}`` — compare ``metric_stats[...].mean``."""
+    yield_variance_reduction: float
+    """``var(plain) / var(controlled)`` for the joint yield — roughly
+    how many times more plain-MC samples the same interval width would
+    have needed."""
+    metric_variance_reduction: dict
+    """Same ratio per metric mean."""
+    surrogate_yield_pct: float
+    """Yield of the linear surrogate itself (what ``Linearized``
+    approximates analytically). Far from ``yield_pct`` means the
+    metrics aren't linear over their spread."""
+    jacobian_evaluations: int = 0
+    """Metric evaluations spent on the Jacobian; not counted in
+    ``samples_total``."""
+
+
+@dataclass
+class ThresholdCurve:
+    """Yield against one spec's threshold, from
+    ``YieldReport.threshold_curves``. All arrays are aligned with
+    ``thresholds``, in the order they were given."""
+    spec: str
+    op: str
+    thresholds: Any
+    """Threshold grid, in the spec's own units (the metric for ``<`` /
+    ``>``, the relative deviation for ``within``, dB for
+    ``within_db``)."""
+    yield_pct: Any
+    """Pass rate of this spec alone at each threshold."""
+    joint_yield_pct: Any
+    """Overall yield at each threshold, with every other spec held at
+    its current threshold — where this curve flattens, another spec
+    is binding."""
+
+
+@dataclass
+class YieldSurface:
+    """Joint yield over a grid of thresholds for two specs, from
+    ``YieldReport.yield_surface``; every other spec is held at its
+    current threshold."""
+    specs: Tuple[str, str]
+    ops: Tuple[str, str]
+    thresholds: Tuple[Any, Any]
+    """``(thresholds_a, thresholds_b)``, in the order they were given."""
+    joint_yield_pct: Any
+    """``(len(thresholds_a), len(thresholds_b))`` array of yields."""
+
+
 @dataclass
 class YieldReport:
     samples_total: int
@@ -82,16 +174,102 @@ class YieldReport:
     """``{metric_name: np.ndarray of shape (n_mc,)}`` — the raw per-sample
     metric values. Kept so plots can show the actual histogram (which
     percentiles can't reconstruct). Memory cost: ``n_mc × n_metrics × 8``
-    bytes — trivial at MC scales."""
+    bytes — trivial at MC scales. Under ``analyze(streaming=True)`` this
+    is instead a uniform reservoir subsample of at most
+    ``reservoir_size`` rows, the same rows for every metric."""
     spec: dict
     """The spec dict the report was computed against
     (``{name: (op, threshold)}``). Stored so plotting can overlay the
     fail region without the caller passing it again."""
+    yield_interval: Optional[Tuple[float, float]] = None
+    """``(lo_pct, hi_pct)`` confidence interval on ``yield_pct`` when
+    the run used ``early_stop=`` (binomial), ``importance=`` (on the
+    weighted estimate) or ``control_variate=`` (on the control-variate
+    estimate); ``None`` otherwise."""
+    interval_confidence: Optional[float] = None
+    """Confidence level of ``yield_interval``."""
+    stopped_early: bool = False
+    """``True`` when a sequential run stopped before its ``n_mc`` cap;
+    ``samples_total`` is then the number of samples actually used."""
+    control_variate: Optional[ControlVariateResult] = None
+    """Control-variate estimates when the run used ``control_variate=``;
+    ``yield_pct`` and ``yield_interval`` then refer to these."""
+    importance: Optional[ImportanceResult] = None
+    """Weighted estimates when the run used ``importance=``; ``yield_pct``
+    and ``yield_interval`` then refer to these, and ``metric_stats`` are
+    likelihood-ratio weighted."""
 
     @property
     def yield_pct(self):
+        if self.importance is not None:
+            return self.importance.yield_pct
+        if self.control_variate is not None:
+            return self.control_variate.yield_pct
+        return self._counted_pct
+
+    @property
+    def _counted_pct(self):
         return 100.0 * self.samples_pass / self.samples_total
 
+    def respec(self, spec):
+        """Re-evaluate the stored samples against a new spec dict —
+        no simulation, milliseconds even at 10⁶ samples.
+
+        Args:
+            spec: ``{name: (op, threshold)}`` as for ``analyze``; names
+                may be any metric in ``metric_samples``.
+
+        Returns:
+            A new ``YieldReport``. ``metric_stats`` are shared with
+            this report. Importance-sampled reports are re-weighted
+            (the likelihood ratios don't depend on the spec); streaming
+            reports re-spec their reservoir subsample; control-variate
+            and early-stop intervals are dropped.
+        """
+        from .respec import respec
+        return respec(self, spec)
+
+    def threshold_curves(self, specs=None, thresholds=None, n_points=50):
+        """Yield-vs-threshold curve for every spec, in one vectorised
+        pass over the stored samples.
+
+        Args:
+            specs: Spec names to sweep; default all of ``spec``.
+            thresholds: ``{spec_name: array}`` grids for some or all of
+                the swept specs. Others get ``n_points`` evenly spaced
+                thresholds spanning the samples and the current
+                threshold (from 0 for ``within`` / ``within_db``).
+            n_points: Default grid size.
+
+        Returns:
+            ``{spec_name: ThresholdCurve}``, each holding the spec's own
+            pass rate and the joint yield with the other specs at their
+            current thresholds. Reading off where ``joint_yield_pct``
+            crosses the yield target answers "how much margin does
+            this spec need".
+        """
+        from .respec import threshold_curves
+        return threshold_curves(self, specs, thresholds, n_points)
+
+    def yield_surface(self, spec_a, spec_b, thresholds_a=None,
+                      thresholds_b=None, n_points=50):
+        """Joint yield over a grid of thresholds for two specs, with
+        every other spec held at its current threshold.
+
+        Args:
+            spec_a, spec_b: Spec names.
+            thresholds_a, thresholds_b: Threshold grids; default as in
+                ``threshold_curves``.
+            n_points: Default grid size per axis.
+
+        Returns:
+            ``YieldSurface`` — e.g. for trading an fc window against a
+            Q window at constant yield.
+        """
+        from .respec import yield_surface
+        return yield_surface(self, spec_a, spec_b, thresholds_a,
+                             thresholds_b, n_points)
+
     def plot(self, metrics=None, bins=50, fail_color="#d62728",
              fail_alpha=0.15):
         """Histogram of each metric with nominal/p5/p50/p95 markers and
@@ -130,8 +308,14 @@ class YieldReport:
             # NaN samples are real (failed simulations, undefined
             # measurements) but matplotlib's hist + set_xlim both
             # break on them. Annotate the count if any are present.
-            finite = arr[np.isfinite(arr)]
+            mask = np.isfinite(arr)
+            finite = arr[mask]
             n_nan = arr.size - finite.size
+            # Importance-sampled runs: weight each shifted-draw sample
+            # by its likelihood ratio so the histogram has the shape of
+            # the real tolerance distribution.
+            hist_weights = (self.importance.weights[mask]
+                            if self.importance is not None else None)
 
             if finite.size == 0:
                 ax.text(0.5, 0.5, "all samples NaN",
@@ -147,8 +331,8 @@ class YieldReport:
                   (abs(data_lo) * 0.01 + 1e-12)
             xlim_lo, xlim_hi = data_lo - pad, data_hi + pad
 
-            ax.hist(finite, bins=bins, color="#4c72b0",
-                    edgecolor="white", linewidth=0.3)
+            ax.hist(finite, bins=bins, weights=hist_weights,
+                    color="#4c72b0", edgecolor="white", linewidth=0.3)
 
             if name in self.spec:
                 op, thr = self.spec[name]
@@ -164,9 +348,14 @@ class YieldReport:
                     ax.axvspan(max(pass_hi, xlim_lo), xlim_hi,
                                color=fail_color, alpha=fail_alpha)
                 pass_count = self.per_spec_pass.get(name, 0)
-                pct = 100.0 * pass_count / self.samples_total
-                title = (f"{name}: {op} {thr}  →  "
-                         f"{pass_count}/{self.samples_total} ({pct:.1f}%)")
+                if self.importance is not None:
+                    pct = self.importance.per_spec_pct[name]
+                    title = f"{name}: {op} {thr}  →  {pct:.4f}% (IS)"
+                else:
+                    pct = 100.0 * pass_count / self.samples_total
+                    title = (f"{name}: {op} {thr}  →  "
+                             f"{pass_count}/{self.samples_total} "
+                             f"({pct:.1f}%)")
                 if n_nan > 0:
                     title += f"  [NaN: {n_nan}]"
                 ax.set_title(title)
@@ -197,19 +386,41 @@ class YieldReport:
         for j in range(n, nrows * ncols):
             axes[j // ncols][j % ncols].axis("off")
 
+        if self.importance is not None:
+            headline = (f"yield: {self.yield_pct:.4f}% "
+                        f"({self.importance.failure_ppm:.3g} ppm fail, "
+                        f"importance-sampled)")
+        else:
+            headline = (f"yield: {self.samples_pass}/{self.samples_total}"
+                        f" = {self._counted_pct:.2f}%")
         fig.suptitle(
-            f"yield: {self.samples_pass}/{self.samples_total} = "
-            f"{self.yield_pct:.2f}%",
+            headline,
             fontsize=11,
         )
         fig.tight_layout()
         return fig
 
     def __str__(self):
+        if self.importance is not None:
+            return self._importance_str()
         lines = [
             f"yield: {self.samples_pass}/{self.samples_total} = "
-            f"{self.yield_pct:.2f}%"
+            f"{self._counted_pct:.2f}%"
         ]
+        if self.yield_interval is not None:
+            lo, hi = self.yield_interval
+            line = (f"  {100 * self.interval_confidence:g}% interval: "
+                    f"[{lo:.2f}%, {hi:.2f}%]")
+            if self.stopped_early:
+                line += " (stopped early)"
+            lines.append(line)
+        if self.control_variate is not None:
+            cv = self.control_variate
+            lines.append(
+                f"  control variate: {cv.yield_pct:.2f}% "
+                f"(variance ÷{cv.yield_variance_reduction:.3g}, "
+                f"linear surrogate {cv.surrogate_yield_pct:.2f}%)"
+            )
         for name, count in self.per_spec_pass.items():
             pct = 100.0 * count / self.samples_total
             nom = self.nominal_metrics.get(name)
@@ -230,3 +441,33 @@ class YieldReport:
                 pct = 100.0 * count / self.samples_total
                 lines.append(f"  {{{names}}}: {count} ({pct:.2f}%)")
         return "\n".join(lines)
+
+    def _importance_str(self):
+        imp = self.importance
+        lines = [
+            f"yield: {imp.yield_pct:.6f}% ({imp.failure_ppm:.4g} ppm fail)"
+            f" — importance-sampled, {self.samples_total} samples, "
+            f"ESS {imp.effective_sample_size:.0f}"
+        ]
+        if self.yield_interval is not None:
+            lo, hi = self.yield_interval
+            lines.append(
+                f"  {100 * self.interval_confidence:g}% interval: "
+                f"[{1e4 * (100 - hi):.4g}, {1e4 * (100 - lo):.4g}] ppm fail"
+            )
+        for name in self.per_spec_pass:
+            pct = imp.per_spec_pct[name]
+            line = (f"  {name}: {1e4 * (100 - pct):.4g} ppm fail "
+                    f"({self.samples_total - self.per_spec_pass[name]} "
+                    f"failing draws)")
+            nom = self.nominal_metrics.get(name)
+            if nom is not None:
+                line += f"  nominal={nom:.4g}"
+            lines.append(line)
+        if imp.failure_modes_ppm:
+            lines.append("failure modes:")
+            for failing, ppm in sorted(imp.failure_modes_ppm.items(),
+                                       key=lambda kv: -kv[1]):
+                names = ", ".join(sorted(failing))
+                lines.append(f"  {{{names}}}: {ppm:.4g} ppm")
+        return "\n".join(lines)
@@ -0,0 +1,260 @@
+"""Re-spec a finished ``YieldReport`` without re-simulating.
+
+A ``YieldReport`` keeps every sample's metrics in ``metric_samples``,
+so "what if the Q spec were ±12 % instead of ±10 %?" is a numpy
+comparison, not another MC run:
+
+- ``report.respec(spec)`` — a new report against a different spec
+  dict (thresholds, operators, or a different set of specs);
+- ``report.threshold_curves()`` — yield as each spec's threshold
+  sweeps a grid, both for that spec alone and jointly with every
+  other spec held at its current threshold;
+- ``report.yield_surface(a, b)`` — joint yield over a grid of
+  thresholds for two specs at once.
+
+Curves and surfaces don't re-compare per threshold. Each spec is
+reduced to a per-sample key whose pass set is monotone in the
+threshold (the metric value for ``<`` / ``>``, the relative or dB
+deviation from nominal for ``within`` / ``within_db``); one
+``searchsorted`` against the threshold grid gives every sample's first
+(or last) passing grid index, and a ``bincount`` plus a cumulative sum
+along each axis turns those into yields for the whole grid. A 50 × 50
+surface over 10⁶ samples costs about as much as a single re-spec.
+
+Importance-sampled reports stay weighted: the likelihood ratios are a
+property of the draw, not of the spec, so every estimate here is
+unbiased for any spec — but the shift was aimed at the *original*
+spec's failure region, and one far from it gets a noisy estimate.
+Streaming reports only hold their reservoir subsample, so re-specs
+count those rows. Control-variate and early-stop intervals are not
+carried over.
+"""
+from dataclasses import replace
+
+import numpy as np
+
+from .analyze import _VALID_OPS, _count_failure_modes, _pass_matrix
+from .report import ThresholdCurve, YieldReport, YieldSurface
+
+
+def _check_spec(report, spec):
+    for name, (op, _thr) in spec.items():
+        if name not in report.metric_samples:
+            raise KeyError(
+                f"spec {name!r} names no metric in the report's "
+                f"metric_samples; available: {sorted(report.metric_samples)}"
+            )
+        if op not in _VALID_OPS:
+            raise ValueError(
+                f"Unknown spec operator: {op!r}. Valid: {sorted(_VALID_OPS)}"
+            )
+    if report.metric_samples and not len(
+            next(iter(report.metric_samples.values()))):
+        raise ValueError("report holds no metric samples to re-spec")
+
+
+def _weights(report):
+    """Per-sample weights: likelihood ratios for an importance-sampled
+    report, ``None`` (all ones) otherwise."""
+    if report.importance is not None:
+        return np.asarray(report.importance.weights, dtype=float)
+    return None
+
+
+def respec(report, spec):
+    """``YieldReport`` for ``report``'s samples against ``spec``."""
+    _check_spec(report, spec)
+    spec = dict(spec)
+    spec_names = list(spec)
+    arrays = report.metric_samples
+    passed = _pass_matrix(arrays, spec, report.nominal_metrics)
+    n = passed.shape[0]
+    new = YieldReport(
+        samples_total=n,
+        samples_pass=int(passed.all(axis=1).sum()),
+        per_spec_pass={k: int(passed[:, j].sum())
+                       for j, k in enumerate(spec_names)},
+        nominal_metrics=report.nominal_metrics,
+        # Metric distributions don't depend on the spec.
+        metric_stats=report.metric_stats,
+        failure_modes=_count_failure_modes(~passed, spec_names),
+        metric_samples=arrays,
+        spec=spec,
+    )
+    if report.importance is not None:
+        from .rare_event import _weighted_estimates
+        confidence = report.interval_confidence or 0.95
+        estimates, interval = _weighted_estimates(
+            passed, _weights(report), spec_names, confidence)
+        new.importance = replace(report.importance, **estimates)
+        new.yield_interval = interval
+        new.interval_confidence = confidence
+    return new
+
+
+def _threshold_key(values, op, nominal):
+    """``(key, rising, side)`` for one spec: a sample passes threshold
+    ``t`` iff ``key <= t`` (``key < t`` when ``side == "right"``) if
+    ``rising``, else iff ``t < key`` (``t <= key`` when
+    ``side == "right"``). Samples that fail every threshold (NaN,
+    non-positive under ``within_db``) get a key that no grid value
+    passes."""
+    values = np.asarray(values, dtype=float)
+    if op in ("<", "<="):
+        return (np.where(np.isnan(values), np.inf, values), True,
+                "right" if op == "<" else "left")
+    if op in (">", ">="):
+        return (np.where(np.isnan(values), -np.inf, values), False,
+                "left" if op == ">" else "right")
+    if op == "within":
+        if nominal == 0:
+            raise ValueError(
+                "spec ('within', ...) requires non-zero nominal metric"
+            )
+        dev = np.abs(values - nominal) / abs(nominal)
+        return np.where(np.isnan(dev), np.inf, dev), True, "left"
+    if op == "within_db":
+        if nominal is None or nominal <= 0:
+            return np.full(values.shape, np.inf), True, "left"
+        positive = values > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            db = np.abs(20.0 * np.log10(np.where(positive, values, 1.0)
+                                        / nominal))
+        return np.where(positive, db, np.inf), True, "left"
+    raise ValueError(
+        f"Unknown spec operator: {op!r}. Valid: {sorted(_VALID_OPS)}"
+    )
+
+
+def _default_grid(key, op, threshold, n_points):
+    """``n_points`` thresholds spanning the samples' keys and the
+    current threshold."""
+    finite = key[np.isfinite(key)]
+    lo = min(float(finite.min()), threshold) if finite.size else threshold
+    hi = max(float(finite.max()), threshold) if finite.size else threshold
+    if op in ("within", "within_db"):
+        lo = 0.0
+    return np.linspace(lo, hi, n_points)
+
+
+def _cumulate(counts, axis, rising):
+    """Turn per-index counts of length ``N + 1`` along ``axis`` into
+    the ``N`` passing totals of the grid thresholds."""
+    n = counts.shape[axis] - 1
+    if rising:
+        return np.cumsum(counts, axis=axis).take(np.arange(n), axis=axis)
+    tail = np.flip(np.cumsum(np.flip(counts, axis), axis=axis), axis)
+    return tail.take(np.arange(1, n + 1), axis=axis)
+
+
+def _pass_pct(pass_mass, weights):
+    """Yield % from passing weight. The importance-sampling estimator
+    is ``1 - mean(w · fail)``, which differs from ``mean(w · pass)``
+    by ``mean(w) - 1``; with unit weights the two coincide."""
+    n = weights.size
+    return 100.0 * (1.0 - (weights.sum() - pass_mass) / n)
+
+
+def _sorted_grid(thresholds):
+    grid = np.asarray(thresholds, dtype=float).reshape(-1)
+    if grid.size == 0:
+        raise ValueError("thresholds must be non-empty")
+    order = np.argsort(grid, kind="stable")
+    return grid, order, grid[order]
+
+
+def _spec_axis(report, name, thresholds, n_points):
+    """``(op, grid, order, index, rising)`` for one spec's threshold
+    axis."""
+    if name not in report.spec:
+        raise KeyError(
+            f"{name!r} is not a spec of this report; "
+            f"specs: {list(report.spec)}"
+        )
+    op, thr = report.spec[name]
+    key, rising, side = _threshold_key(report.metric_samples[name], op,
+                                       report.nominal_metrics.get(name))
+    if thresholds is None:
+        thresholds = _default_grid(key, op, thr, n_points)
+    grid, order, ascending = _sorted_grid(thresholds)
+    # Index of the first passing threshold if rising (the sample passes
+    # ascending[j:]), else one past the last (passes ascending[:j]).
+    index = np.searchsorted(ascending, key, side=side)
+    return op, grid, order, index, rising
+
+
+def _others_pass(report, exclude):
+    """Pass mask of every spec not in ``exclude`` at its current
+    threshold."""
+    others = {k: v for k, v in report.spec.items() if k not in exclude}
+    if not others:
+        return None
+    return _pass_matrix(report.metric_samples, others,
+                        report.nominal_metrics).all(axis=1)
+
+
+def threshold_curves(report, specs=None, thresholds=None, n_points=50):
+    """``{spec_name: ThresholdCurve}`` — see
+    ``YieldReport.threshold_curves``."""
+    if n_points < 2:
+        raise ValueError(f"n_points must be >= 2, got {n_points}")
+    names = list(report.spec) if specs is None else list(specs)
+    thresholds = thresholds or {}
+    unknown = set(thresholds) - set(names)
+    if unknown:
+        raise KeyError(f"thresholds given for unselected specs: "
+                       f"{sorted(unknown)}")
+    w = _weights(report)
+    n = len(report.metric_samples[next(iter(report.spec))]) \
+        if report.spec else 0
+    if n == 0:
+        raise ValueError("report holds no metric samples")
+    base = np.ones(n) if w is None else w
+    curves = {}
+    for name in names:
+        op, grid, order, idx, rising = _spec_axis(
+            report, name, thresholds.get(name), n_points)
+        others = _others_pass(report, {name})
+        joint_w = base if others is None else base * others
+        size = grid.size + 1
+        alone = _cumulate(np.bincount(idx, weights=base, minlength=size),
+                          0, rising)
+        joint = _cumulate(np.bincount(idx, weights=joint_w, minlength=size),
+                          0, rising)
+        yield_alone = np.empty(grid.size)
+        yield_joint = np.empty(grid.size)
+        yield_alone[order] = _pass_pct(alone, base)
+        yield_joint[order] = _pass_pct(joint, base)
+        curves[name] = ThresholdCurve(
+            spec=name, op=op, thresholds=grid,
+            yield_pct=yield_alone, joint_yield_pct=yield_joint,
+        )
+    return curves
+
+
+def yield_surface(report, spec_a, spec_b, thresholds_a=None,
+                  thresholds_b=None, n_points=50):
+    """``YieldSurface`` — see ``YieldReport.yield_surface``."""
+    if n_points < 2:
+        raise ValueError(f"n_points must be >= 2, got {n_points}")
+    if spec_a == spec_b:
+        raise ValueError("yield_surface needs two different specs")
+    op_a, grid_a, order_a, idx_a, rising_a = _spec_axis(
+        report, spec_a, thresholds_a, n_points)
+    op_b, grid_b, order_b, idx_b, rising_b = _spec_axis(
+        report, spec_b, thresholds_b, n_points)
+    n = idx_a.size
+    w = _weights(report)
+    base = np.ones(n) if w is None else w
+    others = _others_pass(report, {spec_a, spec_b})
+    weights = base if others is None else base * others
+    na, nb = grid_a.size + 1, grid_b.size + 1
+    counts = np.bincount(idx_a * nb + idx_b, weights=weights,
+                         minlength=na * nb).reshape(na, nb)
+    counts = _cumulate(_cumulate(counts, 0, rising_a), 1, rising_b)
+    surface = np.empty((grid_a.size, grid_b.size))
+    surface[np.ix_(order_a, order_b)] = _pass_pct(counts, base)
+    return YieldSurface(
+        specs=(spec_a, spec_b), ops=(op_a, op_b),
+        thresholds=(grid_a, grid_b), joint_yield_pct=surface,
+    )
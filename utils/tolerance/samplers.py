@@ -27,11 +27,18 @@ The four common shapes:
   Avol from 50k to 1M, BJT β from 100 to 400).
 - ``Constant(value)`` — fixed value, no perturbation. Useful for
   locking one parameter while sweeping others.
+
+Each sampler also exposes ``ppf(u)``, its inverse CDF. That's what
+``analyze(sampling="sobol" | "halton" | "lhs")`` uses: it draws
+low-discrepancy points in the unit hypercube and maps each column
+through the matching sampler's ``ppf``. Custom ``Sampler`` subclasses
+only need ``ppf`` if they're used with those sampling modes.
 """
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 
 import numpy as np
+from scipy.stats import norm
 
 
 class Sampler(ABC):
@@ -53,6 +60,15 @@ class Sampler(ABC):
     def nominal(self) -> float:
         ...
 
+    def ppf(self, u: np.ndarray) -> np.ndarray:
+        """Inverse CDF: map uniform ``u`` in (0, 1) onto this
+        distribution. Needed only for quasi-random / Latin-hypercube
+        sampling; the default raises."""
+        raise NotImplementedError(
+            f"{type(self).__name__} has no ppf(); it can only be used "
+            f"with sampling='random'"
+        )
+
 
 @dataclass
 class RelativeGaussian(Sampler):
@@ -71,6 +87,10 @@ class RelativeGaussian(Sampler):
     def nominal(self):
         return self.nominal_value
 
+    def ppf(self, u):
+        sigma = self.nominal_value * self.tol / self.sigmas
+        return self.nominal_value + sigma * norm.ppf(u)
+
 
 @dataclass
 class RelativeUniform(Sampler):
@@ -88,6 +108,11 @@ class RelativeUniform(Sampler):
     def nominal(self):
         return self.nominal_value
 
+    def ppf(self, u):
+        lo = self.nominal_value * (1.0 - self.tol)
+        hi = self.nominal_value * (1.0 + self.tol)
+        return lo + (hi - lo) * np.asarray(u)
+
 
 @dataclass
 class AbsoluteGaussian(Sampler):
@@ -109,6 +134,9 @@ class AbsoluteGaussian(Sampler):
     def nominal(self):
         return self.mean
 
+    def ppf(self, u):
+        return self.mean + self.sigma * norm.ppf(u)
+
 
 @dataclass
 class Uniform(Sampler):
@@ -125,6 +153,9 @@ class Uniform(Sampler):
     def nominal(self):
         return 0.5 * (self.lo + self.hi)
 
+    def ppf(self, u):
+        return self.lo + (self.hi - self.lo) * np.asarray(u)
+
 
 @dataclass
 class LogUniform(Sampler):
@@ -153,6 +184,10 @@ class LogUniform(Sampler):
     def nominal(self):
         return float(np.sqrt(self.lo * self.hi))
 
+    def ppf(self, u):
+        log_lo, log_hi = np.log(self.lo), np.log(self.hi)
+        return np.exp(log_lo + (log_hi - log_lo) * np.asarray(u))
+
 
 @dataclass
 class Constant(Sampler):
@@ -166,3 +201,6 @@ class Constant(Sampler):
 
     def nominal(self):
         return self.value
+
+    def ppf(self, u):
+        return np.full(np.shape(u), self.value, dtype=float)
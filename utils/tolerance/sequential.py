@@ -0,0 +1,143 @@
+"""Sequential Monte-Carlo: stop once the yield is known well enough.
+
+``n_mc`` is usually guesswork. A design at 100 % or 40 % yield has an
+obvious answer after a hundred samples; the other 900 ngspice runs buy
+nothing. ``analyze(early_stop=EarlyStop(...))`` runs in seed-
+deterministic batches and stops as soon as either
+
+- the yield confidence interval is narrower than ``width``
+  percentage points, or
+- the interval lies wholly above or wholly below ``threshold`` — the
+  pass/fail question against a yield target is decided at the
+  requested confidence.
+
+``n_mc`` becomes the cap. The report's ``samples_total`` is the number
+of samples actually used and ``yield_interval`` records the final
+interval.
+
+Repeatedly looking at an interval and stopping when it's good enough
+is optional stopping: the nominal ``confidence`` is slightly
+optimistic. With batches of ~100 the effect is small next to the
+modelling error in the tolerance distributions themselves; raise
+``confidence`` if you need a strict guarantee.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from scipy.stats import beta, norm
+
+
+_VALID_METHODS = {"wilson", "clopper-pearson"}
+
+
+def wilson_interval(k, n, confidence=0.95):
+    """Wilson score interval for a binomial proportion ``k / n``, as
+    ``(lo, hi)`` fractions. Well-behaved at 0 and n successes, where
+    the textbook normal interval collapses to zero width."""
+    if n == 0:
+        return (0.0, 1.0)
+    z = float(norm.ppf(0.5 + confidence / 2.0))
+    p = k / n
+    denom = 1.0 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * ((p * (1 - p) / n + z * z / (4 * n * n)) ** 0.5) / denom
+    return (max(0.0, centre - half), min(1.0, centre + half))
+
+
+def clopper_pearson_interval(k, n, confidence=0.95):
+    """Exact (conservative) Clopper–Pearson interval for ``k / n``, as
+    ``(lo, hi)`` fractions."""
+    if n == 0:
+        return (0.0, 1.0)
+    alpha = 1.0 - confidence
+    lo = 0.0 if k == 0 else float(beta.ppf(alpha / 2, k, n - k + 1))
+    hi = 1.0 if k == n else float(beta.ppf(1 - alpha / 2, k + 1, n - k))
+    return (lo, hi)
+
+
+def yield_interval(k, n, confidence=0.95, method="wilson"):
+    """Dispatch to ``wilson_interval`` / ``clopper_pearson_interval``."""
+    if method == "wilson":
+        return wilson_interval(k, n, confidence)
+    if method == "clopper-pearson":
+        return clopper_pearson_interval(k, n, confidence)
+    raise ValueError(
+        f"Unknown interval method: {method!r}. "
+        f"Valid: {sorted(_VALID_METHODS)}"
+    )
+
+
+@dataclass
+class EarlyStop:
+    """Stopping rule for ``analyze(early_stop=...)``.
+
+    Args:
+        width: Stop once the full interval width is below this many
+            percentage points (``width=4`` → yield known to ±2 %).
+        threshold: Yield target in percent. Stop once the interval
+            lies entirely above it (pass decided) or entirely below
+            it (fail decided).
+        confidence: Interval confidence level. Default 0.95.
+        method: ``"wilson"`` (default) or ``"clopper-pearson"`` (exact,
+            wider — use when the answer will be quoted as a bound).
+        batch_size: Samples per batch; the rule is checked after each
+            batch. Batches are drawn in order from one seeded stream,
+            so a given ``(seed, batch_size)`` always stops at the same
+            sample count with the same result.
+        min_samples: Never stop before this many samples. Default is
+            one batch.
+
+    At least one of ``width`` / ``threshold`` is required; with both,
+    whichever is met first stops the run.
+    """
+    width: Optional[float] = None
+    threshold: Optional[float] = None
+    confidence: float = 0.95
+    method: str = "wilson"
+    batch_size: int = 100
+    min_samples: Optional[int] = None
+
+    def __post_init__(self):
+        if self.width is None and self.threshold is None:
+            raise ValueError("EarlyStop needs width=, threshold=, or both")
+        if self.width is not None and not (0 < self.width <= 100):
+            raise ValueError(
+                f"width must be in (0, 100] percentage points, "
+                f"got {self.width}"
+            )
+        if self.threshold is not None and not (0 <= self.threshold <= 100):
+            raise ValueError(
+                f"threshold must be a yield in [0, 100] %, "
+                f"got {self.threshold}"
+            )
+        if not (0 < self.confidence < 1):
+            raise ValueError(
+                f"confidence must be in (0, 1), got {self.confidence}"
+            )
+        if self.method not in _VALID_METHODS:
+            raise ValueError(
+                f"Unknown interval method: {self.method!r}. "
+                f"Valid: {sorted(_VALID_METHODS)}"
+            )
+        if self.batch_size < 1:
+            raise ValueError(
+                f"batch_size must be >= 1, got {self.batch_size}"
+            )
+
+    def interval(self, k, n):
+        """``(lo_pct, hi_pct)`` yield interval after ``k`` passes in
+        ``n`` samples."""
+        lo, hi = yield_interval(k, n, self.confidence, self.method)
+        return (100.0 * lo, 100.0 * hi)
+
+    def satisfied(self, k, n):
+        """Whether the run may stop after ``k`` passes in ``n``."""
+        if n < (self.min_samples or self.batch_size):
+            return False
+        lo, hi = self.interval(k, n)
+        if self.width is not None and hi - lo < self.width:
+            return True
+        if self.threshold is not None and (lo > self.threshold
+                                           or hi < self.threshold):
+            return True
+        return False
@@ -0,0 +1,327 @@
+"""In-process ngspice backend: libngspice through ctypes.
+
+``NgspiceBackend`` starts ``ngspice -b`` for every sample: a process
+spawn, a temp ``.cir``, a parse of the netlist and every ``.include``d
+model library, then a regex over stdout. For the small AC / OP
+circuits most tolerance sweeps run, that start-up is most of the wall
+time. ``SharedNgspiceBackend`` loads the shared library once per
+process instead, loads the circuit once, and for each sample changes
+the parameters (``alterparam`` + ``reset``), re-runs the analyses and
+reads the measurements from ngspice's vectors in memory.
+
+The circuit is only loaded once when the template is a format string
+whose ``{name}`` placeholders sit where ngspice evaluates ``{...}``
+expressions anyway — element values, ``.param`` and ``.model`` lines.
+The template is then loaded verbatim with a ``.param`` line for each
+placeholder, so ``R1 in out {R}`` reads ``R`` from a parameter that
+``alterparam`` changes. Any other template — a callable, placeholders
+in ``.control`` lines or ``.include`` paths, ``{{`` escapes — is
+rendered per sample and its circuit re-loaded in memory, which still
+saves the process and the temp file.
+"""
+import copy
+import ctypes
+import ctypes.util
+import os
+import threading
+import time
+
+from .netlist import netlist_digest
+from .ngspice import (TimedOut, _param_names, _parse_meas_output,
+                      _signature, _split_control)
+
+
+class _Complex(ctypes.Structure):
+    _fields_ = [("cx_real", ctypes.c_double), ("cx_imag", ctypes.c_double)]
+
+
+class _VectorInfo(ctypes.Structure):
+    _fields_ = [
+        ("v_name", ctypes.c_char_p),
+        ("v_type", ctypes.c_int),
+        ("v_flags", ctypes.c_short),
+        ("v_realdata", ctypes.POINTER(ctypes.c_double)),
+        ("v_compdata", ctypes.POINTER(_Complex)),
+        ("v_length", ctypes.c_int),
+    ]
+
+
+# sharedspice.h callbacks: output text, status text, ngspice wanting
+# to exit, and the background thread starting / stopping.
+_SendChar = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_char_p, ctypes.c_int,
+                             ctypes.c_void_p)
+_SendStat = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_char_p, ctypes.c_int,
+                             ctypes.c_void_p)
+_ControlledExit = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_int, ctypes.c_bool,
+                                   ctypes.c_bool, ctypes.c_int,
+                                   ctypes.c_void_p)
+_BGThreadRunning = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_bool,
+                                    ctypes.c_int, ctypes.c_void_p)
+
+# ``.control`` commands that run an analysis — sent as ``bg_<cmd>`` so
+# they run on ngspice's background thread and a timeout can halt them.
+_ANALYSES = {"ac", "dc", "disto", "noise", "op", "pss", "pz", "run", "sens",
+             "sp", "tf", "tran"}
+
+
+class _Session:
+    """libngspice loaded in this process: one circuit at a time, one
+    command at a time — ``lock`` serialises the backends sharing it."""
+
+    def __init__(self, library):
+        self.lib = _load(library)
+        self.lock = threading.Lock()
+        self.output = []
+        self.loaded = None          # token of the circuit in memory
+        self.exited = None
+        self._has_circuit = False
+        self._idle = threading.Event()
+        self._idle.set()
+        # Kept referenced: ngspice calls back through these for as
+        # long as the library is loaded.
+        self._callbacks = (_SendChar(self._on_char),
+                           _SendStat(lambda *_: 0),
+                           _ControlledExit(self._on_exit),
+                           _BGThreadRunning(self._on_bg))
+        send_char, send_stat, controlled_exit, bg_running = self._callbacks
+        self.lib.ngSpice_Init(send_char, send_stat, controlled_exit,
+                              None, None, bg_running, None)
+
+    def _on_char(self, text, _id, _user):
+        line = text.decode(errors="replace")
+        for prefix in ("stdout ", "stderr "):
+            if line.startswith(prefix):
+                line = line[len(prefix):]
+                break
+        self.output.append(line)
+        return 0
+
+    def _on_exit(self, status, _unload, _quit, _id, _user):
+        self.exited = status
+        return 0
+
+    def _on_bg(self, not_running, _id, _user):
+        if not_running:
+            self._idle.set()
+        else:
+            self._idle.clear()
+        return 0
+
+    def command(self, text):
+        return self.lib.ngSpice_Command(text.encode())
+
+    def load(self, lines):
+        """Replace the circuit in memory with ``lines``."""
+        if self._has_circuit:
+            self.command("remcirc")
+        self.loaded = None
+        self._has_circuit = True
+        array = (ctypes.c_char_p * (len(lines) + 1))(
+            *[line.encode() for line in lines], None)
+        return self.lib.ngSpice_Circ(array)
+
+    def run(self, commands, timeout):
+        """Run ``.control`` ``commands``, analyses on the background
+        thread; ``False`` if ``timeout`` ran out (the analysis is then
+        halted)."""
+        deadline = time.monotonic() + timeout
+        for cmd in commands:
+            if cmd.split()[0].lower() not in _ANALYSES:
+                self.command(cmd)
+                continue
+            self._idle.clear()
+            self.command("bg_" + cmd)
+            if not self._idle.wait(max(deadline - time.monotonic(), 0.0)):
+                self.command("bg_halt")
+                self._idle.wait(5.0)
+                return False
+        return True
+
+    def vector(self, name):
+        """First value of vector ``name`` in the current plot, or
+        ``None``."""
+        info = self.lib.ngGet_Vec_Info(name.encode())
+        if not info or info.contents.v_length < 1:
+            return None
+        info = info.contents
+        if info.v_realdata:
+            return info.v_realdata[0]
+        if info.v_compdata:
+            return info.v_compdata[0].cx_real
+        return None
+
+
+def _load(library):
+    path = (library or ctypes.util.find_library("ngspice")
+            or "libngspice.so")
+    try:
+        lib = ctypes.CDLL(path)
+    except OSError as exc:
+        raise RuntimeError(
+            f"libngspice not found ({path!r}): install the ngspice "
+            f"shared library or pass library= its path") from exc
+    lib.ngSpice_Init.argtypes = [_SendChar, _SendStat, _ControlledExit,
+                                 ctypes.c_void_p, ctypes.c_void_p,
+                                 _BGThreadRunning, ctypes.c_void_p]
+    lib.ngSpice_Init.restype = ctypes.c_int
+    lib.ngSpice_Command.argtypes = [ctypes.c_char_p]
+    lib.ngSpice_Command.restype = ctypes.c_int
+    lib.ngSpice_Circ.argtypes = [ctypes.POINTER(ctypes.c_char_p)]
+    lib.ngSpice_Circ.restype = ctypes.c_int
+    lib.ngGet_Vec_Info.argtypes = [ctypes.c_char_p]
+    lib.ngGet_Vec_Info.restype = ctypes.POINTER(_VectorInfo)
+    return lib
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _session(library):
+    """This process's session for ``library`` — a forked child
+    initialises its own."""
+    key = (os.getpid(), library)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = _Session(library)
+    return session
+
+
+class SharedNgspiceBackend:
+    """``NgspiceBackend`` without the process per sample: ngspice runs
+    inside this process through its shared library.
+
+    Use exactly as ``NgspiceBackend``::
+
+        backend = SharedNgspiceBackend(template=RC_TEMPLATE,
+                                       outputs=["fc"])
+        report = analyze(metrics=backend, ..., workers=8,
+                         executor="process")
+
+    Same ``template`` / ``outputs`` semantics, same ``signature()``
+    (so it shares cache entries with ``NgspiceBackend`` and
+    ``RemoteNgspiceBackend``), same failure handling — NaN for a
+    missing or failed measurement, ``TimedOut`` past ``timeout``,
+    ``RuntimeError`` when ngspice errors without measuring anything.
+
+    Measurements are read as vectors — ``meas`` in a ``.control``
+    block stores one under the measurement's name — falling back to
+    the printed ``name = value`` lines for ``.meas`` statements.
+
+    Args:
+        template: Callable or ``str.format`` template, as for
+            ``NgspiceBackend``. A format string whose placeholders
+            are only on element, ``.param`` and ``.model`` lines is
+            loaded once and re-run per sample with ``alterparam``;
+            anything else is re-loaded per sample (see the module
+            docstring).
+        outputs: Measurement names to return.
+        library: Path to ``libngspice.so`` / ``ngspice.dll``. Default:
+            found via ``ctypes.util.find_library("ngspice")``.
+        timeout: Seconds per sample before its analysis is halted.
+
+    Threading: ngspice keeps one circuit in global state, so calls in
+    one process take turns — a thread pool gains nothing. Run
+    ``analyze(executor="process")``: the backend pickles as its
+    settings and each worker process loads its own library.
+    """
+
+    def __init__(self, template, outputs, *, library=None, timeout=60.0):
+        if not (callable(template) or isinstance(template, str)):
+            raise TypeError(
+                "template must be a callable (**values) -> str or a "
+                "format string"
+            )
+        self.template = template
+        self.outputs = list(outputs)
+        self.library = library
+        self.timeout = timeout
+        self._params = _param_names(template)
+        self._circuit = self._control = None
+        # Identifies this circuit in a session; shared by
+        # ``with_timeout`` copies, which run the same one.
+        self._token = object()
+
+    def __getstate__(self):
+        return {"template": self.template, "outputs": self.outputs,
+                "library": self.library, "timeout": self.timeout}
+
+    def __setstate__(self, state):
+        self.__init__(state.pop("template"), state.pop("outputs"), **state)
+
+    def signature(self):
+        """As ``NgspiceBackend.signature()`` — the simulator is the
+        same, so are the results."""
+        return _signature(self.template, self.outputs)
+
+    def with_timeout(self, timeout):
+        """This backend with a different ``timeout``."""
+        other = copy.copy(self)
+        other.timeout = timeout
+        return other
+
+    def netlist_key(self, **values):
+        """As ``NgspiceBackend.netlist_key``."""
+        return netlist_digest(self._render(values), self.outputs)
+
+    def _render(self, values):
+        if callable(self.template):
+            return self.template(**values)
+        return self.template.format(**values)
+
+    def __call__(self, **values):
+        session = _session(self.library)
+        with session.lock:
+            if session.exited is not None:
+                raise RuntimeError(
+                    f"libngspice exited (status {session.exited}); "
+                    f"start a new process to reload it")
+            del session.output[:]
+            try:
+                return self._run(session, values)
+            finally:
+                session.command("destroy all")
+
+    def _run(self, session, values):
+        if self._params is not None:
+            if self._circuit is None:
+                lines, self._control = _split_control(self.template)
+                self._circuit = [lines[0]] + [
+                    f".param {name}={float(values[name])!r}"
+                    for name in self._params] + lines[1:]
+            if session.loaded is not self._token:
+                if session.load(self._circuit) != 0:
+                    return self._failed(session)
+                session.loaded = self._token
+            for name in self._params:
+                session.command(f"alterparam {name}={float(values[name])!r}")
+            session.command("reset")
+            control = self._control
+        else:
+            lines, control = _split_control(self._render(values))
+            if session.load(lines) != 0:
+                return self._failed(session)
+
+        if not session.run(control or ["run"], self.timeout):
+            return TimedOut.of(self.outputs)
+
+        results = {name: session.vector(name) for name in self.outputs}
+        if any(v is None for v in results.values()):
+            printed = _parse_meas_output("\n".join(session.output))
+            for name, v in results.items():
+                if v is None and name in printed:
+                    results[name] = printed[name]
+        if all(v is None for v in results.values()) and any(
+                line.lower().startswith("error") for line in session.output):
+            return self._failed(session)
+        return {name: float("nan") if v is None else v
+                for name, v in results.items()}
+
+    def _failed(self, session):
+        session.loaded = None
+        raise RuntimeError(
+            f"libngspice failed and produced no measurements — likely "
+            f"a template error.\noutput (last 2k):\n"
+            f"{chr(10).join(session.output)[-2000:]}"
+        )
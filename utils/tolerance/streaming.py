@@ -0,0 +1,189 @@
+"""Memory-bounded accumulators for ``analyze(streaming=True)``.
+
+A 10⁷-sample rare-failure run can't hold the sample matrix, the
+per-sample metric dicts, or the full metric arrays. Streaming mode
+draws and evaluates ``chunk_size`` samples at a time and folds each
+chunk into the accumulators here, whose size is independent of
+``n_mc``:
+
+- ``QuantileSketch`` — a KLL-style compactor stack for p1…p99. Exact
+  while fewer than ``k`` finite values have been seen; beyond that
+  the rank error is a fraction of a percent at the default ``k``,
+  well inside the MC noise of the percentiles themselves.
+- ``MomentAccumulator`` — count / min / max and shifted power sums for
+  mean, std, skew and excess kurtosis. Matches the population
+  (``ddof=0``) definitions ``MetricStats`` uses elsewhere.
+- ``Reservoir`` — a uniform random subset of whole metric rows (the
+  same sample index across every metric, so scatter plots between
+  metrics stay meaningful) for ``YieldReport.metric_samples``.
+"""
+import numpy as np
+
+from .report import MetricStats
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch over a stream of float arrays.
+
+    Level ``h`` holds values that each stand for ``2**h`` originals.
+    When a level exceeds ``k`` items it is sorted and every other item
+    (random offset, so the rounding is unbiased) is promoted to the
+    next level. Memory is ``O(k · log2(n / k))``.
+    """
+
+    def __init__(self, k=4096, rng=None):
+        if k < 2:
+            raise ValueError(f"sketch size k must be >= 2, got {k}")
+        self.k = k
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.levels = [np.empty(0)]
+
+    @property
+    def count(self):
+        return int(sum(lvl.size << h for h, lvl in enumerate(self.levels)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).reshape(-1)
+        if values.size == 0:
+            return
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if level.size > self.k:
+                level = np.sort(level)
+                # Keep an odd leftover at this level so no weight is
+                # lost to the halving.
+                keep = level[-1:] if level.size % 2 else level[:0]
+                even = level[:level.size - keep.size]
+                promoted = even[int(self.rng.integers(2))::2]
+                self.levels[h] = keep
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[h + 1] = np.concatenate(
+                    [self.levels[h + 1], promoted]
+                )
+            h += 1
+
+    def quantiles(self, qs):
+        """Values at fractional ranks ``qs`` (each in [0, 1]). Matches
+        ``np.percentile``'s linear interpolation exactly while the
+        sketch has never compacted."""
+        qs = np.asarray(qs, dtype=float)
+        if len(self.levels) == 1:
+            if self.levels[0].size == 0:
+                return np.full(qs.shape, np.nan)
+            return np.percentile(self.levels[0], 100.0 * qs)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(lvl.size, float(1 << h))
+                                  for h, lvl in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        values, weights = values[order], weights[order]
+        centres = np.cumsum(weights) - 0.5 * weights
+        return np.interp(qs * weights.sum(), centres, values)
+
+
+class MomentAccumulator:
+    """Running count / extrema / first four central moments of the
+    finite values seen so far.
+
+    Power sums are taken about a shift fixed from the first chunk, so
+    a metric sitting at 1e6 ± 1 doesn't lose its variance to
+    cancellation in ``Σx² - n·mean²``.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.shift = None
+        self.sums = np.zeros(4)
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, finite):
+        if finite.size == 0:
+            return
+        if self.shift is None:
+            self.shift = float(finite.mean())
+        d = finite - self.shift
+        d2 = d * d
+        self.sums += (d.sum(), d2.sum(), (d2 * d).sum(), (d2 * d2).sum())
+        self.n += finite.size
+        self.min = min(self.min, float(finite.min()))
+        self.max = max(self.max, float(finite.max()))
+
+    def moments(self):
+        """``(mean, std, skew, excess_kurtosis)`` — population forms."""
+        s1, s2, s3, s4 = self.sums / self.n
+        m2 = max(s2 - s1 * s1, 0.0)
+        m3 = s3 - 3 * s1 * s2 + 2 * s1 ** 3
+        m4 = s4 - 4 * s1 * s3 + 6 * s1 * s1 * s2 - 3 * s1 ** 4
+        std = float(np.sqrt(m2))
+        if std > 0:
+            skew = float(m3 / m2 ** 1.5)
+            excess_kurt = float(m4 / m2 ** 2 - 3.0)
+        else:
+            skew = 0.0
+            excess_kurt = 0.0
+        return self.shift + s1, std, skew, excess_kurt
+
+
+class Reservoir:
+    """Uniform random sample (Algorithm R) of ``size`` rows from a
+    stream of ``(m, n_cols)`` row blocks."""
+
+    def __init__(self, size, n_cols, rng=None):
+        self.size = size
+        self.rows = np.empty((size, n_cols))
+        self.seen = 0
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    def update(self, block):
+        m = block.shape[0]
+        fill = min(max(self.size - self.seen, 0), m)
+        if fill:
+            self.rows[self.seen:self.seen + fill] = block[:fill]
+        rest = block[fill:]
+        if rest.shape[0]:
+            # Row with global index g survives with probability
+            # size/(g+1) and replaces a uniformly chosen slot. On a
+            # slot collision NumPy's fancy assignment keeps the last
+            # row, the same outcome as the one-at-a-time algorithm.
+            g = self.seen + fill + np.arange(rest.shape[0])
+            slot = (self.rng.random(rest.shape[0]) * (g + 1)).astype(np.int64)
+            keep = slot < self.size
+            self.rows[slot[keep]] = rest[keep]
+        self.seen += m
+
+    def samples(self):
+        return self.rows[:min(self.seen, self.size)]
+
+
+class StreamingMetric:
+    """Sketch + moments for one metric; produces its ``MetricStats``."""
+
+    def __init__(self, sketch_k=4096, rng=None):
+        self.sketch = QuantileSketch(sketch_k, rng)
+        self.moments = MomentAccumulator()
+
+    def update(self, values):
+        finite = values[np.isfinite(values)]
+        self.sketch.update(finite)
+        self.moments.update(finite)
+
+    def stats(self):
+        if self.moments.n == 0:
+            nan = float("nan")
+            return MetricStats(min=nan, max=nan, mean=nan, std=nan,
+                               p1=nan, p5=nan, p50=nan, p95=nan, p99=nan,
+                               skew=nan, excess_kurtosis=nan)
+        p1, p5, p50, p95, p99 = (
+            float(v) for v in
+            self.sketch.quantiles([0.01, 0.05, 0.50, 0.95, 0.99])
+        )
+        mean, std, skew, excess_kurt = self.moments.moments()
+        return MetricStats(
+            min=self.moments.min, max=self.moments.max,
+            mean=float(mean), std=std,
+            p1=p1, p5=p5, p50=p50, p95=p95, p99=p99,
+            skew=skew, excess_kurtosis=excess_kurt,
+        )
@@ -47,7 +47,9 @@ def analyze_corners(*, temperature_corners: Iterable[float],
                     correlations=None,
                     temperature_coefficients=None,
                     temperature_nominal=25.0,
-                    workers=1) -> SweepReport:
+                    workers=1, vectorized=False,
+                    executor="thread", chunk_size=None,
+                    early_stop=None, sampling="random") -> SweepReport:
     """Run an MC at each given T corner. Thin wrapper over
     ``parametric_sweep(parameter='T', ...)``.
 
@@ -71,6 +73,9 @@ def analyze_corners(*, temperature_corners: Iterable[float],
         temperature_coefficients=temperature_coefficients,
         temperature_nominal=temperature_nominal,
         workers=workers,
+        vectorized=vectorized,
+        executor=executor, chunk_size=chunk_size,
+        early_stop=early_stop, sampling=sampling,
     )
 
 
@@ -82,7 +87,9 @@ def temperature_sweep(*, temperature_points: Iterable[float],
                       correlations=None,
                       temperature_coefficients=None,
                       temperature_nominal=25.0,
-                      workers=1) -> SweepReport:
+                      workers=1, vectorized=False,
+                      executor="thread", chunk_size=None,
+                      early_stop=None, sampling="random") -> SweepReport:
     """Sweep T across a range, MC at each point. Synonym for
     ``analyze_corners`` — naming convention only (sweep = many
     points, corners = a few). For other-parameter sweeps see
@@ -107,4 +114,7 @@ def temperature_sweep(*, temperature_points: Iterable[float],
         temperature_coefficients=temperature_coefficients,
         temperature_nominal=temperature_nominal,
         workers=workers,
+        vectorized=vectorized,
+        executor=executor, chunk_size=chunk_size,
+        early_stop=early_stop, sampling=sampling,
     )
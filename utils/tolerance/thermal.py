@@ -45,7 +45,9 @@ def thermal_dither(*, nominal_values, passive_tolerances, metrics, spec,
                     tolerance_sigma=3.0, distribution="gaussian",
                     active_devices=None, correlations=None,
                     temperature_coefficients=None,
-                    workers=1):
+                    workers=1, vectorized=False,
+                    executor="thread", chunk_size=None,
+                    early_stop=None, sampling="random"):
     """Paired-T MC analysis. Thin wrapper over
     ``parametric_dither(parameter='T', base=T_nominal,
     dither=T_dither, ...)`` — kept for backward compatibility and
@@ -65,4 +67,7 @@ def thermal_dither(*, nominal_values, passive_tolerances, metrics, spec,
         temperature_coefficients=temperature_coefficients,
         temperature_nominal=T_nominal,
         workers=workers,
+        vectorized=vectorized,
+        executor=executor, chunk_size=chunk_size,
+        early_stop=early_stop, sampling=sampling,
     )
@@ -0,0 +1,120 @@
+"""Where local ngspice runs put their files.
+
+Every local run needs somewhere for its netlist and whatever its
+``.control`` block writes (``wrdata``, ``write``). By default that is
+a fresh directory under the system temp dir per run, removed after;
+on NFS-homed machines, where even ``/tmp`` can be slow, a
+``WorkArea`` moves it to a RAM-backed tmpfs or skips the netlist file
+entirely by piping it to ``ngspice -b`` on stdin.
+
+``NgspiceBackend(work_area=...)`` and ``NgspicePool(work_area=...)``
+take one, and the ``ngspice_examples`` harnesses use one for their
+``run.cir`` / ``run.data``.
+"""
+import functools
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+# ngspice 44.x mis-reads AC sources from a netlist on stdin (see
+# ``remote._REMOTE_CMD``); 45 is the first release known to be fine.
+_STDIN_MIN_VERSION = (45,)
+_VERSION_RE = re.compile(r"ngspice-(\d+)(?:\.(\d+))?")
+
+# RAM-backed directories, in order of preference.
+_TMPFS_CANDIDATES = ("/dev/shm", os.environ.get("XDG_RUNTIME_DIR"))
+
+
+@functools.lru_cache(maxsize=None)
+def _ngspice_version(ngspice):
+    """``(major, minor)`` from ``ngspice -v``, or ``None`` if it can't
+    be run or parsed."""
+    try:
+        result = subprocess.run([ngspice, "-v"], capture_output=True,
+                                text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    m = _VERSION_RE.search(result.stdout + result.stderr)
+    if m is None:
+        return None
+    return int(m.group(1)), int(m.group(2) or 0)
+
+
+@dataclass
+class WorkArea:
+    """Scratch space for local ngspice runs.
+
+    Use::
+
+        backend = NgspiceBackend(template=..., outputs=["fc"],
+                                 work_area=WorkArea.tmpfs(stdin="auto"))
+
+    Args:
+        root: Directory the per-run scratch directories go in. Default
+            ``None``: the system temp dir. ``WorkArea.tmpfs()`` picks
+            a RAM-backed one.
+        stdin: Pipe the netlist to ``ngspice -b`` on stdin instead of
+            writing it to a file. ``False`` (default), ``True``, or
+            ``"auto"``: only if ``ngspice -v`` reports version 45 or
+            later — 44.x silently zeroes AC sources read from stdin.
+            Files the netlist itself writes still go to a scratch
+            directory.
+        keep: Leave scratch directories behind for inspection instead
+            of removing them. Default ``False``.
+
+    Each run gets its own directory (``scratch()``), so concurrent runs
+    — threads, processes, parallel scripts — never share a file name.
+    """
+    root: Optional[str] = None
+    stdin: Union[bool, str] = False
+    keep: bool = False
+
+    def __post_init__(self):
+        if self.stdin not in (True, False, "auto"):
+            raise ValueError(
+                f"stdin must be True, False or 'auto', got {self.stdin!r}"
+            )
+        if self.root is not None and not os.path.isdir(self.root):
+            raise ValueError(f"root is not a directory: {self.root!r}")
+
+    @classmethod
+    def tmpfs(cls, **kwargs):
+        """A work area on the first writable RAM-backed directory
+        (``/dev/shm``, then ``$XDG_RUNTIME_DIR``), else the system
+        temp dir. Keyword arguments are passed on."""
+        for path in _TMPFS_CANDIDATES:
+            if path and os.path.isdir(path) and os.access(path, os.W_OK):
+                return cls(root=path, **kwargs)
+        return cls(**kwargs)
+
+    def use_stdin(self, ngspice):
+        """Whether runs of ``ngspice`` should get the netlist on
+        stdin. The ``"auto"`` probe runs once per binary."""
+        if self.stdin != "auto":
+            return self.stdin
+        version = _ngspice_version(ngspice)
+        return version is not None and version >= _STDIN_MIN_VERSION
+
+    def make(self, prefix="ngspice-"):
+        """A new, empty scratch directory; ``remove`` it when done."""
+        return Path(tempfile.mkdtemp(prefix=prefix, dir=self.root))
+
+    def remove(self, path):
+        """Delete a scratch directory from ``make`` (unless ``keep``)."""
+        if not self.keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+    @contextmanager
+    def scratch(self, prefix="ngspice-"):
+        """A scratch directory for the duration of a ``with`` block."""
+        path = self.make(prefix)
+        try:
+            yield path
+        finally:
+            self.remove(path)